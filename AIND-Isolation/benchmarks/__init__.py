@@ -0,0 +1,4 @@
+"""
+Benchmark scripts for the Isolation engine.  Each module can be run from the
+project directory, e.g. `python -m benchmarks.bench_board`.
+"""
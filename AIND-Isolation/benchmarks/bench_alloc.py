@@ -0,0 +1,87 @@
+"""Compare per-node allocation of the forecast_move() searches with the
+in-place push_move()/pop_move() variants on a 7x7 board.
+
+Board allocations are counted by wrapping `Board.__init__` for the duration
+of the run (each copy also allocates two state lists of width * height + 3
+cells), and tracemalloc reports the peak memory traced during each search.  The RNG is reseeded before every search so that both variants see
+the same shuffled move orders and therefore visit the same tree.
+
+Usage: python -m benchmarks.bench_alloc [positions] [depth]
+"""
+import random
+import sys
+import tracemalloc
+
+from isolation import Board
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, InPlaceMinimaxPlayer,
+                        InPlaceAlphaBetaPlayer)
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, build_position, no_timeout,
+                               timed, report)
+
+
+class AllocationCounter(object):
+    """Context manager counting the Board objects constructed inside it."""
+
+    def __enter__(self):
+        self.count = 0
+        self._init = Board.__init__
+        counter = self
+
+        def counting_init(board, *args, **kwargs):
+            counter.count += 1
+            counter._init(board, *args, **kwargs)
+
+        Board.__init__ = counting_init
+        return self
+
+    def __exit__(self, *exc):
+        Board.__init__ = self._init
+
+
+def measure(player, openings, depth, search):
+    """Run a fixed-depth search from every opening and return the totals."""
+    leaves = [0]
+
+    def counting_score(game, p):
+        leaves[0] += 1
+        return improved_score(game, p)
+
+    player.score = counting_score
+    player.time_left = no_timeout
+    boards = 0
+    peak = 0
+    elapsed = 0.
+    for i, moves in enumerate(openings):
+        game = build_position(Board, moves, player_1=player)
+        if game.active_player != player:
+            game = build_position(Board, moves, player_2=player)
+        random.seed(i)
+        tracemalloc.start()
+        with AllocationCounter() as counter:
+            _, t = timed(getattr(player, search), game, depth)
+        peak = max(peak, tracemalloc.get_traced_memory()[1])
+        tracemalloc.stop()
+        boards += counter.count
+        elapsed += t
+    return leaves[0], boards, peak, elapsed
+
+
+def run(positions=5, depth=8):
+    openings = random_openings(positions, plies=12)
+    rows = []
+    for player_cls, search, d in [(MinimaxPlayer, "minimax", depth - 3),
+                                  (InPlaceMinimaxPlayer, "minimax", depth - 3),
+                                  (AlphaBetaPlayer, "alphabeta", depth),
+                                  (InPlaceAlphaBetaPlayer, "alphabeta", depth)]:
+        leaves, boards, peak, elapsed = measure(player_cls(), openings, d, search)
+        rows.append((player_cls.__name__, d, leaves, boards,
+                     2 * boards * (7 * 7 + 3), peak, elapsed))
+    report("Allocation per search: {} positions on 7x7".format(positions),
+           ("player", "depth", "leaves", "boards", "state cells",
+            "peak bytes", "seconds"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
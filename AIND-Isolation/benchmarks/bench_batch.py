@@ -0,0 +1,108 @@
+"""Measure batched heuristic evaluation (isolation.vectorized.MobilityBatch)
+against the scalar heuristics, by batch size.
+
+Every heuristic is evaluated on batches of random positions in three ways:
+one scalar call per Board, a batch summarized from the Boards
+(`MobilityBatch.from_boards`), and a batch summarized from the positions
+held as arrays (`MobilityBatch.from_arrays` on `board_arrays()`, the layout
+of `VectorGames`).  The batch scores are checked against the scalar ones.
+Then the expansion sites are timed with and without batching: the move of
+`GreedyPlayer` and a fixed-depth `AlphaBetaPlayer` search with
+`batch_leaves`, which score the children of one node at once.
+
+Usage: python -m benchmarks.bench_batch [max_batch] [positions] [depth]
+"""
+import sys
+
+from isolation import Board
+from isolation.vectorized import MobilityBatch, board_arrays
+import game_agent
+import sample_players
+
+from benchmarks.bench_eval import random_positions
+from benchmarks.common import (random_openings, place, fixed_depth, timed,
+                               report)
+
+HEURISTICS = [sample_players.open_move_score, sample_players.improved_score,
+              sample_players.center_score, game_agent.custom_score,
+              game_agent.custom_score_2, game_agent.custom_score_3]
+
+
+def scalar_scores(fn, games):
+    return [fn(game, "Player1") for game in games]
+
+
+def board_scores(fn, games):
+    return fn.batch(MobilityBatch.from_boards(games, "Player1"))
+
+
+def array_scores(fn, arrays):
+    return fn.batch(MobilityBatch.from_arrays(*arrays, player=0, width=7,
+                                              height=7))
+
+
+def rate(fn, *args):
+    """Calls per second of fn(*args), repeated for at least 0.2 s."""
+    calls, seconds = 0, 0.
+    while seconds < .2:
+        _, elapsed = timed(fn, *args)
+        calls, seconds = calls + 1, seconds + elapsed
+    return calls / seconds
+
+
+def greedy_moves(player, positions):
+    for game in positions:
+        player.get_move(game, None)
+
+
+def run(max_batch=32768, positions=20, depth=5):
+    pool = random_positions(Board, 1024)
+    rows = []
+    size = 1
+    while size <= max_batch:
+        games = (pool * (size // len(pool) + 1))[:size]
+        arrays = board_arrays(games)
+        for fn in HEURISTICS:
+            expected = scalar_scores(fn, games)
+            assert board_scores(fn, games).tolist() == expected
+            assert array_scores(fn, arrays).tolist() == expected
+            scalar = size * rate(scalar_scores, fn, games)
+            from_arrays = size * rate(array_scores, fn, arrays)
+            rows.append((fn.__name__, size, scalar,
+                         size * rate(board_scores, fn, games), from_arrays,
+                         from_arrays / scalar))
+        size *= 8
+    report("Positions scored per second",
+           ("heuristic", "batch", "scalar", "from boards", "from arrays",
+            "speed-up"), rows)
+
+    openings = random_openings(positions, plies=10)
+    rows = []
+    for fn in (sample_players.improved_score, game_agent.custom_score_3):
+        results = []
+        for batch in (False, True):
+            player = sample_players.GreedyPlayer(fn, batch=batch)
+            games = [place(player, moves) for moves in openings]
+            _, elapsed = timed(lambda: [greedy_moves(player, games)
+                                        for _ in range(20)])
+            results.append(20 * len(games) / elapsed)
+        rows.append(("GreedyPlayer", fn.__name__, "moves/s", results[0],
+                     results[1], results[1] / results[0]))
+        # The same search either way, so compare searches per second (the
+        # batched search counts the children a cutoff would have skipped)
+        results = []
+        for batch in (False, True):
+            player = game_agent.AlphaBetaPlayer(score_fn=fn, tt_size_mb=16,
+                                                move_ordering=True, pvs=True,
+                                                batch_leaves=batch)
+            _, _, elapsed = fixed_depth(player, openings, depth)
+            results.append(len(openings) / elapsed)
+        rows.append(("AlphaBetaPlayer", fn.__name__, "searches/s", results[0],
+                     results[1], results[1] / results[0]))
+    report("Expansion sites ({} positions, alpha-beta to depth {})".format(
+        positions, depth),
+        ("site", "heuristic", "unit", "scalar", "batch", "speed-up"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,73 @@
+"""Compare the node throughput of the list-based `Board` and the bitmask
+`BitBoard` backends.
+
+Two workloads are measured on the same set of random midgame positions:
+
+- perft: walk the full game tree to a fixed depth with get_legal_moves() and
+  forecast_move(), which isolates the cost of the board itself
+- alphabeta: a fixed-depth `AlphaBetaPlayer.alphabeta()` search with the
+  `improved_score` heuristic, i.e. the engine as the agents actually use it
+
+Usage: python -m benchmarks.bench_board [positions] [depth]
+"""
+import sys
+
+from isolation import Board, BitBoard
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, build_position, no_timeout,
+                               timed, report)
+
+
+def perft(game, depth):
+    """Return the number of nodes in the game tree below `game` up to
+    `depth` plies (including the root).
+    """
+    if depth == 0:
+        return 1
+    nodes = 1
+    for m in game.get_legal_moves():
+        nodes += perft(game.forecast_move(m), depth - 1)
+    return nodes
+
+
+def run(positions=20, depth=5):
+    openings = random_openings(positions, plies=8)
+    rows = []
+    for board_cls in (Board, BitBoard):
+        nodes = 0
+        elapsed = 0.
+        for moves in openings:
+            n, t = timed(perft, build_position(board_cls, moves), depth)
+            nodes += n
+            elapsed += t
+        rows.append((board_cls.__name__, "perft", nodes, elapsed, nodes / elapsed))
+
+        player = AlphaBetaPlayer(score_fn=improved_score)
+        player.time_left = no_timeout
+        leaves = [0]
+
+        def counting_score(game, p):
+            leaves[0] += 1
+            return improved_score(game, p)
+
+        player.score = counting_score
+        elapsed = 0.
+        for moves in openings:
+            game = build_position(board_cls, moves, player_1=player)
+            if game.active_player != player:
+                game = build_position(board_cls, moves, player_2=player)
+            _, t = timed(player.alphabeta, game, depth + 1)
+            elapsed += t
+        rows.append((board_cls.__name__, "alphabeta*", leaves[0], elapsed,
+                     leaves[0] / elapsed))
+
+    report("Board backends: {} positions, perft depth {}, alphabeta depth {}"
+           .format(positions, depth, depth + 1),
+           ("backend", "workload", "nodes", "seconds", "nodes/sec"), rows)
+    print("* alphabeta nodes are leaf evaluations")
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,76 @@
+"""Measure the opening book: the cost of opening it, the lookup latency,
+and the search depth it stands for.
+
+The book is built first unless a book file is given (a small 7x7 book takes
+a few seconds).  Lookups are timed on every book position and on all its
+symmetric images, and the book depth is compared with the depth iterative
+deepening reaches on the same positions within the 150 ms turn, by the
+default AlphaBetaPlayer and by one with all the search improvements.
+
+Usage: python -m benchmarks.bench_book [book] [positions]
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from game_agent import AlphaBetaPlayer
+from search.book import OpeningBook, book_positions, build_book, write_book
+
+from benchmarks.common import deadline, timed, report
+
+PLIES, DEPTH = 3, 8
+
+
+def lookups(book, games):
+    for game in games:
+        book.lookup(game)
+
+
+def searched_depth(player, games):
+    """Average depth completed by get_move() within the time limit."""
+    depths = []
+    for i, game in enumerate(games):
+        random.seed(i)
+        if game.move_count % 2 == 0:
+            game = game.with_players(player, "Opponent")
+        else:
+            game = game.with_players("Opponent", player)
+        player.get_move(game, deadline())
+        depths.append(len(player.depth_nodes))
+    return sum(depths) / len(depths)
+
+
+def run(path=None, positions=100):
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(), "book.bin")
+        records, elapsed = timed(build_book, 7, 7, PLIES, DEPTH)
+        write_book(path, records, 7, 7, PLIES, DEPTH)
+        print("Built {} positions to depth {} in {:.1f} s\n".format(
+            len(records), DEPTH, elapsed))
+
+    opened = timeit.timeit(lambda: OpeningBook(path).close(), number=100) / 100
+    book = OpeningBook(path)
+    games = list(book_positions(book.width, book.height, book.plies).values())
+    images = [game.transform(t) for game in games
+              for t in range(game.symmetries.count)]
+    hits = sum(book.lookup(game) is not None for game in images)
+    repeat = 20
+    _, elapsed = timed(lambda: [lookups(book, images) for _ in range(repeat)])
+    sample = random.Random(0).sample(games, min(positions, len(games)))
+    report("Opening book: {} ({} positions, {} bytes)".format(
+               path, len(book), os.path.getsize(path)),
+           ("open us", "lookups", "hits", "lookup us", "book depth"),
+           [(1e6 * opened, len(images), hits,
+             1e6 * elapsed / (repeat * len(images)), book.depth)])
+    players = [("AlphaBetaPlayer()", AlphaBetaPlayer()),
+               ("tt+ordering+pvs", AlphaBetaPlayer(tt_size_mb=16,
+                                                   move_ordering=True, pvs=True))]
+    report("Depth searched in 150 ms on {} book positions".format(len(sample)),
+           ("player", "depth"),
+           [(label, searched_depth(player, sample)) for label, player in players])
+
+
+if __name__ == "__main__":
+    run(*sys.argv[1:2], *map(int, sys.argv[2:]))
@@ -0,0 +1,94 @@
+"""How early can the endgame solver take over?
+
+Games are played on 7x7 boards by a greedy policy (the move that maximizes
+own minus opponent mobility, ties and one move in five chosen at random)
+until the players become partitioned.  Purely random games mostly partition
+by trapping a player, which leaves nothing to solve.
+The first partitioned position of every game is solved from scratch with
+`EndgameSolver`, and the solve times are grouped by the number of blank
+cells left (with the mean number of plies left in the game under perfect
+play).  A position can be taken over by the solver
+when it is solved within the 150 ms turn (less the 12 ms safety margin).
+
+Usage: python -m benchmarks.bench_endgame [games]
+"""
+import random
+import sys
+
+from isolation import BitBoard
+from isolation.isolation import TIME_LIMIT_MILLIS
+from search.endgame import EndgameSolver
+
+from benchmarks.common import timed, report
+
+BUCKETS = [(0, 19), (20, 24), (25, 29), (30, 34), (35, 49)]
+MARGIN = 12.
+
+
+def greedy_move(game, rng, epsilon=.2):
+    """Return the move maximizing own minus opponent mobility."""
+    moves = sorted(game.get_legal_moves())
+    if rng.random() < epsilon:
+        return rng.choice(moves)
+    player = game.active_player
+    scores = []
+    for move in moves:
+        summary = game.forecast_move(move).mobility_summary(player)
+        scores.append(summary.own_moves - summary.opp_moves)
+    best = max(scores)
+    return rng.choice([m for m, s in zip(moves, scores) if s == best])
+
+
+def partitioned_positions(games, seed=0):
+    """Return the first partitioned position of each greedy game."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < games:
+        game = BitBoard("Player1", "Player2")
+        while True:
+            if not game.get_legal_moves():
+                break
+            game.apply_move(greedy_move(game, rng))
+            if game.is_partitioned():
+                if game.get_legal_moves():
+                    positions.append(game)
+                break
+    return positions
+
+
+def plies_to_end(own_length, opp_length):
+    """Plies left with perfect play when the side to move can make
+    `own_length` moves and its opponent `opp_length`."""
+    if own_length > opp_length:
+        return 2 * opp_length + 1
+    return 2 * own_length
+
+
+def run(games=200):
+    budget = (TIME_LIMIT_MILLIS - MARGIN) / 1000.
+    results = []
+    for game in partitioned_positions(games):
+        solver = EndgameSolver()
+        _, elapsed = timed(solver.solve, game)
+        results.append((plies_to_end(*solver.path_lengths),
+                        len(game.get_blank_spaces()), elapsed))
+    rows = []
+    for low, high in BUCKETS:
+        bucket = [(p, t) for p, b, t in results if low <= b <= high]
+        if not bucket:
+            continue
+        times = [t for _, t in bucket]
+        rows.append(("{}-{}".format(low, high), len(bucket),
+                     float(sum(p for p, _ in bucket)) / len(bucket),
+                     1000. * sum(times) / len(times), 1000. * max(times),
+                     "{:.0%}".format(sum(t <= budget for t in times) / len(times))))
+    report("Endgame solver: first partitioned position of {} greedy games"
+           .format(games),
+           ("blank cells", "positions", "plies left", "mean ms", "max ms",
+            "within {:.0f} ms".format(1000 * budget)), rows)
+    solved = [b for _, b, t in results if t <= budget]
+    print("Most blank cells solved within the turn: {}".format(max(solved)))
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""Measure leaf evaluation: the heuristics written against the separate
+is_loser() / is_winner() / get_legal_moves() / get_blank_spaces() calls
+versus the same heuristics on Board.mobility_summary().
+
+Every heuristic is evaluated for both players on a set of random positions
+(including finished games) with both board backends, and the two versions
+are checked to return the same values.
+
+Usage: python -m benchmarks.bench_eval [positions] [repeat]
+"""
+import math
+import random
+import sys
+
+from isolation import Board, BitBoard
+import game_agent
+import sample_players
+
+from benchmarks.common import timed, report
+
+
+def separate_improved_score(game, player):
+    if game.is_loser(player):
+        return float("-inf")
+    if game.is_winner(player):
+        return float("inf")
+    own_moves = len(game.get_legal_moves(player))
+    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
+    return float(own_moves - opp_moves)
+
+
+def separate_custom_score(game, player):
+    if game.is_loser(player):
+        return float("-inf")
+    if game.is_winner(player):
+        return float("inf")
+    own_moves = len(game.get_legal_moves(player)) * game.move_count
+    opp_moves = len(game.get_legal_moves(game.get_opponent(player))) * game.move_count
+    return float(own_moves - opp_moves)
+
+
+def separate_custom_score_2(game, player):
+    if game.is_loser(player):
+        return float("-inf")
+    if game.is_winner(player):
+        return float("inf")
+    spacesLeft = len(game.get_blank_spaces())
+    boardSize = game.width * game.height
+    calibration = (game.move_count + (boardSize - spacesLeft)) / boardSize
+    calibration = calibration * 10
+    own_moves = len(game.get_legal_moves(player)) * calibration
+    opp_moves = len(game.get_legal_moves(game.get_opponent(player))) * calibration
+    return float(own_moves - opp_moves)
+
+
+def separate_custom_score_3(game, player):
+    if game.is_loser(player):
+        return float("-inf")
+    if game.is_winner(player):
+        return float("inf")
+    playerMoves = len(game.get_legal_moves(player))
+    oppPlayer = game.get_opponent(player)
+    oppMoves = len(game.get_legal_moves(oppPlayer))
+    a = game.get_player_location(player)
+    b = game.get_player_location(oppPlayer)
+    distance = float(math.sqrt((a[0] - b[0]) * (a[0] - b[0]) +
+                               (a[1] - b[1]) * (a[1] - b[1])))
+    return float((playerMoves + distance) - oppMoves)
+
+
+HEURISTICS = [
+    ("improved_score", separate_improved_score, sample_players.improved_score),
+    ("custom_score", separate_custom_score, game_agent.custom_score),
+    ("custom_score_2", separate_custom_score_2, game_agent.custom_score_2),
+    ("custom_score_3", separate_custom_score_3, game_agent.custom_score_3),
+]
+
+
+def random_positions(board_cls, count, seed=0):
+    """Random positions from every stage of the game, with both players
+    placed."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = board_cls("Player1", "Player2")
+        for _ in range(rng.randint(2, 40)):
+            moves = sorted(game.get_legal_moves())
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        positions.append(game)
+    return positions
+
+
+def evaluate(fn, positions, repeat):
+    for _ in range(repeat):
+        for game in positions:
+            fn(game, "Player1")
+            fn(game, "Player2")
+
+
+def run(positions=500, repeat=20):
+    rows = []
+    for board_cls in (Board, BitBoard):
+        games = random_positions(board_cls, positions)
+        calls = 2 * positions * repeat
+        for name, separate, fused in HEURISTICS:
+            for game in games:
+                for p in ("Player1", "Player2"):
+                    assert separate(game, p) == fused(game, p), (name, p)
+            _, before = timed(evaluate, separate, games, repeat)
+            _, after = timed(evaluate, fused, games, repeat)
+            rows.append((board_cls.__name__, name, calls / before,
+                         calls / after, before / after))
+    report("Leaf evaluation: {} positions x {} repeats".format(positions, repeat),
+           ("board", "heuristic", "separate evals/s", "summary evals/s",
+            "speedup"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,68 @@
+"""Collision and speed test for the incremental Zobrist `Board.hash()`.
+
+Random games are played out and every distinct position is recorded under
+its exact state (blocked cells, player locations, initiative).  Any two
+different states that share a hash are counted as a collision, both for the
+Zobrist hash and for the previous `str(board._board_state).__hash__()`.
+
+Usage: python -m benchmarks.bench_hash [positions]
+"""
+import random
+import sys
+import timeit
+
+from isolation import Board
+
+
+def legacy_hash(game):
+    """The original string-based Board.hash()."""
+    return str(game._board_state).__hash__()
+
+
+def exact_state(game):
+    """Return a compact exact description of the position."""
+    state = game._board_state
+    blocked = 0
+    for idx, cell in enumerate(state[:-3]):
+        if cell:
+            blocked |= 1 << idx
+    return blocked, state[-1], state[-2], state[-3]
+
+
+def run(positions=1000000, seed=0):
+    rng = random.Random(seed)
+    states = {}
+    zobrist, legacy = {}, {}
+    zobrist_collisions = legacy_collisions = 0
+    while len(states) < positions:
+        game = Board("Player1", "Player2")
+        while True:
+            state = exact_state(game)
+            if state not in states:
+                states[state] = True
+                z, s = game.hash(), legacy_hash(game)
+                if zobrist.setdefault(z, state) != state:
+                    zobrist_collisions += 1
+                if legacy.setdefault(s, state) != state:
+                    legacy_collisions += 1
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            game.apply_move(rng.choice(legal_moves))
+
+    game = Board("Player1", "Player2")
+    for move in [(2, 3), (0, 5), (4, 4), (1, 3), (6, 5), (3, 1)]:
+        game.apply_move(move)
+    calls = 100000
+    t_zobrist = timeit.timeit(game.hash, number=calls)
+    t_legacy = timeit.timeit(lambda: legacy_hash(game), number=calls)
+
+    print("{} distinct positions".format(len(states)))
+    print("zobrist collisions: {}".format(zobrist_collisions))
+    print("legacy collisions:  {}".format(legacy_collisions))
+    print("zobrist hash(): {:.3f} us/call".format(1e6 * t_zobrist / calls))
+    print("legacy hash():  {:.3f} us/call".format(1e6 * t_legacy / calls))
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,82 @@
+"""Measure the Monte Carlo tree search player of competition_agent.
+
+Playouts per second are measured on the same random positions at three
+stages of the game, for both board implementations, with one 150 ms
+get_move() per position.  Then `CustomPlayer` (with and without tree reuse)
+plays matches against AlphaBetaPlayer with improved_score from random
+two-ply openings, once from each side, with the tournament's rules.  The
+default 1 ms safety margin is meant for the competition's precise timers;
+with `Board.play()` the scheduler occasionally stalls the process for longer,
+so the matches use MARGIN (AlphaBetaPlayer keeps its 12 ms).
+
+Usage: python -m benchmarks.bench_mcts [matches] [positions]
+"""
+import sys
+
+from isolation import Board, BitBoard
+from competition_agent import CustomPlayer
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+from tournament import Agent, Game, play_game, random_opening, seed_for
+
+from benchmarks.common import (random_openings, build_position, deadline,
+                               timed, report)
+
+STAGES = [("opening", 2), ("midgame", 12), ("endgame", 22)]
+MARGIN = 5.
+
+
+def playout_rate(board_cls, openings):
+    """Playouts per second of get_move() on a fresh tree."""
+    player = CustomPlayer()
+    playouts, seconds = 0, 0.
+    for moves in openings:
+        game = build_position(board_cls, moves, player_1=player)
+        if game.active_player != player:
+            game = build_position(board_cls, moves, player_2=player)
+        player.mcts.reset()
+        _, elapsed = timed(player.get_move, game, deadline())
+        playouts += player.mcts.playouts
+        seconds += elapsed
+    return playouts / seconds
+
+
+def match(agent, opponent, matches):
+    """Play `matches` openings from both sides; return (wins, timeouts)."""
+    wins = timeouts = 0
+    for i in range(matches):
+        opening = random_opening(seed_for("mcts:{}".format(i)))
+        for side, agents in enumerate([(agent, opponent), (opponent, agent)]):
+            game_id = "{}:{}:{}".format(agent.name, i, side)
+            result = play_game((Game(game_id, agents[0], agents[1], opening,
+                                     seed_for(game_id)), 150))
+            if result["winner_name"] == agent.name:
+                wins += 1
+            elif result["termination"] == "timeout":
+                timeouts += 1
+    return wins, timeouts
+
+
+def run(matches=10, positions=10):
+    rows = []
+    for stage, plies in STAGES:
+        openings = random_openings(positions, plies)
+        rows.append([stage] + [playout_rate(cls, openings)
+                               for cls in (Board, BitBoard)])
+    report("Playouts per second in a 150 ms move",
+           ("stage", "Board", "BitBoard"), rows)
+
+    opponent = Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved")
+    rows = []
+    for name, player in [("MCTS", CustomPlayer(timeout=MARGIN)),
+                         ("MCTS_no_reuse", CustomPlayer(timeout=MARGIN,
+                                                        reuse_tree=False))]:
+        wins, timeouts = match(Agent(player, name), opponent, matches)
+        rows.append((name, 2 * matches, wins, 100. * wins / (2 * matches),
+                     timeouts))
+    report("Matches against AB_Improved (150 ms per move)",
+           ("player", "games", "wins", "win %", "timeouts"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,39 @@
+"""Compare the min_value()/max_value() search core of AlphaBetaPlayer with
+the negamax principal variation search core.
+
+Each core is measured bare and with the transposition table, move ordering
+and PV reuse enabled.  Reports nodes per second, the nodes needed to reach a
+fixed depth by iterative deepening, and the depth completed within 150 ms.
+
+Usage: python -m benchmarks.bench_negamax [positions] [depth]
+"""
+import sys
+
+from game_agent import AlphaBetaPlayer, InPlaceAlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, fixed_depth, timed_depth,
+                               report)
+
+ENHANCEMENTS = {"tt_size_mb": 16, "move_ordering": True, "pv_reuse": True}
+
+
+def run(positions=20, depth=7):
+    openings = random_openings(positions, plies=10)
+    rows = []
+    for player_cls in (AlphaBetaPlayer, InPlaceAlphaBetaPlayer):
+        for label, kwargs in [("bare", {}), ("enhanced", ENHANCEMENTS)]:
+            for core, pvs in [("min/max", False), ("negamax pvs", True)]:
+                player = player_cls(score_fn=improved_score, pvs=pvs, **kwargs)
+                nodes, ebf, elapsed = fixed_depth(player, openings, depth)
+                rows.append((player_cls.__name__, label, core, nodes,
+                             nodes / elapsed, ebf,
+                             timed_depth(player, openings)))
+    report("Search cores: {} positions, iterative deepening to depth {}"
+           .format(positions, depth),
+           ("player", "options", "core", "nodes", "nodes/sec", "EBF",
+            "depth @150ms"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,45 @@
+"""Node counts of AlphaBetaPlayer with the move-ordering heuristics switched
+on one at a time, on a fixed set of random positions.
+
+Each configuration runs iterative deepening to a fixed depth from every
+position, then gets the normal 150 ms budget to show the depth completed.
+
+Usage: python -m benchmarks.bench_ordering [positions] [depth]
+"""
+import sys
+
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+from search.ordering import MoveOrderer
+
+from benchmarks.common import (random_openings, fixed_depth, timed_depth,
+                               report)
+
+CONFIGURATIONS = [
+    ("random order", 0, False),
+    ("history", 0, MoveOrderer(hash_move=False, killers=False, history=True)),
+    ("killers", 0, MoveOrderer(hash_move=False, killers=True, history=False)),
+    ("hash move", 16, MoveOrderer(hash_move=True, killers=False, history=False)),
+    ("all", 16, MoveOrderer()),
+]
+
+
+def run(positions=20, depth=7):
+    openings = random_openings(positions, plies=10)
+    rows = []
+    baseline = None
+    for label, tt_size_mb, orderer in CONFIGURATIONS:
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=tt_size_mb,
+                                 move_ordering=orderer)
+        nodes, ebf, elapsed = fixed_depth(player, openings, depth)
+        baseline = baseline or nodes
+        rows.append((label, nodes, "{:.0%}".format(nodes / baseline), ebf,
+                     elapsed, timed_depth(player, openings)))
+    report("Move ordering: {} positions, iterative deepening to depth {}"
+           .format(positions, depth),
+           ("ordering", "nodes", "vs random", "EBF", "seconds",
+            "depth @150ms"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,89 @@
+"""Lazy SMP scaling of ParallelAlphaBetaPlayer with the number of worker
+processes.
+
+Each configuration searches every position until one worker completes a
+fixed depth.  The speedup is relative to the single-process search with the
+same table size and move ordering; it is bounded by the number of CPU cores.
+Then every configuration and a plain `AlphaBetaPlayer` with the same table
+and move ordering get the normal 150 ms per position: the table reports the
+nodes searched per second (over all workers) and the mean depth completed.
+
+Usage: python -m benchmarks.bench_parallel [positions] [depth]
+"""
+import os
+import random
+import sys
+import timeit
+
+from game_agent import AlphaBetaPlayer, ParallelAlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, fixed_depth, place, deadline,
+                               no_timeout, timed, report)
+
+WORKERS = [1, 2, 4, 8, 16]
+
+
+def parallel_fixed_depth(player, openings, depth):
+    """Seconds for the workers to complete `depth` on every position."""
+    start = timeit.default_timer()
+    for i, moves in enumerate(openings):
+        player.tt.clear()
+        random.seed(i)
+        player._parallel_search(place(player, moves), no_timeout, depth)
+    return timeit.default_timer() - start
+
+
+def timed_search(player, openings):
+    """Nodes per second and mean depth completed by get_move() within the
+    time limit, with an empty table on every position.
+    """
+    parallel = getattr(player, "workers", 1) > 1
+    nodes = depths = seconds = 0
+    for i, moves in enumerate(openings):
+        player.tt.clear()
+        random.seed(i)
+        _, elapsed = timed(player.get_move, place(player, moves), deadline())
+        seconds += elapsed
+        if parallel:
+            nodes += sum(result[2] for result in player.worker_results)
+            depths += player.depth_reached
+        else:
+            nodes += sum(player.depth_nodes) + player.nodes
+            depths += len(player.depth_nodes)
+    return nodes / seconds, depths / len(openings)
+
+
+def run(positions=20, depth=8):
+    openings = random_openings(positions, plies=10)
+    rows, timed_rows = [], []
+    single = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=16,
+                             move_ordering=True)
+    base_rate, base_depth = timed_search(single, openings)
+    timed_rows.append(("AlphaBetaPlayer", 1, base_rate, 1., base_depth, 0.))
+    baseline = None
+    for workers in WORKERS:
+        player = ParallelAlphaBetaPlayer(score_fn=improved_score, workers=workers)
+        try:
+            if workers == 1:
+                elapsed = fixed_depth(player, openings, depth)[2]
+            else:
+                elapsed = parallel_fixed_depth(player, openings, depth)
+            baseline = baseline or elapsed
+            rows.append((workers, elapsed, baseline / elapsed))
+            rate, mean_depth = timed_search(player, openings)
+            timed_rows.append(("ParallelAlphaBetaPlayer", workers, rate,
+                               rate / base_rate, mean_depth,
+                               mean_depth - base_depth))
+        finally:
+            player.close()
+    report("Lazy SMP: {} positions, depth {}, {} CPU cores"
+           .format(positions, depth, os.cpu_count()),
+           ("workers", "seconds", "speedup"), rows)
+    report("Equal time: 150 ms per position",
+           ("player", "workers", "nodes/s", "vs single", "depth",
+            "extra depth"), timed_rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,69 @@
+"""Measure pondering: AlphaBetaPlayer searching during the opponent's turn.
+
+A pondering player meets the same configuration without pondering in timed
+games.  Reports the ponder hit rate, the mean depth completed per move, and
+the mean number of iterations already completed by the pondering when the
+prediction was right.  Both players run in this process, so the ponder
+thread also takes time away from the opponent: the results are not a fair
+comparison of the two players, and pondering must not be enabled this way
+outside of this measurement.
+
+Usage: python -m benchmarks.bench_ponder [games]
+"""
+import random
+import sys
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import random_openings, report
+
+OPTIONS = {"tt_size_mb": 16, "move_ordering": True, "pv_reuse": True}
+
+
+class PonderRecorder(AlphaBetaPlayer):
+    """AlphaBetaPlayer that remembers the depth completed on every move and
+    the pondered depth on every ponder hit."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depths = []
+        self.pondered = []
+
+    def get_move(self, game, time_left):
+        hits = self.ponder_hits
+        move = super().get_move(game, time_left)
+        self.depths.append(len(self.depth_nodes))
+        if self.ponder_hits > hits:
+            self.pondered.append(self.ponder_depth)
+        return move
+
+
+def mean(values):
+    return sum(values) / len(values) if values else 0.
+
+
+def run(games=6):
+    pondering = PonderRecorder(score_fn=improved_score, ponder=True, **OPTIONS)
+    plain = PonderRecorder(score_fn=improved_score, **OPTIONS)
+    wins = 0
+    for i in range(games):
+        random.seed(i)
+        players = (pondering, plain) if i % 2 == 0 else (plain, pondering)
+        game = Board(*players)
+        for move in random_openings(1, plies=2, seed=i)[0]:
+            game.apply_move(move)
+        winner, _, _ = game.play()
+        pondering.stop_pondering()
+        wins += winner is pondering
+    rows = [("ponder", "{:.1%}".format(pondering.ponder_hit_rate()),
+             mean(pondering.depths), mean(pondering.pondered), wins),
+            ("no ponder", "-", mean(plain.depths), 0., games - wins)]
+    report("Pondering ({} games)".format(games),
+           ("player", "hit rate", "mean depth", "pondered depth", "wins"),
+           rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,42 @@
+"""Effect of principal-variation reuse and aspiration windows on iterative
+deepening in AlphaBetaPlayer.
+
+All configurations use the transposition table and move ordering; the
+baseline throws away everything but the best root move between iterations.
+Reports the nodes needed to reach a fixed depth, the number of aspiration
+re-searches and the mean depth completed per move within 150 ms.
+
+Usage: python -m benchmarks.bench_pv [positions] [depth] [window]
+"""
+import sys
+
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, fixed_depth, timed_depth,
+                               report)
+
+
+def run(positions=20, depth=7, window=2.):
+    openings = random_openings(positions, plies=10)
+    rows = []
+    for label, pv_reuse, aspiration in [("baseline", False, 0.),
+                                        ("pv reuse", True, 0.),
+                                        ("aspiration", False, window),
+                                        ("pv + aspiration", True, window)]:
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=16,
+                                 move_ordering=True, pv_reuse=pv_reuse,
+                                 aspiration_window=aspiration)
+        nodes, ebf, elapsed = fixed_depth(player, openings, depth)
+        depth_reached = timed_depth(player, openings)
+        rows.append((label, nodes, ebf, elapsed, player.researches,
+                     depth_reached))
+    report("PV reuse / aspiration windows (half-width {}): {} positions, "
+           "iterative deepening to depth {}".format(window, positions, depth),
+           ("search", "nodes", "EBF", "seconds", "re-searches*",
+            "depth @150ms"), rows)
+    print("* re-searches during the last timed move")
+
+
+if __name__ == "__main__":
+    run(*map(float, sys.argv[1:]))
@@ -0,0 +1,116 @@
+"""Measure Board.reachability() against a naive flood fill built on
+forecast_move().
+
+The naive version finds each player's distances with a breadth-first search
+over forecast boards: every visited cell costs a forecast_move() (a board
+copy) and a get_legal_moves() call, and since forecast_move() always moves
+the player to move, the forecast board hands the turn straight back to the
+player being expanded.  The two distance maps are then combined into the
+same statistics.  Both are timed on random positions from every stage of the
+game, for the full flood fill and for the bounded-depth leaf mode, and
+checked to agree.
+
+Usage: python -m benchmarks.bench_reach [positions] [repeat]
+"""
+import random
+import sys
+
+from isolation import Board, BitBoard
+from isolation.isolation import Reachability
+
+from benchmarks.common import timed, report
+
+DEPTHS = [None, 2]
+
+
+def naive_distances(game, player, max_depth=None):
+    """Return {cell: distance} for the blank cells `player` can reach."""
+    blanks = set(game.get_blank_spaces())
+    if game.active_player != player:
+        game = game.copy()
+        game._active_player, game._inactive_player = player, game.active_player
+    distances = {}
+    frontier = [game]
+    depth = 0
+    while frontier and (max_depth is None or depth < max_depth):
+        depth += 1
+        next_frontier = []
+        for board in frontier:
+            for move in board.get_legal_moves(player):
+                if move in distances or move not in blanks:
+                    continue
+                distances[move] = depth
+                child = board.forecast_move(move)
+                child._active_player, child._inactive_player = player, child.active_player
+                next_frontier.append(child)
+        frontier = next_frontier
+    return distances
+
+
+def naive_reachability(game, player, max_depth=None):
+    own = naive_distances(game, player, max_depth)
+    opp = naive_distances(game, game.get_opponent(player), max_depth)
+    first = player == game.active_player
+    own_closer = sum(1 for cell, d in own.items()
+                     if cell not in opp or d < opp[cell] or
+                     (d == opp[cell] and first))
+    opp_closer = sum(1 for cell, d in opp.items()
+                     if cell not in own or d < own[cell] or
+                     (d == own[cell] and not first))
+
+    def layers(distances):
+        counts = [0] * max(distances.values() or [0])
+        for d in distances.values():
+            counts[d - 1] += 1
+        return tuple(counts)
+
+    return Reachability(len(own), len(opp), len(own.keys() & opp.keys()),
+                        own_closer, opp_closer, layers(own), layers(opp))
+
+
+def random_positions(board_cls, count, seed=0):
+    """Random positions from every stage of the game, with both players
+    placed and the game not over."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = board_cls("Player1", "Player2")
+        for _ in range(rng.randint(2, 30)):
+            moves = sorted(game.get_legal_moves())
+            if not moves:
+                break
+            game.apply_move(rng.choice(moves))
+        if game.get_legal_moves():
+            positions.append(game)
+    return positions
+
+
+def evaluate(fn, positions, repeat, max_depth):
+    for _ in range(repeat):
+        for game in positions:
+            fn(game, "Player1", max_depth)
+
+
+def run(positions=200, repeat=5):
+    rows = []
+    boards = {cls: random_positions(cls, positions) for cls in (Board, BitBoard)}
+    for max_depth in DEPTHS:
+        for game in boards[Board]:
+            expected = naive_reachability(game, "Player1", max_depth)
+            assert game.reachability("Player1", max_depth) == expected
+        calls = positions * repeat
+        _, naive = timed(evaluate, naive_reachability, boards[Board], repeat,
+                         max_depth)
+        row = ["all" if max_depth is None else max_depth, calls / naive]
+        for cls in (Board, BitBoard):
+            _, fast = timed(evaluate, cls.reachability, boards[cls], repeat,
+                            max_depth)
+            row += [calls / fast, naive / fast]
+        rows.append(row)
+    report("Reachability: {} positions x {} repeats".format(positions, repeat),
+           ("depth", "naive calls/s", "Board calls/s", "speedup",
+            "BitBoard calls/s", "speedup"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,101 @@
+"""Compare the binary game records of isolation.records with JSON histories.
+
+Random games on the 7x7 board are stored two ways: one JSON object per line
+with the header fields and the `Board.play()` history (`to_history()`), and
+a `GameWriter` file.  The table reports the bytes per game, the games
+written and read back per second, and the time to read one game picked at
+random (a `GameReader` index lookup; a line of the JSON file has to be found
+by reading the lines before it, so it is not measured).
+
+Usage: python -m benchmarks.bench_records [games]
+"""
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+
+from isolation import Board
+from isolation.records import GameRecord, GameWriter, GameReader, to_history
+
+from benchmarks.common import timed, report
+
+
+def random_games(count, seed=0):
+    """Return `count` random games as GameRecords."""
+    rng = random.Random(seed)
+    games = []
+    for i in range(count):
+        game = Board("Player1", "Player2")
+        moves = []
+        while True:
+            legal_moves = game.get_legal_moves()
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            game.apply_move(move)
+            moves.append(move)
+        games.append(GameRecord(7, 7, ("Random", "Random"),
+                                2 - len(moves) % 2, "win", i, moves))
+    return games
+
+
+def write_json(path, games):
+    with open(path, "w") as f:
+        for game in games:
+            record = game._asdict()
+            record["moves"] = to_history(game)
+            f.write(json.dumps(record) + "\n")
+
+
+def read_json(path):
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def write_binary(path, games):
+    with GameWriter(path) as writer:
+        for game in games:
+            writer.write(game)
+
+
+def read_binary(path):
+    with GameReader(path) as reader:
+        return list(reader)
+
+
+def random_access(path, picks):
+    with GameReader(path) as reader:
+        for k in picks:
+            reader[k]
+
+
+def run(games=20000):
+    records = random_games(games)
+    tmp = tempfile.mkdtemp()
+    try:
+        json_path = os.path.join(tmp, "games.jsonl")
+        binary_path = os.path.join(tmp, "games.bin")
+        _, json_write = timed(write_json, json_path, records)
+        loaded, json_read = timed(read_json, json_path)
+        assert [g["moves"] for g in loaded] == [to_history(g) for g in records]
+        _, binary_write = timed(write_binary, binary_path, records)
+        loaded, binary_read = timed(read_binary, binary_path)
+        assert loaded == records
+        picks = [random.randrange(games) for _ in range(games)]
+        _, access = timed(random_access, binary_path, picks)
+        rows = [("JSON lines", os.path.getsize(json_path) / games,
+                 games / json_write, games / json_read, "-"),
+                ("GameWriter", os.path.getsize(binary_path) / games,
+                 games / binary_write, games / binary_read,
+                 1e6 * access / games)]
+    finally:
+        shutil.rmtree(tmp)
+    report("{} random 7x7 games ({:.1f} moves on average)".format(
+        games, sum(len(g.moves) for g in records) / games),
+        ("format", "bytes/game", "written/s", "read/s", "game k (us)"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
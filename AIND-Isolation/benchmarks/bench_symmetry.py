@@ -0,0 +1,155 @@
+"""Measure what symmetry-canonical keys gain on self-play games.
+
+Games are played on the 7x7 board by an alpha-beta player searching every
+move to a fixed depth, after two random opening moves as in the tournament
+(see `tournament.random_opening`).
+
+- Game database: for every position, was the same position (plain
+  `Board.hash()`) or a symmetric image of it (`Board.canonical_hash()`)
+  already recorded in an earlier game?  Reported by game phase.
+- Transposition table: the games are replayed by players searching every
+  move to a fixed depth with a table kept for the whole game, keyed by the
+  plain or the canonical hash; the table hit rate and the nodes searched
+  are compared, with the search time.
+- Move cost: the time of a push_move()/pop_move() pair on boards that only
+  hash their own position (the default) and on boards that keep the packed
+  hashes of all the symmetric images up to date, which they do from their
+  first `canonical_hash()` or `transform()` call on.
+
+Usage: python -m benchmarks.bench_symmetry [games] [play_depth] [tt_depth]
+"""
+import random
+import sys
+import timeit
+
+from isolation import Board, BitBoard
+from tournament import random_opening
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import no_timeout, report
+
+PHASES = [(0, 3), (4, 9), (10, 19), (20, 49)]
+
+
+def search(player, game, depth):
+    """Run iterative deepening to `depth`; return the best move."""
+    player._new_search(game)
+    best_move = None
+    for best_move in player._deepen(game, range(1, depth + 1)):
+        pass
+    return best_move
+
+
+def self_play(games, depth):
+    """Return the move list of each self-play game."""
+    records = []
+    for i in range(games):
+        random.seed(i)
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=4,
+                                 move_ordering=True)
+        player.time_left = no_timeout
+        game = Board(player, "Opponent")
+        moves = random_opening(i)
+        for move in moves:
+            game.apply_move(move)
+        while game.get_legal_moves():
+            game = game.with_players(*(
+                (player, "Opponent") if game.move_count % 2 == 0
+                else ("Opponent", player)))
+            move = search(player, game, depth)
+            game.apply_move(move)
+            moves.append(move)
+        records.append(moves)
+    return records
+
+
+def database_hits(records):
+    """Return rows of (phase, positions, plain hit %, canonical hit %)."""
+    seen_plain, seen_canonical = set(), set()
+    counts = {phase: [0, 0, 0] for phase in PHASES}
+    for moves in records:
+        game = Board("Player1", "Player2")
+        positions = []
+        for move in moves:
+            game.apply_move(move)
+            positions.append((game.move_count, game.hash(),
+                              game.canonical_hash()[0]))
+        for ply, plain, canonical in positions:
+            phase = next(p for p in PHASES if p[0] <= ply <= p[1])
+            counts[phase][0] += 1
+            counts[phase][1] += plain in seen_plain
+            counts[phase][2] += canonical in seen_canonical
+        seen_plain.update(p[1] for p in positions)
+        seen_canonical.update(p[2] for p in positions)
+    return [("{}-{}".format(*phase), n, "{:.1%}".format(plain / n),
+             "{:.1%}".format(canonical / n))
+            for phase, (n, plain, canonical) in sorted(counts.items()) if n]
+
+
+def table_hits(records, depth, symmetric):
+    """Replay the games searching every move to `depth`; return the total
+    nodes, the table hit rate and the search time in seconds."""
+    nodes = probes = hits = 0
+    start = timeit.default_timer()
+    for i, moves in enumerate(records):
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=16,
+                                 move_ordering=True, symmetric_tt=symmetric)
+        player.time_left = no_timeout
+        game = Board("Player1", "Player2")
+        for ply, move in enumerate(moves):
+            position = game.with_players(*(
+                (player, "Opponent") if ply % 2 == 0 else ("Opponent", player)))
+            random.seed(i * 1000 + ply)
+            player.tt.reset_stats()
+            search(player, position, depth)
+            nodes += sum(player.depth_nodes)
+            probes += player.tt.probes
+            hits += player.tt.hits
+            game.apply_move(move)
+    return nodes, hits / probes, timeit.default_timer() - start
+
+
+def move_cost(records, repeat=20):
+    """Return rows of (board, untracked ns, tracked ns) per push_move() and
+    pop_move() pair, over every move of the games."""
+    rows = []
+    for board_cls in (Board, BitBoard):
+        costs = []
+        for tracked in (False, True):
+            elapsed = pairs = 0
+            for moves in records:
+                game = board_cls("Player1", "Player2")
+                if tracked:
+                    game.canonical_hash()
+                for move in moves:
+                    start = timeit.default_timer()
+                    for _ in range(repeat):
+                        game.push_move(move)
+                        game.pop_move()
+                    elapsed += timeit.default_timer() - start
+                    pairs += repeat
+                    game.apply_move(move)
+            costs.append("{:.0f}".format(elapsed / pairs * 1e9))
+        rows.append((board_cls.__name__,) + tuple(costs))
+    return rows
+
+
+def run(games=100, play_depth=3, tt_depth=5):
+    records = self_play(games, play_depth)
+    report("Game database: {} self-play games (depth {})".format(games, play_depth),
+           ("plies", "positions", "plain hits", "canonical hits"),
+           database_hits(records))
+    rows = []
+    for label, symmetric in [("plain", False), ("canonical", True)]:
+        nodes, hit_rate, seconds = table_hits(records[:20], tt_depth, symmetric)
+        rows.append((label, nodes, "{:.1%}".format(hit_rate),
+                     "{:.1f}".format(seconds)))
+    report("Transposition table: 20 games, every move searched to depth {}"
+           .format(tt_depth), ("key", "nodes", "hit rate", "seconds"), rows)
+    report("Move cost: ns per push_move() + pop_move()",
+           ("board", "untracked", "tracked"), move_cost(records))
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
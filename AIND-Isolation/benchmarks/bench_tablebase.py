@@ -0,0 +1,98 @@
+"""Build the endgame tablebases for the small boards and measure them.
+
+For every board size the tablebase is built on a process pool (one worker
+per core) and its size and build time are reported, layer by layer.  The
+probe latency is then timed on endgame positions from greedy games (see
+bench_endgame; random games mostly end before the endgame), and the
+nodes needed to solve those positions completely (search to the end of the
+game) are compared with and without the tablebase.
+
+Usage: python -m benchmarks.bench_tablebase [max_open_5x5] [max_open_6x6]
+"""
+import os
+import random
+import sys
+import tempfile
+import timeit
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer
+from search.tablebase import Tablebase, build_tablebase, write_tablebase
+
+from benchmarks.bench_endgame import greedy_move
+from benchmarks.common import no_timeout, timed, report
+
+
+def endgame_positions(width, height, blanks, count, seed=0):
+    """The positions of `count` greedy games with `blanks` blank cells in
+    which the player to move can still move."""
+    rng = random.Random(seed)
+    positions = []
+    while len(positions) < count:
+        game = Board("Player1", "Player2", width, height)
+        while game.get_legal_moves() and game.blank_count() > blanks:
+            game.apply_move(greedy_move(game, rng))
+        if game.get_legal_moves():
+            positions.append(game)
+    return positions
+
+
+def solve_nodes(player, games):
+    """Nodes and seconds to search every position to the end of the game."""
+    player.time_left = no_timeout
+    nodes = 0
+    start = timeit.default_timer()
+    for game in games:
+        game = game.with_players(player, "Opponent")
+        player.tt.clear()
+        player._new_search(game)
+        for _ in player._deepen(game, range(1, game.blank_count() + 1)):
+            pass
+        nodes += sum(player.depth_nodes)
+    return nodes, timeit.default_timer() - start
+
+
+def run(max_open_5x5=6, max_open_6x6=5):
+    tmp = tempfile.mkdtemp()
+    workers = os.cpu_count() or 1
+    builds, probes, searches = [], [], []
+    for width, height, max_open in [(5, 5, max_open_5x5),
+                                    (6, 6, max_open_6x6)]:
+        layers = []
+        table, elapsed = timed(
+            build_tablebase, width, height, max_open, workers,
+            report=lambda k, n, s: layers.append((k, n, s)))
+        path = os.path.join(tmp, "{}x{}.bin".format(width, height))
+        write_tablebase(path, table, width, height, max_open)
+        report("{}x{} layers".format(width, height),
+               ("live cells", "positions", "seconds"), layers)
+        builds.append(("{}x{}".format(width, height), max_open, len(table),
+                       os.path.getsize(path), elapsed))
+
+        tablebase = Tablebase(path)
+        games = endgame_positions(width, height, max_open + 8, count=20)
+        hits = sum(tablebase.lookup(game) is not None for game in games)
+        repeat = 20
+        _, elapsed = timed(lambda: [tablebase.lookup(game) for game in games
+                                    for _ in range(repeat)])
+        probes.append(("{}x{}".format(width, height), len(games), hits,
+                       1e6 * elapsed / (repeat * len(games))))
+
+        for label, tb in [("without", None), ("with", tablebase)]:
+            player = AlphaBetaPlayer(tt_size_mb=16, move_ordering=True,
+                                     pvs=True, tablebase=tb)
+            nodes, elapsed = solve_nodes(player, games)
+            searches.append(("{}x{}".format(width, height), label, nodes,
+                             elapsed))
+        tablebase.close()
+
+    report("Tablebase build ({} workers)".format(workers),
+           ("board", "max open", "positions", "bytes", "seconds"), builds)
+    report("Lookups on positions with max open + 8 blank cells",
+           ("board", "positions", "hits", "lookup us"), probes)
+    report("Solving the same positions to the end of the game",
+           ("board", "tablebase", "nodes", "seconds"), searches)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
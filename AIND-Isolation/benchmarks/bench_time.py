@@ -0,0 +1,77 @@
+"""Compare AlphaBetaPlayer with and without the time manager in timed games.
+
+For each player reports the share of moves that discarded an unfinished
+iteration, the mean time spent per move, the mean depth completed on the
+moves whose value was not yet decided (once the root is proven won or lost
+the time manager stops deepening, while the plain search keeps completing
+cheap depths), the calibrated safety margin, the lowest time left when a
+move was returned, and the number of games lost on time.
+
+Usage: python -m benchmarks.bench_time [games]
+"""
+import random
+import sys
+
+from isolation import Board, Deadline
+from isolation.isolation import TIME_LIMIT_MILLIS
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import random_openings, report
+
+OPTIONS = {"tt_size_mb": 16, "move_ordering": True, "pv_reuse": True}
+
+
+class TimeRecorder(AlphaBetaPlayer):
+    """AlphaBetaPlayer that remembers, for every move, the depth completed,
+    whether an iteration was discarded and the time left at return."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depths = []
+        self.aborted = 0
+        self.left = []
+        self.spent = []
+
+    def get_move(self, game, time_left):
+        start = time_left()
+        move = super().get_move(game, time_left)
+        self.left.append(time_left())
+        self.spent.append(start - self.left[-1])
+        scores = self.root_scores.values()
+        if scores and abs(max(scores)) != float("inf"):
+            self.depths.append(len(self.depth_nodes))
+        self.aborted += self.search_aborted
+        return move
+
+
+def run(games=20):
+    managed = TimeRecorder(score_fn=improved_score, time_manager=True, **OPTIONS)
+    fixed = TimeRecorder(score_fn=improved_score, **OPTIONS)
+    wins = {managed: 0, fixed: 0}
+    timeouts = {managed: 0, fixed: 0}
+    for i in range(games):
+        random.seed(i)
+        players = (managed, fixed) if i % 2 == 0 else (fixed, managed)
+        game = Board(*players)
+        for move in random_openings(1, plies=2, seed=i)[0]:
+            game.apply_move(move)
+        winner, _, termination = game.play(TIME_LIMIT_MILLIS)
+        wins[winner] += 1
+        if termination == "timeout":
+            timeouts[game.get_opponent(winner)] += 1
+    rows = []
+    for label, p in [("time manager", managed), ("fixed 12ms", fixed)]:
+        margin = p.time_manager.margin if p.time_manager else p.TIMER_THRESHOLD
+        rows.append((label, "{:.1%}".format(p.aborted / len(p.spent)),
+                     sum(p.spent) / len(p.spent),
+                     sum(p.depths) / max(1, len(p.depths)), margin,
+                     min(p.left), timeouts[p], wins[p]))
+    report("Time management ({} games, {} moves)".format(
+               games, len(managed.spent) + len(fixed.spent)),
+           ("player", "discarded", "ms/move", "mean depth", "margin ms",
+            "min left ms", "timeouts", "wins"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,92 @@
+"""Measure the cost of the search's clock checks and how late the search
+stops.
+
+The first table compares reading the clock at every node with the adaptive
+interval of AlphaBetaPlayer, using both the nested lambdas Board.play() used
+to build and the Deadline object it passes now.  The second gives every
+position the normal 150 ms budget for a range of TIMER_THRESHOLD values and
+reports the time left when get_move() returned: the worst case must stay
+above zero or the move is forfeited.
+
+Usage: python -m benchmarks.bench_timer [positions] [depth]
+"""
+import random
+import sys
+import timeit
+
+from isolation import Deadline
+from isolation.isolation import TIME_LIMIT_MILLIS
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import random_openings, place, report
+
+THRESHOLDS = [12., 8., 5., 3., 2., 1.]
+
+
+def nested_lambdas(limit):
+    """The time_left callable built by the previous Board.play()."""
+    time_millis = lambda: 1000 * timeit.default_timer()
+    move_start = time_millis()
+    return lambda: limit - (time_millis() - move_start)
+
+
+def clock_cost(player, openings, depth, time_left):
+    """Iterative deepening to `depth` with a distant deadline; returns
+    (nodes, seconds)."""
+    nodes = 0
+    start = timeit.default_timer()
+    for i, moves in enumerate(openings):
+        game = place(player, moves)
+        player.time_left = time_left(10 ** 9)
+        player._new_search(game)
+        random.seed(i)
+        for _ in player._deepen(game, range(1, depth + 1)):
+            pass
+        nodes += sum(player.depth_nodes)
+    return nodes, timeit.default_timer() - start
+
+
+def time_left_at_return(player, openings):
+    """Milliseconds left when get_move() returned on every position."""
+    left = []
+    for i, moves in enumerate(openings):
+        random.seed(i)
+        time_left = Deadline(TIME_LIMIT_MILLIS)
+        player.get_move(place(player, moves), time_left)
+        left.append(time_left())
+    return left
+
+
+def run(positions=20, depth=6):
+    openings = random_openings(positions, plies=10)
+    rows = []
+    for clock, time_left in [("nested lambdas", nested_lambdas),
+                             ("Deadline", Deadline)]:
+        for label, interval in [("every node", 1),
+                                ("adaptive", AlphaBetaPlayer.CLOCK_MAX_INTERVAL)]:
+            player = AlphaBetaPlayer(score_fn=improved_score)
+            player.CLOCK_MAX_INTERVAL = interval
+            nodes, elapsed = clock_cost(player, openings, depth, time_left)
+            rows.append((clock, label, nodes, elapsed, nodes / elapsed))
+    report("Clock checks: {} positions, iterative deepening to depth {}"
+           .format(positions, depth),
+           ("time_left", "checks", "nodes", "seconds", "nodes/sec"), rows)
+
+    rows = []
+    for threshold in THRESHOLDS:
+        for label, interval in [("every node", 1),
+                                ("adaptive", AlphaBetaPlayer.CLOCK_MAX_INTERVAL)]:
+            player = AlphaBetaPlayer(score_fn=improved_score, timeout=threshold)
+            player.CLOCK_MAX_INTERVAL = interval
+            left = time_left_at_return(player, openings)
+            rows.append((threshold, label, min(left), sum(left) / len(left),
+                         max(0., threshold - min(left)),
+                         sum(1 for t in left if t < 0)))
+    report("Time left at return ({} ms per move)".format(TIME_LIMIT_MILLIS),
+           ("threshold", "checks", "min ms", "mean ms", "overshoot ms",
+            "forfeits"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
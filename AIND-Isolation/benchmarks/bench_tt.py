@@ -0,0 +1,73 @@
+"""Measure the effect of the transposition table on AlphaBetaPlayer.
+
+For every position an iterative deepening search is run to a fixed depth
+with and without the table, reporting the total nodes, the hit rate and the
+effective branching factor (nodes at depth d / nodes at depth d - 1,
+averaged geometrically over the iterations).  A second pass gives each
+player the normal 150 ms budget and reports the average depth completed.
+
+Finally the two players meet in timed games, where the table is kept
+between moves, and the average depth completed per move is reported.
+
+Usage: python -m benchmarks.bench_tt [positions] [depth] [games]
+"""
+import random
+import sys
+
+from isolation import Board
+from game_agent import AlphaBetaPlayer
+from sample_players import improved_score
+
+from benchmarks.common import (random_openings, fixed_depth, timed_depth,
+                               report)
+
+
+class DepthRecorder(AlphaBetaPlayer):
+    """AlphaBetaPlayer that remembers the depth completed on every move."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.depths = []
+
+    def get_move(self, game, time_left):
+        move = super().get_move(game, time_left)
+        self.depths.append(len(self.depth_nodes))
+        return move
+
+
+def play_games(games):
+    """Play timed games between players with and without a table."""
+    with_tt = DepthRecorder(score_fn=improved_score, tt_size_mb=16)
+    without = DepthRecorder(score_fn=improved_score)
+    wins = 0
+    for i in range(games):
+        random.seed(i)
+        players = (with_tt, without) if i % 2 == 0 else (without, with_tt)
+        game = Board(*players)
+        for move in random_openings(1, plies=2, seed=i)[0]:
+            game.apply_move(move)
+        winner, _, _ = game.play()
+        wins += winner is with_tt
+    return [(label, sum(p.depths) / len(p.depths), w) for label, p, w in
+            [("table 16MB", with_tt, wins), ("no table", without, games - wins)]]
+
+
+def run(positions=20, depth=7, games=4):
+    openings = random_openings(positions, plies=10)
+    rows = []
+    for label, tt_size_mb in [("no table", 0), ("table 16MB", 16)]:
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=tt_size_mb)
+        nodes, ebf, elapsed = fixed_depth(player, openings, depth)
+        hit_rate = player.tt.hit_rate() if player.tt else 0.
+        rows.append((label, nodes, "{:.1%}".format(hit_rate), ebf,
+                     elapsed, timed_depth(player, openings)))
+    report("Transposition table: {} positions, iterative deepening to depth {}"
+           .format(positions, depth),
+           ("search", "nodes", "hit rate", "EBF", "seconds",
+            "depth @150ms"), rows)
+    report("Timed games ({} games, table kept between moves)".format(games),
+           ("search", "mean depth", "wins"), play_games(games))
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
@@ -0,0 +1,62 @@
+"""Compare the lockstep NumPy playouts with games played by Board.play().
+
+Random games and games of a greedy player 1 against a random player 2
+(`RandomPlayer` and `GreedyPlayer` from sample_players, `random_policy` and
+`greedy_policy` in isolation.vectorized) are played on the 7x7 board, one at
+a time through `Board.play()` and in batches of increasing size with
+`VectorGames`.  The table reports games per
+second, the speed-up over `Board.play()`, and the win rate of player 1 and
+the mean game length, which must agree between the two engines.
+
+Usage: python -m benchmarks.bench_vectorized [board_games] [max_batch]
+"""
+import sys
+
+import numpy as np
+
+from isolation import Board
+from isolation.vectorized import play_games, random_policy, greedy_policy
+from sample_players import RandomPlayer, GreedyPlayer
+
+from benchmarks.common import timed, report
+
+POLICIES = [("random", RandomPlayer, random_policy),
+            ("greedy vs random", GreedyPlayer, greedy_policy)]
+
+
+def board_games(player_cls, games):
+    """Play `games` games through Board.play(), `player_cls` against
+    RandomPlayer; return (player 1 wins, total moves)."""
+    wins = moves = 0
+    for _ in range(games):
+        player_1 = player_cls()
+        winner, history, _ = Board(player_1, RandomPlayer()).play()
+        wins += winner is player_1
+        moves += len(history)
+    return wins, moves
+
+
+def run(games=200, max_batch=10000):
+    rows = []
+    rng = np.random.default_rng(0)
+    for name, player_cls, policy in POLICIES:
+        (wins, moves), elapsed = timed(board_games, player_cls, games)
+        base = games / elapsed
+        rows.append((name, "Board.play", 1, base, 1., 100. * wins / games,
+                     moves / games))
+        batch = 1
+        while batch <= max_batch:
+            result, elapsed = timed(play_games, batch, policy=policy,
+                                    opponent=random_policy, rng=rng)
+            rows.append((name, "VectorGames", batch, batch / elapsed,
+                         batch / elapsed / base,
+                         100. * (result.winners == 0).mean(),
+                         result.lengths.mean()))
+            batch *= 10
+    report("Games per second on 7x7",
+           ("policy", "engine", "batch", "games/s", "speed-up", "p1 win %",
+            "length"), rows)
+
+
+if __name__ == "__main__":
+    run(*map(int, sys.argv[1:]))
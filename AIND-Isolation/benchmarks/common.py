@@ -0,0 +1,117 @@
+"""Shared helpers for the benchmark scripts."""
+import random
+import timeit
+
+from isolation import Board, Deadline
+from isolation.isolation import TIME_LIMIT_MILLIS
+
+
+def random_openings(count, plies, width=7, height=7, seed=0):
+    """Return `count` move sequences of `plies` random legal moves each.
+
+    The sequences are generated with a fixed seed so that every backend and
+    every search variant is measured on exactly the same positions.
+    Sequences that end the game early are discarded.
+    """
+    rng = random.Random(seed)
+    openings = []
+    while len(openings) < count:
+        game = Board("Player1", "Player2", width=width, height=height)
+        moves = []
+        for _ in range(plies):
+            legal_moves = sorted(game.get_legal_moves())
+            if not legal_moves:
+                break
+            move = rng.choice(legal_moves)
+            game.apply_move(move)
+            moves.append(move)
+        if len(moves) == plies and game.get_legal_moves():
+            openings.append(moves)
+    return openings
+
+
+def build_position(board_cls, moves, player_1="Player1", player_2="Player2",
+                   width=7, height=7):
+    """Return a `board_cls` instance with the given moves applied."""
+    game = board_cls(player_1, player_2, width=width, height=height)
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+def no_timeout():
+    """A `time_left` callable that never runs out."""
+    return float("inf")
+
+
+def timed(fn, *args, **kwargs):
+    """Call `fn` and return its result with the elapsed time in seconds."""
+    start = timeit.default_timer()
+    result = fn(*args, **kwargs)
+    return result, timeit.default_timer() - start
+
+
+def effective_branching_factor(depth_nodes):
+    """Return the geometric mean of the node ratios between consecutive
+    iterative deepening iterations.
+    """
+    ratios = [b / a for a, b in zip(depth_nodes, depth_nodes[1:]) if a]
+    if not ratios:
+        return 0.
+    product = 1.
+    for r in ratios:
+        product *= r
+    return product ** (1. / len(ratios))
+
+
+def deadline(limit=TIME_LIMIT_MILLIS):
+    """Return a time_left callable like the one built by Board.play()."""
+    return Deadline(limit)
+
+
+def place(player, moves):
+    """Build the position with `player` holding the initiative."""
+    game = build_position(Board, moves, player_1=player)
+    if game.active_player != player:
+        game = build_position(Board, moves, player_2=player)
+    return game
+
+
+def fixed_depth(player, openings, depth):
+    """Iterative deepening to `depth`; returns (nodes, ebf, seconds)."""
+    player.time_left = no_timeout
+    nodes, ebfs = 0, []
+    start = timeit.default_timer()
+    for i, moves in enumerate(openings):
+        game = place(player, moves)
+        if player.tt is not None:
+            player.tt.clear()
+        player._new_search(game)
+        random.seed(i)
+        for _ in player._deepen(game, range(1, depth + 1)):
+            pass
+        nodes += sum(player.depth_nodes)
+        ebfs.append(effective_branching_factor(player.depth_nodes))
+    return nodes, sum(ebfs) / len(ebfs), timeit.default_timer() - start
+
+
+def timed_depth(player, openings):
+    """Average depth completed by get_move() within the time limit."""
+    depths = []
+    for i, moves in enumerate(openings):
+        random.seed(i)
+        player.get_move(place(player, moves), deadline())
+        depths.append(len(player.depth_nodes))
+    return sum(depths) / len(depths)
+
+
+def report(title, header, rows):
+    """Print a simple table with right-aligned columns."""
+    cells = [list(header)] + [[
+        "{:.2f}".format(c) if isinstance(c, float) else str(c) for c in row]
+        for row in rows]
+    widths = [max(len(row[i]) for row in cells) for i in range(len(header))]
+    print(title)
+    for row in cells:
+        print("  ".join(c.rjust(w) for c, w in zip(row, widths)))
+    print()
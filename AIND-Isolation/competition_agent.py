@@ -4,12 +4,11 @@ champions) in a tournament.
 
          COMPLETING AND SUBMITTING A COMPETITION AGENT IS OPTIONAL
 """
-import random
+import gc
+import math
 
-
-class SearchTimeout(Exception):
-    """Subclass base exception for code clarity. """
-    pass
+from search.book import OpeningBook
+from search.mcts import MCTS
 
 
 def custom_score(game, player):
@@ -33,7 +32,16 @@ def custom_score(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    raise NotImplementedError
+    if game.is_loser(player):
+        return float("-inf")
+
+    if game.is_winner(player):
+        return float("inf")
+
+    # Territory: the blank cells the player reaches strictly before the
+    # opponent, minus the cells the opponent reaches first
+    reach = game.reachability(player)
+    return float(reach.own_closer - reach.opp_closer)
 
 
 class CustomPlayer:
@@ -59,12 +67,41 @@ class CustomPlayer:
         the PvP competition uses more accurate timers that are not cross-
         platform compatible, so a limit of 1ms (vs 10ms for the other classes)
         is generally sufficient.
+
+    opening_book : OpeningBook or str (optional)
+        Play the stored move while the position is in the book (see
+        `search.book`); a string is the path of a book file.
+
+    exploration : float (optional)
+        The UCT exploration constant of the Monte Carlo tree search.
+
+    playout_depth : int (optional)
+        Cut the playouts off after this many random moves and score them
+        with custom_score (see `search.mcts`); None plays them out.
+
+    reuse_tree : bool (optional)
+        Keep the search tree from one move to the next.
+
+    gc_pause : bool (optional)
+        Disable the cyclic garbage collector while searching (and restore
+        its previous state before returning), so that no collection walks
+        the tree during the move.  The collector is process-wide: only
+        enable this when nothing else in the process depends on it.
     """
 
-    def __init__(self, data=None, timeout=1.):
+    def __init__(self, data=None, timeout=1., opening_book=None,
+                 exploration=math.sqrt(2), playout_depth=None, reuse_tree=True,
+                 gc_pause=False):
         self.score = custom_score
         self.time_left = None
         self.TIMER_THRESHOLD = timeout
+        if isinstance(opening_book, str):
+            opening_book = OpeningBook(opening_book)
+        self.opening_book = opening_book
+        self.mcts = MCTS(exploration, playout_depth,
+                         custom_score if playout_depth is not None else None)
+        self.reuse_tree = reuse_tree
+        self.gc_pause = gc_pause
 
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
@@ -93,5 +130,24 @@ class CustomPlayer:
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
-        # OPTIONAL: Finish this function!
-        raise NotImplementedError
+        self.time_left = time_left
+
+        if self.opening_book is not None:
+            move = self.opening_book.lookup(game)
+            if move is not None and move in game.get_legal_moves():
+                return move
+
+        if not self.reuse_tree:
+            self.mcts.reset()
+        enabled = self.gc_pause and gc.isenabled()
+        if enabled:
+            gc.disable()
+        try:
+            move = self.mcts.search(game, time_left, self.TIMER_THRESHOLD)
+        finally:
+            if enabled:
+                gc.enable()
+        if move is None:
+            return (-1, -1)
+        self.mcts.play(move)
+        return move
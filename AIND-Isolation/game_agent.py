@@ -1,9 +1,28 @@
 import random
 import math
+import threading
+import timeit
 
-class SearchTimeout(Exception):
-    """Subclass base exception for code clarity. """
-    pass
+from search import SearchTimeout
+from search.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from search.ordering import MoveOrderer, MAX_SIDE, MIN_SIDE
+from search.timing import TimeManager
+from search.endgame import EndgameSolver
+
+try:
+    from isolation.vectorized import MobilityBatch
+except ImportError:  # numpy is not installed
+    MobilityBatch = None
+
+
+def _next_up(x):
+    """Return the smallest float greater than `x`, the upper end of a null
+    window above `x`.
+    """
+    try:
+        return math.nextafter(x, float("inf"))
+    except AttributeError:  # Python < 3.9
+        return x + max(abs(x), 1.) * 2 ** -52
 
 
 def custom_score(game, player):
@@ -31,21 +50,30 @@ def custom_score(game, player):
         The heuristic value of the current game state to the specified player.
     """
     # The one from lectures
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
     movesSoFar = game.move_count
 
     # More moves played the more relevant the number of legal moves is
 
-    own_moves = len(game.get_legal_moves(player))*movesSoFar
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))*movesSoFar
+    own_moves = summary.own_moves*movesSoFar
+    opp_moves = summary.opp_moves*movesSoFar
     return float(own_moves - opp_moves)
 
 
+def custom_scores(batch):
+    """The batch version of `custom_score` (see
+    `isolation.vectorized.MobilityBatch`)."""
+    own_moves = batch.own_moves * batch.move_count
+    opp_moves = batch.opp_moves * batch.move_count
+    return batch.with_utility(own_moves - opp_moves)
+
+
+custom_score.batch = custom_scores
+
+
 def custom_score_2(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -68,14 +96,12 @@ def custom_score_2(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
     # More spaces less valuable number of legal moves is
-    spacesLeft = len(game.get_blank_spaces())
+    spacesLeft = summary.blank_spaces
     # More moves taken more valuable opp moves is
     movesTaken = game.move_count
     # Take the board size to get some relevance
@@ -88,14 +114,28 @@ def custom_score_2(game, player):
 
 
     # Aim is to emphasise the opponents moves so own player is more likely to be aggresive
-    own_moves = len(game.get_legal_moves(player)) * calibration
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player))) * calibration
+    own_moves = summary.own_moves * calibration
+    opp_moves = summary.opp_moves * calibration
 
     # The more spaces left the less likely the number of legal moves means
 
     return float(own_moves-opp_moves)
 
 
+def custom_scores_2(batch):
+    """The batch version of `custom_score_2`, with the same operations in
+    the same order so the floats are identical."""
+    boardSize = batch.width * batch.height
+    calibration = (batch.move_count + (boardSize - batch.blank_spaces)) / boardSize
+    calibration = calibration * 10
+    own_moves = batch.own_moves * calibration
+    opp_moves = batch.opp_moves * calibration
+    return batch.with_utility(own_moves - opp_moves)
+
+
+custom_score_2.batch = custom_scores_2
+
+
 def custom_score_3(game, player):
     """Calculate the heuristic value of a game state from the point of view
     of the given player.
@@ -118,19 +158,16 @@ def custom_score_3(game, player):
     float
         The heuristic value of the current game state to the specified player.
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
-    playerMoves = len(game.get_legal_moves(player))
-    oppPlayer = game.get_opponent(player)
-    oppMoves = len(game.get_legal_moves(oppPlayer))
+    playerMoves = summary.own_moves
+    oppMoves = summary.opp_moves
 
     # Find the distance between the two player locations and reward player for being further away
-    playerLocation = game.get_player_location(player)
-    oppLocation = game .get_player_location(oppPlayer)
+    playerLocation = summary.own_location
+    oppLocation = summary.opp_location
 
     # Height and width of triangle use pythag theorem to get distance
     xSquared = (playerLocation[0] - oppLocation[0])*(playerLocation[0] - oppLocation[0])
@@ -141,6 +178,18 @@ def custom_score_3(game, player):
     return float((playerMoves + distance)-oppMoves)
 
 
+def custom_scores_3(batch):
+    """The batch version of `custom_score_3` (NumPy computes `** .5` with a
+    correctly rounded square root, like `math.sqrt`)."""
+    difference = (batch.placed(batch.own_location) -
+                  batch.placed(batch.opp_location))
+    distance = (difference * difference).sum(axis=1) ** .5
+    return batch.with_utility((batch.own_moves + distance) - batch.opp_moves)
+
+
+custom_score_3.batch = custom_scores_3
+
+
 class IsolationPlayer:
     """Base class for minimax and alphabeta agents -- this class is never
     constructed or tested directly.
@@ -170,7 +219,53 @@ class IsolationPlayer:
         self.TIMER_THRESHOLD = timeout
 
 
-class MinimaxPlayer(IsolationPlayer):
+class SearchClock(object):
+    """Amortized clock checks for the search players: instead of calling
+    `time_left()` at every node, a node counts down `_clock_countdown` and
+    calls _check_clock() when it reaches 0.
+    """
+
+    # The clock is read every `_clock_interval` nodes, adapted so that the
+    # nodes between two readings take at most CLOCK_SHARE of TIMER_THRESHOLD
+    # (and never more than CLOCK_MAX_INTERVAL nodes)
+    CLOCK_SHARE = .25
+    CLOCK_MAX_INTERVAL = 256
+
+    _clock_countdown = _clock_interval = 1
+    _clock_last = None
+
+    def _start_clock(self):
+        """Read the clock at the next node and adapt the interval from
+        there on.
+        """
+        self._clock_countdown = 1
+        self._clock_interval = 1
+        self._clock_last = None
+
+    def _check_clock(self):
+        """Raise SearchTimeout if the time is up, and set the number of
+        nodes to search before the clock is read again.
+
+        The interval grows while the measured time per node allows and
+        shrinks as the threshold approaches, so the search stops at most
+        CLOCK_SHARE * TIMER_THRESHOLD milliseconds late.  A clock that does
+        not advance between readings keeps the interval unchanged.
+        """
+        left = self.time_left()
+        if left < self.TIMER_THRESHOLD:
+            raise SearchTimeout()
+        interval = self._clock_interval
+        if self._clock_last is not None and self._clock_last > left:
+            per_node = (self._clock_last - left) / interval
+            budget = min(self.CLOCK_SHARE * self.TIMER_THRESHOLD,
+                         (left - self.TIMER_THRESHOLD) / 2.)
+            interval = max(1, min(self.CLOCK_MAX_INTERVAL,
+                                  2 * interval, int(budget / per_node)))
+        self._clock_last = left
+        self._clock_interval = self._clock_countdown = interval
+
+
+class MinimaxPlayer(SearchClock, IsolationPlayer):
     """Game-playing agent that chooses a move using depth-limited minimax
     search. You must finish and test this player to make sure it properly uses
     minimax to return a good move before the search time limit expires.
@@ -239,8 +334,10 @@ class MinimaxPlayer(IsolationPlayer):
             The board coordinates of the best move found in the current search;
             (-1, -1) if there are no legal moves
         """
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._start_clock()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
 
 
         best_score = float('-inf')
@@ -267,8 +364,9 @@ class MinimaxPlayer(IsolationPlayer):
          nodes.
          """
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
 
         if depth == 0:
             return self.score(game,self)
@@ -285,8 +383,9 @@ class MinimaxPlayer(IsolationPlayer):
         nodes.
         """
         # If leaf node return score
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
         if depth == 0:
             return self.score(game,self)
 
@@ -303,12 +402,194 @@ class MinimaxPlayer(IsolationPlayer):
 
 
 
-class AlphaBetaPlayer(IsolationPlayer):
+class AlphaBetaPlayer(SearchClock, IsolationPlayer):
     """Game-playing agent that chooses a move using iterative deepening minimax
     search with alpha-beta pruning. You must finish and test this player to
     make sure it returns a good move before the search time limit expires.
+
+    Parameters
+    ----------
+    tt_size_mb : float (optional)
+        Memory budget in megabytes for a transposition table that is kept
+        between calls to get_move() during a game; 0 disables the table.
+
+    move_ordering : bool or `search.ordering.MoveOrderer` (optional)
+        Order the moves at every node with hash-move, killer-move and
+        history heuristics.  Pass a MoveOrderer to choose which heuristics
+        are used; False keeps the order returned by get_legal_moves().
+
+    pv_reuse : bool (optional)
+        Carry the principal variation and the root move scores from one
+        iterative deepening iteration to the next: the root moves are sorted
+        by their previous scores and the previous principal variation is
+        searched first at every position along it.
+
+    aspiration_window : float (optional)
+        Half-width of the aspiration window placed around the previous
+        iteration's score; a result outside the window is re-searched with
+        the failing side opened up.  0 searches every iteration with a full
+        window.
+
+    pvs : bool (optional)
+        Search with the negamax principal variation search core: the first
+        move at each node gets the full window, the others a null window,
+        and only moves that fail high are searched again.  When False the
+        min_value()/max_value() pair is used.
+
+    ponder : bool (optional)
+        Keep searching in a background thread while the opponent is on
+        move.  After each move the opponent's most likely reply is
+        predicted and the position after it is searched for up to
+        PONDER_MILLIS milliseconds; if the opponent plays that reply, the
+        next get_move() continues the pondered iterative deepening instead
+        of starting again from depth 1.  Otherwise the pondering is
+        discarded (its transposition table entries are kept).  Pondering
+        starts after every move, including book and endgame solver moves.
+
+        The thread shares the interpreter lock, so an opponent running in
+        the same process loses part of its clock to it.  Never enable
+        pondering for `Board.play()` matches against an opponent in the
+        same process (as in `tournament.py`, which plays both agents of a
+        game in one worker): only play it against an opponent in another
+        process, such as the competition's.
+
+    time_manager : TimeManager or bool (optional)
+        Budget each move by game phase, do not start a depth that cannot
+        finish in time, and calibrate the safety margin from measured
+        latencies (see `search.timing`); True uses a TimeManager with
+        `timeout` as its initial margin.  The manager sets TIMER_THRESHOLD
+        before every move.
+
+    endgame_solver : EndgameSolver or bool (optional)
+        Once the board is partitioned (`Board.is_partitioned()`), solve the
+        position exactly by longest-path search (see `search.endgame`)
+        instead of searching it with the heuristic.  The solver may use half
+        of the remaining time; if it does not finish, the normal search
+        runs with the rest.  True uses a new EndgameSolver.
+
+    symmetric_tt : bool (optional)
+        Key the transposition table by `Board.canonical_hash()`, so that
+        reflected and rotated positions share one entry; the best move is
+        stored in the canonical frame and mapped back on every probe.  Only
+        valid with a score function that is invariant under the board's
+        symmetries (all the bundled heuristics are).
+
+    opening_book : OpeningBook or str (optional)
+        Play the stored move without searching while the position is in the
+        book (see `search.book`); a string is the path of a book file.
+
+    tablebase : Tablebase or str (optional)
+        Probe the endgame tablebase (see `search.tablebase`) before the
+        transposition table at every node it covers; a tablebase hit is an
+        exact result at any depth.  A string is the path of a tablebase
+        file.
+
+    batch_leaves : bool (optional)
+        At the nodes one ply above the horizon, score all the children at
+        once with the batch version of the heuristic (`score_fn.batch`, see
+        `isolation.vectorized.MobilityBatch`) instead of visiting them one
+        by one.  The scores are the same; `nodes` counts every child,
+        including those a cutoff would have skipped.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of nodes visited by the current iteration of the search.
+
+    depth_nodes : list<int>
+        The number of nodes visited by each completed iteration of the last
+        call to get_move() (element `i` is for depth `i + 1`).
+
+    principal_variation : list<(int, int)>
+        The expected line of play found by the last completed iteration.
+
+    root_scores : dict
+        The score of each root move in the last completed iteration (moves
+        that failed low have an upper bound as their score).
+
+    researches : int
+        The number of aspiration window re-searches in the last get_move().
+
+    ponder_hits, ponder_misses : int
+        The number of moves on which the pondered reply was / was not the
+        one the opponent played.
+
+    ponder_depth : int
+        The number of iterations the pondering had completed when the last
+        get_move() started (0 on a miss).
+
+    search_aborted : bool
+        True if the last get_move() discarded an unfinished iteration.
+
+    endgame_solved : bool
+        True if the last get_move() returned the endgame solver's move.
+
+    from_book : bool
+        True if the last get_move() returned the opening book's move.
     """
 
+    PONDER_MILLIS = 1000.
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=12.,
+                 tt_size_mb=0, move_ordering=False, pv_reuse=False,
+                 aspiration_window=0., pvs=False, ponder=False,
+                 time_manager=None, endgame_solver=None, symmetric_tt=False,
+                 opening_book=None, tablebase=None, batch_leaves=False):
+        super().__init__(search_depth, score_fn, timeout)
+        if batch_leaves and (MobilityBatch is None or
+                             getattr(score_fn, "batch", None) is None):
+            raise ValueError("batch_leaves needs numpy and a score function "
+                             "with a batch version")
+        self.batch_leaves = batch_leaves
+        self.tt = TranspositionTable(tt_size_mb) if tt_size_mb else None
+        self.symmetric_tt = symmetric_tt
+        # The book and the tablebase are memory-mapped files: import their
+        # modules (and mmap) only for the players that use them
+        if isinstance(opening_book, str):
+            from search.book import OpeningBook
+            opening_book = OpeningBook(opening_book)
+        self.opening_book = opening_book
+        self.from_book = False
+        if isinstance(tablebase, str):
+            from search.tablebase import Tablebase
+            tablebase = Tablebase(tablebase)
+        self.tablebase = tablebase
+        if move_ordering is True:
+            move_ordering = MoveOrderer()
+        self.orderer = move_ordering or None
+        if time_manager is True:
+            time_manager = TimeManager(margin=timeout)
+        self.time_manager = time_manager or None
+        self.search_aborted = False
+        if endgame_solver is True:
+            endgame_solver = EndgameSolver()
+        self.endgame_solver = endgame_solver or None
+        self.endgame_solved = False
+        self.pv_reuse = pv_reuse
+        self.aspiration_window = aspiration_window
+        self.pvs = pvs
+        self.nodes = 0
+        self.depth_nodes = []
+        self.principal_variation = []
+        self.root_scores = {}
+        self.researches = 0
+        self._root_scores = {}
+        # Principal variation lines by move_count and the previous
+        # iteration's PV move by position hash (see _remember_pv)
+        self._pv_lines = {}
+        self._pv_moves = {}
+        self.ponder = ponder
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+        self.ponder_depth = 0
+        # The (hash, move_count) of the position being pondered, its best
+        # move so far, and the background thread searching it
+        self._ponder_key = None
+        self._ponder_move = None
+        self._ponder_thread = None
+        self._ponder_stop = None
+        self._start_clock()
+
     def get_move(self, game, time_left):
         """Search for the best move from the available legal moves and return a
         result before the time limit expires.
@@ -339,8 +620,36 @@ class AlphaBetaPlayer(IsolationPlayer):
             Board coordinates corresponding to a legal move; may return
             (-1, -1) if there are no available legal moves.
         """
+        self.stop_pondering()
         self.time_left = time_left
+        self._start_clock()
+        manager = self.time_manager
+        if manager is not None:
+            self.TIMER_THRESHOLD = manager.start_move(game, time_left())
+        best_move = self._choose_move(game, time_left)
+        # Every move, from the book, the endgame solver or the search, ends
+        # here: calibrate the time manager and start pondering
+        if manager is not None:
+            stop = self.TIMER_THRESHOLD if self.search_aborted else time_left()
+        if self.ponder:
+            self._start_pondering(game, best_move)
+        if manager is not None:
+            manager.end_move(stop - time_left())
+        return best_move
 
+    def _choose_move(self, game, time_left):
+        """Return the move of get_move(): the opening book's, the endgame
+        solver's or the iterative deepening search's.
+        """
+        self.from_book = self.endgame_solved = self.search_aborted = False
+        pondered = self._ponder_hit(game)
+        if self.opening_book is not None:
+            move = self.opening_book.lookup(game)
+            if move is not None and move in game.get_legal_moves():
+                self._new_search(game)
+                self.from_book = True
+                return move
+        self._new_search(game, resume=pondered)
 
         # Initialize the best move so that this function returns something
         # in case the search fails due to timeout
@@ -349,24 +658,49 @@ class AlphaBetaPlayer(IsolationPlayer):
             best_move = game.get_legal_moves()[0]
         else:
             return best_move
-
+        if pondered and self._ponder_move is not None:
+            best_move = self._ponder_move
+
+        if self.endgame_solver is not None and game.is_partitioned():
+            left = time_left()
+            try:
+                best_move, _ = self.endgame_solver.solve(
+                    game, time_left, (left + self.TIMER_THRESHOLD) / 2.)
+                self.endgame_solved = True
+                return best_move
+            except SearchTimeout:
+                pass
+
+        manager = self.time_manager
         try:
             # The try/except block will automatically catch the exception
             # raised when the timer is about to expire.
-            tree = range(1,len(game.get_blank_spaces()))
-            for depth in tree:
-                possible_best = self.alphabeta(game, depth)
-                # If possible_best is an empty tuple then return previous iteration
-                if possible_best == ():
-                    return best_move
-                else:
-                    best_move = possible_best
+            tree = range(len(self.depth_nodes) + 1, len(game.get_blank_spaces()))
+            score = None
+            if pondered and self.root_scores:
+                score = max(self.root_scores.values())
+            for best_move in self._deepen(game, tree, score):
+                if manager is not None and not manager.next_depth(
+                        self.depth_nodes, time_left(),
+                        max(self._root_scores.values())):
+                    break
 
         except SearchTimeout:
-            return best_move
-
+            self.search_aborted = True
         return best_move
 
+    def stop_pondering(self):
+        """Stop the background search, if one is running, and wait for it."""
+        if self._ponder_thread is not None:
+            self._ponder_stop.set()
+            self._ponder_thread.join()
+            self._ponder_thread = None
+
+    def ponder_hit_rate(self):
+        """Return the fraction of moves on which the prediction was right."""
+        total = self.ponder_hits + self.ponder_misses
+        return self.ponder_hits / total if total else 0.
+
     def alphabeta(self, game, depth, alpha=float("-inf"), beta=float("inf")):
         """Implement depth-limited minimax search with alpha-beta pruning as
         described in the lectures.
@@ -412,28 +746,109 @@ class AlphaBetaPlayer(IsolationPlayer):
                 each helper function or else your agent will timeout during
                 testing.
         """
+        return self._search_root(game, depth, alpha, beta)[0]
+
+    def _deepen(self, game, depths, score=None):
+        """Run iterative deepening over `depths`, yielding the best move of
+        each completed iteration; `score` is the score of the iteration
+        before the first one, if known, for the aspiration window.
+        """
+        for depth in depths:
+            self.nodes = 0
+            possible_best, score = self._iterate(game, depth, score)
+            # If possible_best is an empty tuple then return previous iteration
+            if possible_best == ():
+                return
+            self.depth_nodes.append(self.nodes)
+            self.root_scores = self._root_scores
+            if self.pv_reuse:
+                self._remember_pv(game)
+            yield possible_best
+
+    def _iterate(self, game, depth, previous_score):
+        """Run one iterative deepening iteration, inside an aspiration window
+        around the previous iteration's score when that is enabled.
+
+        Returns
+        -------
+        ((int, int), float)
+            The best move and its score.
+        """
+        alpha, beta = float("-inf"), float("inf")
+        if (self.aspiration_window and previous_score is not None and
+                not math.isinf(previous_score)):
+            alpha = previous_score - self.aspiration_window
+            beta = previous_score + self.aspiration_window
+        while True:
+            move, score = self._search_root(game, depth, alpha, beta)
+            if score <= alpha and alpha != float("-inf"):
+                alpha = float("-inf")
+            elif score >= beta and beta != float("inf"):
+                beta = float("inf")
+            else:
+                return move, score
+            self.researches += 1
+
+    def _search_root(self, game, depth, alpha, beta):
+        """Search the root position; see alphabeta().
+
+        Returns
+        -------
+        ((int, int), float)
+            The best move (an empty tuple if there are no legal moves) and
+            its score.
+        """
         if self.time_left() < self.TIMER_THRESHOLD:
             raise SearchTimeout()
 
         # Get the legal moves available at the current gamestate
         legal_moves = game.get_legal_moves()
+        if self.orderer is not None or self._pv_moves:
+            entry = self._probe(game) if self.tt is not None else None
+            legal_moves = self._order(game, legal_moves, MAX_SIDE, entry)
+        if self.pv_reuse and self.root_scores:
+            previous = self.root_scores
+            legal_moves.sort(key=lambda m: previous.get(m, float("-inf")),
+                             reverse=True)
+        window = alpha, beta
+        root_scores = {}
+        if self.pv_reuse:
+            self._pv_lines[game.move_count] = ()
 
         best_score = float("-inf")
         # Return an empty tuple instead of none
         best_move = ()
 
         for m in legal_moves:
-            v = self.min_value(game.forecast_move(m), depth - 1,alpha,beta)
+            child = self._make_move(game, m)
+            if not self.pvs:
+                v = self.min_value(child, depth - 1, alpha, beta)
+            elif best_move == ():
+                v = -self._negamax(child, depth - 1, -beta, -alpha)
+            else:
+                v = -self._negamax(child, depth - 1, -_next_up(alpha), -alpha)
+                if alpha < v < beta:
+                    v = -self._negamax(child, depth - 1, -beta, -alpha)
+            self._unmake_move(game)
+            root_scores[m] = v
             if v > best_score:
                 best_score = v
                 best_move = m
+                if self.pv_reuse:
+                    self._update_pv(game, m)
 
             # KEYLOGIC:  If score beats the upper limit then break and return the best possible move
             if best_score >= beta:
+                if self.orderer is not None:
+                    self.orderer.record_cutoff(m, game.move_count, depth, MAX_SIDE)
                 break
             # Sets the lowerbound
             alpha = max(alpha,best_score)
-        return best_move
+
+        if self.tt is not None and legal_moves:
+            self._store(game, depth, best_score, window, best_move)
+        self._root_scores = root_scores
+        return best_move, best_score
 
 
     def min_value(self,game,depth,alpha,beta):
@@ -442,21 +857,55 @@ class AlphaBetaPlayer(IsolationPlayer):
          nodes.
          """
 
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+        self.nodes += 1
+        if self.pv_reuse:
+            self._pv_lines[game.move_count] = ()
 
         if depth == 0:
             return self.score(game,self)
 
-        v = float("inf")
+        entry = None
+        if self.tt is not None or self.tablebase is not None:
+            entry = self._probe(game)
+            if entry is not None and entry[0] >= depth:
+                alpha, beta = self._tt_window(entry, alpha, beta)
+                if alpha >= beta:
+                    return entry[1]
+        window = alpha, beta
 
-        for m in game.get_legal_moves():
-            v = min(v, self.max_value(game.forecast_move(m), depth - 1,alpha,beta))
+        moves = game.get_legal_moves()
+        if self.orderer is not None or self._pv_moves:
+            moves = self._order(game, moves, MIN_SIDE, entry)
+
+        v = float("inf")
+        best_move = None
+        leaves = None
+        if depth == 1 and self.batch_leaves:
+            leaves = self._leaf_scores(game, moves)
+
+        for i, m in enumerate(moves):
+            if leaves is None:
+                score = self.max_value(self._make_move(game, m), depth - 1,alpha,beta)
+                self._unmake_move(game)
+            else:
+                score = leaves[i]
+            if score < v:
+                v = score
+                best_move = m
+                if self.pv_reuse:
+                    self._update_pv(game, m)
             # Then new min value
             if v <= alpha:
-                return v
+                if self.orderer is not None:
+                    self.orderer.record_cutoff(m, game.move_count, depth, MIN_SIDE)
+                break
             beta = min(v,beta)
 
+        if self.tt is not None:
+            self._store(game, depth, v, window, best_move)
         return v
 
     def max_value(self,game, depth,alpha,beta):
@@ -465,21 +914,521 @@ class AlphaBetaPlayer(IsolationPlayer):
         nodes.
         """
         # If leaf node return score
-        if self.time_left() < self.TIMER_THRESHOLD:
-            raise SearchTimeout()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+        self.nodes += 1
+        if self.pv_reuse:
+            self._pv_lines[game.move_count] = ()
         if depth == 0:
             return self.score(game,self)
 
-        #       when the depth parameter reaches 0 -- for now
-        #       just return a value of 0 at the depth limit
-        if depth == 0:
-            return 0
+        entry = None
+        if self.tt is not None or self.tablebase is not None:
+            entry = self._probe(game)
+            if entry is not None and entry[0] >= depth:
+                alpha, beta = self._tt_window(entry, alpha, beta)
+                if alpha >= beta:
+                    return entry[1]
+        window = alpha, beta
+
+        moves = game.get_legal_moves()
+        if self.orderer is not None or self._pv_moves:
+            moves = self._order(game, moves, MAX_SIDE, entry)
+
         v = float("-inf")
-        for m in game.get_legal_moves():
+        best_move = None
+        leaves = None
+        if depth == 1 and self.batch_leaves:
+            leaves = self._leaf_scores(game, moves)
+        for i, m in enumerate(moves):
             #       recursive call
-            v = max(v, self.min_value(game.forecast_move(m), depth - 1,alpha,beta))
+            if leaves is None:
+                score = self.min_value(self._make_move(game, m), depth - 1,alpha,beta)
+                self._unmake_move(game)
+            else:
+                score = leaves[i]
+            if score > v:
+                v = score
+                best_move = m
+                if self.pv_reuse:
+                    self._update_pv(game, m)
             # Then upper value
             if v >= beta:
-                return v
+                if self.orderer is not None:
+                    self.orderer.record_cutoff(m, game.move_count, depth, MAX_SIDE)
+                break
             alpha = max(v,alpha)
+
+        if self.tt is not None:
+            self._store(game, depth, v, window, best_move)
         return v
+
+    def _new_search(self, game, resume=False):
+        """Reset the per-move search state before searching from `game`.
+
+        With `resume` (a ponder hit) the completed iterations, their root
+        scores and principal variation are kept, and the search continues
+        from the next depth.
+        """
+        self._start_clock()
+        self.researches = 0
+        if not resume:
+            self.depth_nodes = []
+            self.principal_variation = []
+            self.root_scores = {}
+            self._pv_lines = {}
+            self._pv_moves = {}
+        if self.tt is not None:
+            self.tt.new_search(game.move_count)
+        if self.orderer is not None:
+            self.orderer.new_search()
+
+    def _ponder_hit(self, game):
+        """Return True if `game` is the pondered position, in which case the
+        pondering search state is kept for the search of `game`.
+        """
+        key, self._ponder_key = self._ponder_key, None
+        self.ponder_depth = 0
+        if key is None:
+            return False
+        if key != (game.hash(), game.move_count):
+            self.ponder_misses += 1
+            return False
+        self.ponder_hits += 1
+        self.ponder_depth = len(self.depth_nodes)
+        return True
+
+    def _predict_reply(self, game, move):
+        """Return the opponent's expected reply to `move` in `game` (the
+        position after it): the reply from the principal variation or the
+        transposition table if known, otherwise the move that minimizes the
+        score one ply ahead.
+        """
+        moves = game.get_legal_moves()
+        if not moves:
+            return None
+        pv = self.principal_variation
+        if len(pv) > 1 and pv[0] == move and pv[1] in moves:
+            return pv[1]
+        if self.tt is not None:
+            entry = self._probe(game)
+            if entry is not None and entry[3] in moves:
+                return entry[3]
+        return min(moves, key=lambda m: self.score(game.forecast_move(m), self))
+
+    def _start_pondering(self, game, move):
+        """Start searching the position after `move` and the opponent's
+        predicted reply in a background thread.
+        """
+        if move not in game.get_legal_moves():
+            return
+        position = game.forecast_move(move)
+        reply = self._predict_reply(position, move)
+        if reply is None:
+            return
+        position = position.forecast_move(reply)
+        if not position.get_legal_moves():
+            return
+        self._new_search(position)
+        self._ponder_key = position.hash(), position.move_count
+        self._ponder_move = None
+        stop = self._ponder_stop = threading.Event()
+        end = timeit.default_timer() + self.PONDER_MILLIS / 1000.
+        self.time_left = lambda: (float("-inf") if stop.is_set() else
+                                  1000. * (end - timeit.default_timer()))
+        self._ponder_thread = threading.Thread(target=self._ponder,
+                                               args=(position,))
+        self._ponder_thread.daemon = True
+        self._ponder_thread.start()
+
+    def _ponder(self, game):
+        """Iterative deepening on the pondered position (thread target)."""
+        try:
+            tree = range(1, len(game.get_blank_spaces()))
+            for move in self._deepen(game, tree):
+                self._ponder_move = move
+        except SearchTimeout:
+            pass
+
+    def _negamax(self, game, depth, alpha, beta):
+        """Return the value of `game` for the player to move, searched with
+        principal variation search inside the (alpha, beta) window.
+
+        The first move is searched with the full window; every other move is
+        first tested with a null window just above alpha and searched again
+        with the full window only if it turns out to be better.
+        """
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+        self.nodes += 1
+        if self.pv_reuse:
+            self._pv_lines[game.move_count] = ()
+
+        if depth == 0:
+            value = self.score(game, self)
+            return value if game.active_player == self else -value
+
+        entry = None
+        if self.tt is not None or self.tablebase is not None:
+            entry = self._probe(game)
+            if entry is not None and entry[0] >= depth:
+                alpha, beta = self._tt_window(entry, alpha, beta)
+                if alpha >= beta:
+                    return entry[1]
+        window = alpha, beta
+
+        side = MAX_SIDE if game.active_player == self else MIN_SIDE
+        moves = game.get_legal_moves()
+        if self.orderer is not None or self._pv_moves:
+            moves = self._order(game, moves, side, entry)
+
+        v = float("-inf")
+        best_move = None
+        leaves = None
+        if depth == 1 and self.batch_leaves:
+            leaves = self._leaf_scores(game, moves)
+            if game.active_player != self:
+                leaves = [-score for score in leaves]
+        for i, m in enumerate(moves):
+            if leaves is not None:
+                # A leaf is exact in any window: no re-search
+                score = leaves[i]
+            else:
+                child = self._make_move(game, m)
+                if best_move is None:
+                    score = -self._negamax(child, depth - 1, -beta, -alpha)
+                else:
+                    score = -self._negamax(child, depth - 1, -_next_up(alpha), -alpha)
+                    if alpha < score < beta:
+                        score = -self._negamax(child, depth - 1, -beta, -alpha)
+                self._unmake_move(game)
+            if score > v or best_move is None:
+                v = score
+                best_move = m
+                if self.pv_reuse:
+                    self._update_pv(game, m)
+            if v >= beta:
+                if self.orderer is not None:
+                    self.orderer.record_cutoff(m, game.move_count, depth, side)
+                break
+            alpha = max(v, alpha)
+
+        if self.tt is not None:
+            self._store(game, depth, v, window, best_move)
+        return v
+
+    def _leaf_scores(self, game, moves):
+        """Return `score_fn(child, self)` for the child of `game` after every
+        move, computed in one batch; the children count as visited nodes.
+        """
+        self._clock_countdown -= len(moves)
+        if self._clock_countdown <= 0:
+            self._check_clock()
+        self.nodes += len(moves)
+        if self.pv_reuse:
+            self._pv_lines[game.move_count + 1] = ()
+        batch = MobilityBatch.from_children(game, self, moves)
+        return self.score.batch(batch).tolist()
+
+    def _make_move(self, game, move):
+        """Return the child of `game` reached by `move`."""
+        return game.forecast_move(move)
+
+    def _unmake_move(self, game):
+        """Undo the work of _make_move() once the child has been searched."""
+        pass
+
+    def _order(self, game, moves, side, entry):
+        """Order the moves with the move orderer, using the best move of the
+        transposition table entry (if any) as hash move, and search the move
+        of the previous principal variation first.
+        """
+        hash_move = entry[3] if entry is not None else None
+        if self.orderer is not None:
+            moves = self.orderer.order(moves, game.move_count, side, hash_move)
+        pv_move = self._pv_moves.get(game.hash())
+        if pv_move is not None and pv_move in moves:
+            moves.remove(pv_move)
+            moves.insert(0, pv_move)
+        return moves
+
+    def _update_pv(self, game, move):
+        """Record `move` followed by the line of its child as the principal
+        variation of `game`.
+        """
+        lines = self._pv_lines
+        lines[game.move_count] = (move,) + lines.get(game.move_count + 1, ())
+
+    def _remember_pv(self, game):
+        """Keep the principal variation of the iteration that just completed,
+        for ordering the next one (_deepen() keeps its root move scores).
+        """
+        self.principal_variation = list(self._pv_lines.get(game.move_count, ()))
+        self._pv_moves = {}
+        position = game
+        for move in self.principal_variation:
+            if move not in position.get_legal_moves():
+                break
+            self._pv_moves[position.hash()] = move
+            position = position.forecast_move(move)
+
+    @staticmethod
+    def _tt_window(entry, alpha, beta):
+        """Narrow the (alpha, beta) window with a transposition table entry
+        that was searched at least as deep as the current node.
+        """
+        _, value, flag, _ = entry
+        if flag == EXACT:
+            return value, value
+        if flag == LOWER:
+            return max(alpha, value), beta
+        return alpha, min(beta, value)
+
+    def _probe(self, game):
+        """Return the transposition table entry of `game` (or None), with
+        the best move mapped back from the canonical frame if the table is
+        shared between symmetric positions.
+
+        Positions covered by the tablebase are answered from it instead,
+        with the value from the point of view the search core expects.
+        """
+        if self.tablebase is not None and self.tablebase.covers(game):
+            entry = self.tablebase.probe(game)
+            if entry is not None:
+                if not self.pvs and game.active_player != self:
+                    depth, value, flag, move = entry
+                    entry = depth, -value, flag, move
+                return entry
+        if self.tt is None:
+            return None
+        if not self.symmetric_tt:
+            return self.tt.probe(game.hash())
+        key, t = game.canonical_hash()
+        entry = self.tt.probe(key)
+        if entry is not None and t:
+            depth, value, flag, move = entry
+            entry = depth, value, flag, game.symmetries.inverse_move(move, t)
+        return entry
+
+    def _store(self, game, depth, value, window, best_move):
+        """Record a search result, classified against the window it was
+        searched with (fail-soft: values outside the window are bounds).
+        """
+        alpha, beta = window
+        if value <= alpha:
+            flag = UPPER
+        elif value >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        if self.symmetric_tt:
+            key, t = game.canonical_hash()
+            best_move = game.symmetries.transform_move(best_move, t)
+        else:
+            key = game.hash()
+        self.tt.store(key, depth, value, flag, best_move, game.move_count)
+
+
+class InPlaceMinimaxPlayer(MinimaxPlayer):
+    """MinimaxPlayer variant that walks the game tree by mutating a single
+    board with `Board.push_move()`/`Board.pop_move()` instead of allocating a
+    new board for every node with `forecast_move()`.
+    """
+
+    def get_move(self, game, time_left):
+        """Search for the best move like `MinimaxPlayer.get_move()`, then
+        restore the board if the search was interrupted.
+        """
+        root_move_count = game.move_count
+        try:
+            return super().get_move(game, time_left)
+        finally:
+            while game.move_count > root_move_count:
+                game.pop_move()
+
+    def minimax(self, game, depth):
+        """Depth-limited minimax search on a single mutated board (see
+        `MinimaxPlayer.minimax`).
+        """
+        self._start_clock()
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+
+        best_score = float("-inf")
+        best_move = None
+        for m in game.get_legal_moves():
+            game.push_move(m)
+            v = self.min_value(game, depth - 1)
+            game.pop_move()
+            if v > best_score:
+                best_score = v
+                best_move = m
+        return best_move
+
+    def min_value(self, game, depth):
+        """ Return the minimum value over all legal child nodes. """
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+
+        if depth == 0:
+            return self.score(game, self)
+        v = float("inf")
+        for m in game.get_legal_moves():
+            game.push_move(m)
+            v = min(v, self.max_value(game, depth - 1))
+            game.pop_move()
+        return v
+
+    def max_value(self, game, depth):
+        """ Return the maximum value over all legal child nodes. """
+        self._clock_countdown -= 1
+        if self._clock_countdown <= 0:
+            self._check_clock()
+
+        if depth == 0:
+            return self.score(game, self)
+        v = float("-inf")
+        for m in game.get_legal_moves():
+            game.push_move(m)
+            v = max(v, self.min_value(game, depth - 1))
+            game.pop_move()
+        return v
+
+
+class InPlaceAlphaBetaPlayer(AlphaBetaPlayer):
+    """AlphaBetaPlayer variant that walks the game tree by mutating a single
+    board with `Board.push_move()`/`Board.pop_move()` instead of allocating a
+    new board for every node with `forecast_move()`.
+    """
+
+    def _deepen(self, game, depths, score=None):
+        """Iterative deepening like `AlphaBetaPlayer._deepen()`, restoring
+        the board if the search is interrupted.
+        """
+        root_move_count = game.move_count
+        try:
+            for move in super()._deepen(game, depths, score):
+                yield move
+        finally:
+            while game.move_count > root_move_count:
+                game.pop_move()
+
+    def _make_move(self, game, move):
+        game.push_move(move)
+        return game
+
+    def _unmake_move(self, game):
+        game.pop_move()
+
+
+class ParallelAlphaBetaPlayer(AlphaBetaPlayer):
+    """AlphaBetaPlayer that searches with several worker processes sharing
+    a transposition table in shared memory (Lazy SMP, see
+    `search.parallel`).
+
+    The workers are started when the player is created and kept for the
+    whole game; call close() to stop them and free the shared table.  Each
+    worker stops `TIMER_THRESHOLD + ipc_margin` milliseconds before the
+    deadline so that its result reaches this process in time.
+
+    Parameters
+    ----------
+    workers : int (optional)
+        The number of search processes; with 1 worker the search runs in
+        this process like a plain AlphaBetaPlayer.
+
+    ipc_margin : float (optional)
+        Extra milliseconds reserved for collecting the worker results.
+
+    **options
+        The other options of AlphaBetaPlayer.  With one worker they all
+        apply.  The workers search with `symmetric_tt` and `batch_leaves`;
+        `ponder`, `time_manager`, `endgame_solver`, `opening_book` and
+        `tablebase` are not supported by the parallel search and raise
+        ValueError with more than one worker.
+
+    Attributes
+    ----------
+    depth_reached : int
+        The deepest iteration completed by any worker on the last move.
+
+    worker_results : list
+        The (depth, move, nodes, worker index) reported by every worker on
+        the last move.
+    """
+
+    # The AlphaBetaPlayer options the workers search with
+    WORKER_OPTIONS = ("symmetric_tt", "batch_leaves")
+
+    def __init__(self, search_depth=3, score_fn=custom_score, timeout=12.,
+                 tt_size_mb=16, move_ordering=True, pv_reuse=False,
+                 aspiration_window=0., pvs=False, workers=2, ipc_margin=5.,
+                 **options):
+        unsupported = sorted(name for name, value in options.items()
+                             if value and name not in self.WORKER_OPTIONS)
+        if workers > 1 and unsupported:
+            raise ValueError("the parallel search does not support {}; use "
+                             "workers=1".format(", ".join(unsupported)))
+        super().__init__(search_depth, score_fn, timeout, 0, move_ordering,
+                         pv_reuse, aspiration_window, pvs, **options)
+        self.workers = workers
+        self.ipc_margin = ipc_margin
+        self.depth_reached = 0
+        self.worker_results = []
+        if workers > 1:
+            # multiprocessing is only imported for a parallel search
+            from search.parallel import LazySMP
+            worker = AlphaBetaPlayer(score_fn=score_fn, timeout=timeout,
+                                     move_ordering=move_ordering,
+                                     pv_reuse=pv_reuse,
+                                     aspiration_window=aspiration_window,
+                                     pvs=pvs, **options)
+            self._smp = LazySMP(workers, tt_size_mb, worker)
+            self.tt = self._smp.table
+        else:
+            self._smp = None
+            self.tt = TranspositionTable(tt_size_mb)
+
+    def get_move(self, game, time_left):
+        """Search for the best move in every worker process and return the
+        move of the deepest completed iteration (see
+        `AlphaBetaPlayer.get_move`).
+        """
+        self.time_left = time_left
+        legal_moves = game.get_legal_moves()
+        if not legal_moves:
+            return (-1, -1)
+        if self.workers <= 1:
+            move = super().get_move(game, time_left)
+            self.depth_reached = len(self.depth_nodes)
+            return move
+        move = self._parallel_search(game, time_left)
+        return move if move is not None else legal_moves[0]
+
+    def close(self):
+        """Stop the worker processes and release the shared table."""
+        if self._smp is not None:
+            self._smp.close()
+            self._smp = None
+
+    def _parallel_search(self, game, time_left, max_depth=None):
+        """Run the workers on `game` and return the best move found, or None
+        if no worker completed an iteration in time.
+        """
+        # Only the position is sent to the workers, which search with the
+        # players they were started with
+        results = self._smp.search(game, time_left, self.TIMER_THRESHOLD,
+                                   max_depth,
+                                   self.TIMER_THRESHOLD + self.ipc_margin)
+        self.worker_results = results or []
+        completed = [r for r in self.worker_results if r[1] is not None]
+        if not completed:
+            self.depth_reached = 0
+            return None
+        depth, move, _, _ = max(completed, key=lambda r: (r[0], -r[3]))
+        self.depth_reached = depth
+        return move
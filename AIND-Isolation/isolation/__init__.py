@@ -9,3 +9,5 @@ legal moves loses, and the opponent is declared the winner.
 
 # Make the Board class available at the root of the module for imports
 from .isolation import Board
+from .bitboard import BitBoard
+from .deadline import Deadline
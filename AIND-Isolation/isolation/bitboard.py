@@ -0,0 +1,500 @@
+"""
+This file contains the `BitBoard` class, an alternative backend for the
+`Board` class that stores the game state as integer bitmasks instead of a
+Python list.
+
+Cells are numbered exactly as in `Board` (index = row + column * height), and
+bit `i` of a mask corresponds to cell `i`.  The knight-move neighbourhood of
+every cell is precomputed once per board size, so generating legal moves or
+counting mobility reduces to a handful of AND / popcount operations.
+"""
+import random
+
+from .isolation import Board, MobilitySummary, Reachability
+from .symmetry import symmetries
+
+DIRECTIONS = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+              (1, -2), (1, 2), (2, -1), (2, 1)]
+
+_MASK_CACHE = {}
+_SHIFT_CACHE = {}
+
+try:
+    popcount = int.bit_count
+except AttributeError:  # Python < 3.10
+    def popcount(mask):
+        """Return the number of set bits in a non-negative integer."""
+        return bin(mask).count("1")
+
+
+def knight_masks(width, height):
+    """Return a tuple with the knight-move neighbourhood bitmask of every
+    cell on a board with the given dimensions.
+
+    The result is cached, so all boards of the same size share the table.
+
+    Parameters
+    ----------
+    width : int
+        The number of columns on the board.
+
+    height : int
+        The number of rows on the board.
+
+    Returns
+    -------
+    tuple<int>
+        Element `i` has bit `j` set if a knight on cell `i` can jump to
+        cell `j`.
+    """
+    key = (width, height)
+    masks = _MASK_CACHE.get(key)
+    if masks is None:
+        table = []
+        for idx in range(width * height):
+            r, c = idx % height, idx // height
+            mask = 0
+            for dr, dc in DIRECTIONS:
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    mask |= 1 << (r + dr + (c + dc) * height)
+            table.append(mask)
+        masks = _MASK_CACHE[key] = tuple(table)
+    return masks
+
+
+def knight_shifts(width, height):
+    """Return the (shift, source mask) pair of every knight direction on a
+    board with the given dimensions (cached per size).
+
+    Moving every cell of a mask one knight jump in a direction is a single
+    shift by `dr + dc * height` of the cells in the source mask, the cells
+    from which that jump stays on the board.  OR-ing the eight shifted masks
+    expands a whole flood-fill layer at once.
+    """
+    key = (width, height)
+    shifts = _SHIFT_CACHE.get(key)
+    if shifts is None:
+        table = []
+        for dr, dc in DIRECTIONS:
+            source = 0
+            for idx in range(width * height):
+                r, c = idx % height, idx // height
+                if 0 <= r + dr < height and 0 <= c + dc < width:
+                    source |= 1 << idx
+            table.append((dr + dc * height, source))
+        shifts = _SHIFT_CACHE[key] = tuple(table)
+    return shifts
+
+
+def expand(mask, shifts):
+    """Return the cells one knight jump away from any cell of `mask`."""
+    step = 0
+    for shift, source in shifts:
+        if shift > 0:
+            step |= (mask & source) << shift
+        else:
+            step |= (mask & source) >> -shift
+    return step
+
+
+def iter_bits(mask):
+    """Yield the index of every set bit in `mask` in ascending order."""
+    while mask:
+        low = mask & -mask
+        yield low.bit_length() - 1
+        mask ^= low
+
+
+class BitBoard(Board):
+    """Implement the `Board` model of Isolation on top of integer bitmasks.
+
+    The public API is identical to `Board` (and `BitBoard` is a subclass of
+    it), so any player written against `Board` can be used unchanged.  The
+    blocked cells are held in a single integer, the player locations are
+    stored as cell indices, and the knight-move masks for every cell are
+    shared between all boards of the same size.
+
+    Parameters
+    ----------
+    player_1 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    player_2 : object
+        An object with a get_move() function. This is the only function
+        directly called by the Board class for each player.
+
+    width : int (optional)
+        The number of columns that the board should have.
+
+    height : int (optional)
+        The number of rows that the board should have.
+    """
+
+    def __init__(self, player_1, player_2, width=7, height=7):
+        self.width = width
+        self.height = height
+        self.move_count = 0
+        self._player_1 = player_1
+        self._player_2 = player_2
+        self._active_player = player_1
+        self._inactive_player = player_2
+
+        # Blocked cells (including the cells occupied by the players) and the
+        # cell index of each player, or NOT_MOVED before their first move
+        self._blocked = 0
+        self._p1_loc = Board.NOT_MOVED
+        self._p2_loc = Board.NOT_MOVED
+
+        self._full = (1 << (width * height)) - 1
+        self._masks = knight_masks(width, height)
+        self._shifts = knight_shifts(width, height)
+        self._cells = tuple((idx % height, idx // height)
+                            for idx in range(width * height))
+
+        self._symmetries = symmetries(width, height)
+        self._hash_enter = self._symmetries.plain_enter
+        self._hash_leave = self._symmetries.plain_leave
+        self._hash = 0
+        self._undo_stack = []
+
+    def copy(self):
+        """ Return a deep copy of the current board. """
+        new_board = object.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
+        new_board._undo_stack = []
+        return new_board
+
+    def to_state(self):
+        """See `Board.to_state`."""
+        return self._blocked, self._p1_loc, self._p2_loc, self.hash()
+
+    def _set_state(self, blocked, loc_1, loc_2, _):
+        self._blocked, self._p1_loc, self._p2_loc = blocked, loc_1, loc_2
+
+    def move_is_legal(self, move):
+        """Test whether a move is legal in the current game state.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+
+        Returns
+        -------
+        bool
+            Returns True if the move is legal, False otherwise
+        """
+        return (0 <= move[0] < self.height and 0 <= move[1] < self.width and
+                not self._blocked >> (move[0] + move[1] * self.height) & 1)
+
+    def get_blank_spaces(self):
+        """Return a list of the locations that are still available on the board.
+        """
+        cells = self._cells
+        return [cells[idx] for idx in iter_bits(self._full & ~self._blocked)]
+
+    def get_player_location(self, player):
+        """Find the current location of the specified player on the board.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        (int, int) or None
+            The coordinate pair (row, column) of the input player, or None
+            if the player has not moved.
+        """
+        idx = self._loc_index(player)
+        if idx == Board.NOT_MOVED:
+            return Board.NOT_MOVED
+        return self._cells[idx]
+
+    def get_legal_moves(self, player=None):
+        """Return the list of all legal moves for the specified player.
+
+        The moves are shuffled to match the behaviour of `Board`.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            return the legal moves for the active player on the board.
+
+        Returns
+        -------
+        list<(int, int)>
+            The list of coordinate pairs (row, column) of all legal moves
+            for the player constrained by the current game state.
+        """
+        if player is None:
+            player = self._active_player
+        loc = self._loc_index(player)
+        cells = self._cells
+        valid_moves = [cells[idx] for idx in iter_bits(self._move_mask(loc))]
+        if loc != Board.NOT_MOVED:
+            random.shuffle(valid_moves)
+        return valid_moves
+
+    def apply_move(self, move):
+        """Move the active player to a specified location.
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        idx = move[0] + move[1] * self.height
+        if self._active_player == self._player_1:
+            self._hash ^= self._hash_enter[0][idx]
+            if self._p1_loc is not None:
+                self._hash ^= self._hash_leave[0][self._p1_loc]
+            self._p1_loc = idx
+        else:
+            self._hash ^= self._hash_enter[1][idx]
+            if self._p2_loc is not None:
+                self._hash ^= self._hash_leave[1][self._p2_loc]
+            self._p2_loc = idx
+        self._blocked |= 1 << idx
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        self.move_count += 1
+
+    def push_move(self, move):
+        """Apply a move in-place and remember how to revert it with
+        pop_move() (see `Board.push_move`).
+        """
+        if self._active_player == self._player_1:
+            self._undo_stack.append(self._p1_loc)
+        else:
+            self._undo_stack.append(self._p2_loc)
+        self._undo_stack.append(self._hash)
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the most recent move applied with push_move()."""
+        self._hash = self._undo_stack.pop()
+        prev_loc = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        if self._active_player == self._player_1:
+            self._blocked ^= 1 << self._p1_loc
+            self._p1_loc = prev_loc
+        else:
+            self._blocked ^= 1 << self._p2_loc
+            self._p2_loc = prev_loc
+        self.move_count -= 1
+
+    def is_winner(self, player):
+        """ Test whether the specified player has won the game. """
+        return player == self._inactive_player and not self._active_mask()
+
+    def is_loser(self, player):
+        """ Test whether the specified player has lost the game. """
+        return player == self._active_player and not self._active_mask()
+
+    def utility(self, player):
+        """Returns the utility of the current game state from the perspective
+        of the specified player (see `Board.utility`).
+        """
+        if not self._active_mask():
+
+            if player == self._inactive_player:
+                return float("inf")
+
+            if player == self._active_player:
+                return float("-inf")
+
+        return 0.
+
+    def mobility(self, player=None):
+        """Return the number of legal moves for the specified player without
+        building the move list.
+
+        Parameters
+        ----------
+        player : object (optional)
+            An object registered as a player in the current game. If None,
+            count the legal moves for the active player on the board.
+
+        Returns
+        -------
+        int
+            The number of legal moves available to the player.
+        """
+        if player is None:
+            player = self._active_player
+        return popcount(self._move_mask(self._loc_index(player)))
+
+    def transform(self, t):
+        """Return a copy of the board with transform `t` applied (see
+        `Board.transform`).
+        """
+        self._track_symmetries()
+        sym = self._symmetries
+        perm = sym.perms[t]
+        new_board = self.copy()
+        blocked = 0
+        for idx in iter_bits(self._blocked):
+            blocked |= 1 << perm[idx]
+        new_board._blocked = blocked
+        if self._p1_loc != Board.NOT_MOVED:
+            new_board._p1_loc = perm[self._p1_loc]
+        if self._p2_loc != Board.NOT_MOVED:
+            new_board._p2_loc = perm[self._p2_loc]
+        new_board._hash = sym.transform_packed(self._hash, t)
+        return new_board
+
+    def is_partitioned(self):
+        """Return True if the players can never reach a common cell again
+        (see `Board.is_partitioned`).
+        """
+        if self._p1_loc == Board.NOT_MOVED or self._p2_loc == Board.NOT_MOVED:
+            return False
+        open_cells = self._full & ~self._blocked
+        return not (self._reach_mask(self._p1_loc, open_cells) &
+                    self._reach_mask(self._p2_loc, open_cells))
+
+    def blank_count(self):
+        """Return the number of blank cells (see `Board.blank_count`)."""
+        return popcount(self._full & ~self._blocked)
+
+    def liberties(self, cell):
+        """Return the number of blank cells a knight can reach from `cell`
+        (see `Board.liberties`).
+        """
+        return popcount(self._masks[cell[0] + cell[1] * self.height] & ~self._blocked)
+
+    def mobility_summary(self, player):
+        """Return the utility, both move counts, the blank count and both
+        locations in one pass (see `Board.mobility_summary`).
+        """
+        if player == self._player_1:
+            own, opp = self._p1_loc, self._p2_loc
+        elif player == self._player_2:
+            own, opp = self._p2_loc, self._p1_loc
+        else:
+            raise RuntimeError(
+                "Invalid player in mobility_summary: {}".format(player))
+        open_cells = self._full & ~self._blocked
+        blank = popcount(open_cells)
+        cells = self._cells
+        if own == Board.NOT_MOVED:
+            own_moves, own_location = blank, Board.NOT_MOVED
+        else:
+            own_moves, own_location = popcount(self._masks[own] & open_cells), cells[own]
+        if opp == Board.NOT_MOVED:
+            opp_moves, opp_location = blank, Board.NOT_MOVED
+        else:
+            opp_moves, opp_location = popcount(self._masks[opp] & open_cells), cells[opp]
+        utility = 0.
+        if player == self._active_player:
+            if not own_moves:
+                utility = float("-inf")
+        elif not opp_moves:
+            utility = float("inf")
+        return MobilitySummary(utility, own_moves, opp_moves, blank,
+                               own_location, opp_location)
+
+    def reachability(self, player, max_depth=None):
+        """Return the flood-fill statistics of both players, expanding each
+        layer with eight shifts (see `Board.reachability`).
+        """
+        if player == self._player_1:
+            own, opp = self._p1_loc, self._p2_loc
+        elif player == self._player_2:
+            own, opp = self._p2_loc, self._p1_loc
+        else:
+            raise RuntimeError(
+                "Invalid player in reachability: {}".format(player))
+        open_cells = self._full & ~self._blocked
+        shifts = self._shifts
+        frontiers = [open_cells if loc == Board.NOT_MOVED else
+                     self._masks[loc] & open_cells for loc in (own, opp)]
+        reach = [0, 0]
+        closer = [0, 0]
+        layers = ([], [])
+        order = (0, 1) if player == self._active_player else (1, 0)
+        depth = 0
+        while frontiers[0] or frontiers[1]:
+            if max_depth is not None and depth >= max_depth:
+                break
+            for side in order:
+                layer = frontiers[side]
+                if not layer:
+                    continue
+                closer[side] += popcount(layer & ~(reach[0] | reach[1]))
+                reach[side] |= layer
+                layers[side].append(popcount(layer))
+                frontiers[side] = expand(layer, shifts) & open_cells & ~reach[side]
+            depth += 1
+        return Reachability(popcount(reach[0]), popcount(reach[1]),
+                            popcount(reach[0] & reach[1]), closer[0], closer[1],
+                            tuple(layers[0]), tuple(layers[1]))
+
+    def to_string(self, symbols=['1', '2']):
+        """Generate a string representation of the current game state, marking
+        the location of each player and indicating which cells have been
+        blocked, and which remain open.
+        """
+        p1_loc = self._p1_loc
+        p2_loc = self._p2_loc
+
+        col_margin = len(str(self.height - 1)) + 1
+        prefix = "{:<" + "{}".format(col_margin) + "}"
+        offset = " " * (col_margin + 3)
+        out = offset + '   '.join(map(str, range(self.width))) + '\n\r'
+        for i in range(self.height):
+            out += prefix.format(i) + ' | '
+            for j in range(self.width):
+                idx = i + j * self.height
+                if not self._blocked >> idx & 1:
+                    out += ' '
+                elif p1_loc == idx:
+                    out += symbols[0]
+                elif p2_loc == idx:
+                    out += symbols[1]
+                else:
+                    out += '-'
+                out += ' | '
+            out += '\n\r'
+
+        return out
+
+    def _loc_index(self, player):
+        """Return the cell index of the specified player, or NOT_MOVED."""
+        if player == self._player_1:
+            return self._p1_loc
+        elif player == self._player_2:
+            return self._p2_loc
+        raise RuntimeError(
+            "Invalid player in get_player_location: {}".format(player))
+
+    def _move_mask(self, loc):
+        """Return the bitmask of open cells reachable from cell `loc`; every
+        open cell is reachable before a player's first move.
+        """
+        if loc == Board.NOT_MOVED:
+            return self._full & ~self._blocked
+        return self._masks[loc] & ~self._blocked
+
+    def _reach_mask(self, loc, open_cells):
+        """Return the bitmask of the cells in `open_cells` reachable from
+        cell `loc` by knight moves over `open_cells`.
+        """
+        shifts = self._shifts
+        reach = 0
+        frontier = self._masks[loc] & open_cells
+        while frontier:
+            reach |= frontier
+            frontier = expand(frontier, shifts) & open_cells & ~reach
+        return reach
+
+    def _active_mask(self):
+        """Return the bitmask of legal moves for the active player."""
+        if self._active_player == self._player_1:
+            return self._move_mask(self._p1_loc)
+        return self._move_mask(self._p2_loc)
@@ -0,0 +1,36 @@
+"""
+Turn deadlines for `Board.play()`.
+
+A `Deadline` is the `time_left` callable passed to each player's get_move():
+calling it returns the milliseconds left in the turn, exactly like the
+lambda `Board.play()` used to build, but with a single timer call instead of
+two nested closures.
+"""
+import timeit
+
+_timer = timeit.default_timer
+
+
+class Deadline(object):
+    """A `time_left` callable for a turn of `time_limit` milliseconds.
+
+    Parameters
+    ----------
+    time_limit : float
+        The length of the turn in milliseconds.
+
+    start : float (optional)
+        The `timeit.default_timer()` value at which the turn started;
+        defaults to now.
+    """
+
+    __slots__ = ("_end",)
+
+    def __init__(self, time_limit, start=None):
+        if start is None:
+            start = _timer()
+        self._end = start + time_limit / 1000.
+
+    def __call__(self):
+        """Return the number of milliseconds left in the turn."""
+        return 1000. * (self._end - _timer())
@@ -8,11 +8,49 @@ remain compatible with the defaults provided, and none of your changes will
 be available to project reviewers.
 """
 import random
-import timeit
+from collections import namedtuple
 from copy import copy
 
+from .symmetry import symmetries, HASH_MASK
+from .deadline import Deadline
+
 TIME_LIMIT_MILLIS = 150
 
+# The result of Board.mobility_summary(): the utility of the position for the
+# player (+inf won, -inf lost, 0 otherwise), the number of legal moves of the
+# player and of the opponent, the number of blank cells, and the (row,
+# column) location of each (None before the first move)
+MobilitySummary = namedtuple("MobilitySummary", [
+    "utility", "own_moves", "opp_moves", "blank_spaces",
+    "own_location", "opp_location"])
+
+# The result of Board.reachability(): the number of blank cells each player
+# can reach by knight moves, the number reachable by both, the number each
+# player reaches strictly first (ties go to the player to move), and the
+# number of cells first reached at distance 1, 2, ... for each player
+Reachability = namedtuple("Reachability", [
+    "own_reach", "opp_reach", "contested", "own_closer", "opp_closer",
+    "own_layers", "opp_layers"])
+
+_NEIGHBOR_CACHE = {}
+
+
+def knight_neighbors(width, height):
+    """Return a tuple with the cell indices a knight can reach from every
+    cell of a board with the given dimensions (cached per size).
+    """
+    key = (width, height)
+    neighbors = _NEIGHBOR_CACHE.get(key)
+    if neighbors is None:
+        directions = [(-2, -1), (-2, 1), (-1, -2), (-1, 2),
+                      (1, -2), (1, 2), (2, -1), (2, 1)]
+        neighbors = _NEIGHBOR_CACHE[key] = tuple(
+            tuple(r + dr + (c + dc) * height for dr, dc in directions
+                  if 0 <= r + dr < height and 0 <= c + dc < width)
+            for r, c in ((idx % height, idx // height)
+                         for idx in range(width * height)))
+    return neighbors
+
 
 class Board(object):
     """Implement a model for the game Isolation assuming each player moves like
@@ -52,8 +90,96 @@ class Board(object):
         self._board_state[-1] = Board.NOT_MOVED
         self._board_state[-2] = Board.NOT_MOVED
 
+        # Aggregates maintained by apply_move()/pop_move(): the number of
+        # blank cells and, for every cell, the number of blank cells a
+        # knight can reach from it
+        self._neighbors = knight_neighbors(width, height)
+        self._blank_count = width * height
+        self._liberties = [len(n) for n in self._neighbors]
+
+        # Zobrist hash of the current state, updated incrementally by
+        # apply_move() with the keys in _hash_enter and _hash_leave; the
+        # empty board with player 1 to move hashes to 0.  The keys hash the
+        # position itself until a symmetric consumer needs the hashes of
+        # its images too (see _track_symmetries())
+        self._symmetries = symmetries(width, height)
+        self._hash_enter = self._symmetries.plain_enter
+        self._hash_leave = self._symmetries.plain_leave
+        self._hash = 0
+
+        # Undo information for push_move()/pop_move(), stored flat as
+        # (previous location, previous hash) pairs
+        self._undo_stack = []
+
     def hash(self):
-        return str(self._board_state).__hash__()
+        """Return a hash of the current state in O(1).
+
+        The hash covers the blocked cells, the location of each player and
+        the player holding initiative, and is maintained incrementally as
+        moves are applied (see `isolation.zobrist`).
+        """
+        return self._hash & HASH_MASK
+
+    def canonical_hash(self):
+        """Return the hash shared by all symmetric images of the current
+        state, and the transform mapping this position to the image with
+        that hash (see `isolation.symmetry`).
+
+        Returns
+        -------
+        (int, int)
+            The canonical hash and the transform index; map moves into the
+            canonical frame with `symmetries.transform_move(move, t)` and
+            back with `symmetries.inverse_move(move, t)`.
+        """
+        if self._hash_enter is not self._symmetries.enter:
+            self._track_symmetries()
+        return self._symmetries.canonical(self._hash)
+
+    def _track_symmetries(self):
+        """Switch the board to the packed hashes of all its symmetric images
+        (see `isolation.symmetry`), which every later move keeps up to date.
+
+        The moves pushed with push_move() are popped and pushed again, so
+        that the hashes saved for pop_move() are packed too.
+        """
+        sym = self._symmetries
+        if self._hash_enter is sym.enter:
+            return
+        moves = []
+        while self._undo_stack:
+            moves.append(self.get_player_location(self._inactive_player))
+            self.pop_move()
+        blocked, loc_1, loc_2, _ = self.to_state()
+        self._hash = sym.packed_hash(blocked, loc_1, loc_2,
+                                     self._active_player is self._player_2)
+        self._hash_enter, self._hash_leave = sym.enter, sym.leave
+        for move in reversed(moves):
+            self.push_move(move)
+
+    @property
+    def symmetries(self):
+        """The `isolation.symmetry.Symmetries` of the board's size."""
+        return self._symmetries
+
+    def transform(self, t):
+        """Return a copy of the board with transform `t` applied to every
+        cell and player location; `game.transform(game.canonical_hash()[1])`
+        is the canonical form of the position.
+        """
+        self._track_symmetries()
+        sym = self._symmetries
+        perm = sym.perms[t]
+        new_board = self.copy()
+        state, new_state = self._board_state, new_board._board_state
+        for idx, image in enumerate(perm):
+            new_state[image] = state[idx]
+            new_board._liberties[image] = self._liberties[idx]
+        for i in (-1, -2):
+            if state[i] != Board.NOT_MOVED:
+                new_state[i] = perm[state[i]]
+        new_board._hash = sym.transform_packed(self._hash, t)
+        return new_board
 
     @property
     def active_player(self):
@@ -92,13 +218,72 @@ class Board(object):
 
     def copy(self):
         """ Return a deep copy of the current board. """
-        new_board = Board(self._player_1, self._player_2, width=self.width, height=self.height)
-        new_board.move_count = self.move_count
-        new_board._active_player = self._active_player
-        new_board._inactive_player = self._inactive_player
+        new_board = object.__new__(self.__class__)
+        new_board.__dict__.update(self.__dict__)
         new_board._board_state = copy(self._board_state)
+        new_board._liberties = copy(self._liberties)
+        new_board._undo_stack = []
+        return new_board
+
+    def with_players(self, player_1, player_2):
+        """Return a copy of the board with different objects registered as
+        player 1 and player 2, keeping the position and the initiative.
+
+        Parameters
+        ----------
+        player_1, player_2 : object
+            The objects to register in place of the current players.
+
+        Returns
+        -------
+        isolation.Board
+        """
+        new_board = self.copy()
+        new_board._player_1 = player_1
+        new_board._player_2 = player_2
+        if self._active_player == self._player_1:
+            new_board._active_player, new_board._inactive_player = player_1, player_2
+        else:
+            new_board._active_player, new_board._inactive_player = player_2, player_1
         return new_board
 
+    def to_state(self):
+        """Return the position as plain integers, for from_state(): the
+        bitmask of the blocked cells (bit `row + col * height`), the cell
+        index of player 1 and of player 2 (None before their first move)
+        and the Zobrist hash (`hash()`).
+        """
+        state = self._board_state
+        blocked = 0
+        for idx in range(self.width * self.height):
+            if state[idx] != Board.BLANK:
+                blocked |= 1 << idx
+        return blocked, state[-1], state[-2], self.hash()
+
+    @classmethod
+    def from_state(cls, player_1, player_2, state, width=7, height=7):
+        """Return a board of this class in the position returned by
+        to_state() (of any board class), with the given players.
+        """
+        board = cls(player_1, player_2, width, height)
+        board._set_state(*state)
+        board.move_count = bin(state[0]).count("1")
+        if board.move_count % 2:
+            board._active_player, board._inactive_player = player_2, player_1
+        board._hash = state[3]
+        return board
+
+    def _set_state(self, blocked, loc_1, loc_2, _):
+        state = self._board_state
+        for idx in range(self.width * self.height):
+            if blocked >> idx & 1:
+                state[idx] = 1
+                self._blank_count -= 1
+                for n in self._neighbors[idx]:
+                    self._liberties[n] -= 1
+        state[-1], state[-2] = loc_1, loc_2
+        state[-3] = bin(blocked).count("1") % 2
+
     def forecast_move(self, move):
         """Return a deep copy of the current game with an input move applied to
         advance the game one ply.
@@ -201,12 +386,56 @@ class Board(object):
         """
         idx = move[0] + move[1] * self.height
         last_move_idx = int(self.active_player == self._player_2) + 1
+        old_idx = self._board_state[-last_move_idx]
+        self._hash ^= self._hash_enter[last_move_idx - 1][idx]
+        if old_idx is not None:
+            self._hash ^= self._hash_leave[last_move_idx - 1][old_idx]
         self._board_state[-last_move_idx] = idx
         self._board_state[idx] = 1
         self._board_state[-3] ^= 1
+        self._blank_count -= 1
+        liberties = self._liberties
+        for n in self._neighbors[idx]:
+            liberties[n] -= 1
         self._active_player, self._inactive_player = self._inactive_player, self._active_player
         self.move_count += 1
 
+    def push_move(self, move):
+        """Apply a move in-place, like apply_move(), and remember how to
+        revert it with pop_move().
+
+        Search code can walk the game tree on a single board by pairing each
+        push_move() with a pop_move() instead of calling forecast_move().
+
+        Parameters
+        ----------
+        move : (int, int)
+            A coordinate pair (row, column) indicating the next position for
+            the active player on the board.
+        """
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        self._undo_stack.append(self._board_state[-last_move_idx])
+        self._undo_stack.append(self._hash)
+        self.apply_move(move)
+
+    def pop_move(self):
+        """Revert the most recent move applied with push_move(), restoring
+        the blocked cells, player locations, initiative and move count.
+        """
+        self._hash = self._undo_stack.pop()
+        prev_loc = self._undo_stack.pop()
+        self._active_player, self._inactive_player = self._inactive_player, self._active_player
+        last_move_idx = int(self._active_player == self._player_2) + 1
+        idx = self._board_state[-last_move_idx]
+        self._board_state[idx] = Board.BLANK
+        self._board_state[-last_move_idx] = prev_loc
+        self._blank_count += 1
+        liberties = self._liberties
+        for n in self._neighbors[idx]:
+            liberties[n] += 1
+        self._board_state[-3] ^= 1
+        self.move_count -= 1
+
     def is_winner(self, player):
         """ Test whether the specified player has won the game. """
         return player == self._inactive_player and not self.get_legal_moves(self._active_player)
@@ -215,6 +444,159 @@ class Board(object):
         """ Test whether the specified player has lost the game. """
         return player == self._active_player and not self.get_legal_moves(self._active_player)
 
+    def blank_count(self):
+        """Return the number of blank cells in O(1)."""
+        return self._blank_count
+
+    def is_partitioned(self):
+        """Return True if the players can never reach a common cell again,
+        i.e. the blank cells reachable from each player's location by
+        sequences of knight moves do not overlap.  False until both players
+        have been placed.
+        """
+        p1, p2 = self._board_state[-1], self._board_state[-2]
+        if p1 == Board.NOT_MOVED or p2 == Board.NOT_MOVED:
+            return False
+        return set(self._reach_order(p1)).isdisjoint(self._reach_order(p2))
+
+    def _reach_order(self, idx):
+        """Yield the blank cells reachable from cell `idx` in breadth-first
+        order.
+        """
+        state, neighbors = self._board_state, self._neighbors
+        seen = {idx}
+        frontier = [idx]
+        while frontier:
+            next_frontier = []
+            for i in frontier:
+                for n in neighbors[i]:
+                    if n not in seen and state[n] == Board.BLANK:
+                        seen.add(n)
+                        next_frontier.append(n)
+                        yield n
+            frontier = next_frontier
+
+    def liberties(self, cell):
+        """Return the number of blank cells a knight can reach from `cell`
+        (a (row, column) pair) in O(1).  For the cell a player occupies this
+        is the player's number of legal moves.
+        """
+        return self._liberties[cell[0] + cell[1] * self.height]
+
+    def mobility_summary(self, player):
+        """Return everything the mobility heuristics need in one call: the
+        utility for the specified player, the legal move counts of both
+        players, the number of blank cells, and both player locations.  The
+        counts are read from the aggregates maintained by apply_move(), so
+        no move lists are built or shuffled.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        Returns
+        -------
+        MobilitySummary
+            (utility, own_moves, opp_moves, blank_spaces, own_location,
+            opp_location); see `utility()` and `get_player_location()`.
+        """
+        state = self._board_state
+        if player == self._player_1:
+            own, opp = state[-1], state[-2]
+        elif player == self._player_2:
+            own, opp = state[-2], state[-1]
+        else:
+            raise RuntimeError(
+                "Invalid player in mobility_summary: {}".format(player))
+        blank = self._blank_count
+        if own == Board.NOT_MOVED:
+            own_moves, own_location = blank, Board.NOT_MOVED
+        else:
+            own_moves = self._liberties[own]
+            own_location = (own % self.height, own // self.height)
+        if opp == Board.NOT_MOVED:
+            opp_moves, opp_location = blank, Board.NOT_MOVED
+        else:
+            opp_moves = self._liberties[opp]
+            opp_location = (opp % self.height, opp // self.height)
+        utility = 0.
+        if player == self._active_player:
+            if not own_moves:
+                utility = float("-inf")
+        elif not opp_moves:
+            utility = float("inf")
+        return MobilitySummary(utility, own_moves, opp_moves, blank,
+                               own_location, opp_location)
+
+    def reachability(self, player, max_depth=None):
+        """Return the flood-fill statistics of both players for heuristics
+        that look beyond the next move.
+
+        Both breadth-first searches run in lockstep over the blank cells,
+        one layer per distance, marking each cell with a bit per player, so
+        region sizes, contested cells and the cells each player reaches
+        first all come out of a single pass.  The player to move expands
+        each layer first and therefore wins ties.  A player that has not
+        moved yet reaches every blank cell at distance 1.
+
+        Parameters
+        ----------
+        player : object
+            An object registered as a player in the current game.
+
+        max_depth : int (optional)
+            Stop after this many layers; the cheap mode for leaf nodes.
+            With None the searches run until both regions are exhausted.
+
+        Returns
+        -------
+        Reachability
+            (own_reach, opp_reach, contested, own_closer, opp_closer,
+            own_layers, opp_layers), counted over the cells within
+            `max_depth` moves.
+        """
+        state = self._board_state
+        if player == self._player_1:
+            own, opp = state[-1], state[-2]
+        elif player == self._player_2:
+            own, opp = state[-2], state[-1]
+        else:
+            raise RuntimeError(
+                "Invalid player in reachability: {}".format(player))
+        neighbors = self._neighbors
+        reached = bytearray(self.width * self.height)
+        counts = [0, 0, 0]  # cells reached first by own, by opp; contested
+        layers = ([], [])
+        frontiers = [None, None]
+        everywhere = range(self.width * self.height)
+        for side, loc in enumerate((own, opp)):
+            frontiers[side] = (everywhere if loc == Board.NOT_MOVED else
+                               neighbors[loc])
+        order = (0, 1) if player == self._active_player else (1, 0)
+        depth = 0
+        while frontiers[0] or frontiers[1]:
+            if max_depth is not None and depth >= max_depth:
+                break
+            for side in order:
+                bit = 1 << side
+                layer = []
+                for n in frontiers[side]:
+                    if state[n] == Board.BLANK and not reached[n] & bit:
+                        if reached[n]:
+                            counts[2] += 1
+                        else:
+                            counts[side] += 1
+                        reached[n] |= bit
+                        layer.append(n)
+                if layer:
+                    layers[side].append(len(layer))
+                frontiers[side] = [m for n in layer for m in neighbors[n]]
+            depth += 1
+        return Reachability(sum(layers[0]), sum(layers[1]), counts[2],
+                            counts[0], counts[1],
+                            tuple(layers[0]), tuple(layers[1]))
+
     def utility(self, player):
         """Returns the utility of the current game state from the perspective
         of the specified player.
@@ -295,7 +677,7 @@ class Board(object):
 
         return out
 
-    def play(self, time_limit=TIME_LIMIT_MILLIS):
+    def play(self, time_limit=TIME_LIMIT_MILLIS, on_move=None):
         """Execute a match between the players by alternately soliciting them
         to select a move and applying it in the game.
 
@@ -305,6 +687,10 @@ class Board(object):
             The maximum number of milliseconds to allow before timeout
             during each turn.
 
+        on_move : callable (optional)
+            Called as `on_move(board, move)` with every legal move, before
+            it is applied; `board.active_player` is the player who chose it.
+
         Returns
         ----------
         (player, list<[(int, int),]>, str)
@@ -314,15 +700,12 @@ class Board(object):
         """
         move_history = []
 
-        time_millis = lambda: 1000 * timeit.default_timer()
-
         while True:
 
             legal_player_moves = self.get_legal_moves()
             game_copy = self.copy()
 
-            move_start = time_millis()
-            time_left = lambda : time_limit - (time_millis() - move_start)
+            time_left = Deadline(time_limit)
             curr_move = self._active_player.get_move(game_copy, time_left)
             move_end = time_left()
 
@@ -338,5 +721,7 @@ class Board(object):
                 return self._inactive_player, move_history, "illegal move"
 
             move_history.append(list(curr_move))
+            if on_move is not None:
+                on_move(self, curr_move)
 
             self.apply_move(curr_move)
@@ -0,0 +1,350 @@
+"""
+Compact binary game records.
+
+`Board.play()` returns the moves of a game as a list of [row, column] lists,
+the format the isoviz page reads as JSON.  Archived by the million, that
+format is large and slow to parse.  A game record file stores each move as
+one byte, the index `row + col * height` of the cell moved to, after a small
+fixed-width header per game:
+
+    header   magic (8 bytes)
+    games    for every game: width, height, player 1 and player 2 (indices
+             into the name table), winner (1 or 2), outcome (OUTCOMES),
+             number of moves (1 byte each), seed (4 bytes), then the moves
+             from the empty board, one byte each
+    index    the file offset of every game (8 bytes each)
+    names    the player names, UTF-8, separated by newlines
+    trailer  game count (8 bytes), size of the names (4 bytes), end magic
+             (8 bytes)
+
+`GameWriter` appends each game as soon as it is written and keeps only its
+offset in memory; the index and the name table are written by close().
+`GameReader` maps a file into memory: iterating walks the games in order,
+and game `k` is found in O(1) through the index.  A file whose writer was
+interrupted has no index; the reader rebuilds the offsets by walking the
+games, and names the players by their indices.  The header, the trailer and
+every game are checked against the size of the file, and a game cut short
+raises ValueError: a truncated file is an error, unless the reader is told
+to recover the complete games before the cut (`recover=True`).
+
+`to_json()` and `from_json()` convert to and from the JSON history of
+`Board.play()`.
+"""
+import json
+import mmap
+import struct
+import sys
+from array import array
+from collections import namedtuple
+
+from .isolation import TIME_LIMIT_MILLIS
+
+MAGIC = b"ISOGAME1"
+VERSION = 1
+END_MAGIC = b"ISOGEND1"
+GAME = struct.Struct("<BBBBBBBI")
+TRAILER = struct.Struct("<QI8s")
+_OFFSET = struct.Struct("<Q")
+
+# The ways a game ends: the loser had no legal move, ran out of time, or
+# returned an illegal move while it had legal ones
+OUTCOMES = ("win", "timeout", "forfeit")
+
+# The terminations reported by Board.play(), as outcomes
+TERMINATIONS = {"illegal move": "win", "timeout": "timeout",
+                "forfeit": "forfeit"}
+
+# One game: the board size, the names of player 1 and player 2, the winner
+# (1 or 2), the outcome (one of OUTCOMES), the seed of the game and its
+# (row, column) moves from the empty board
+GameRecord = namedtuple("GameRecord", [
+    "width", "height", "players", "winner", "outcome", "seed", "moves"])
+
+_CELL_CACHE = {}
+
+
+def _cells(height):
+    """Return the (row, column) of every cell index for boards of the given
+    height (cached per height).
+    """
+    cells = _CELL_CACHE.get(height)
+    if cells is None:
+        cells = _CELL_CACHE[height] = [(idx % height, idx // height)
+                                       for idx in range(256)]
+    return cells
+
+
+def to_history(game):
+    """Return the moves of a GameRecord as `Board.play()` lists them."""
+    return [list(move) for move in game.moves]
+
+
+def to_json(game):
+    """Return the moves of a GameRecord as the JSON history isoviz reads."""
+    return json.dumps(to_history(game))
+
+
+def from_history(history, players=("Player1", "Player2"), winner=None,
+                 outcome="win", seed=0, width=7, height=7):
+    """Return a GameRecord for a `Board.play()` history of a whole game
+    (from the empty board).  By default the player who made the last move
+    won.
+    """
+    moves = [tuple(move) for move in history]
+    if winner is None:
+        winner = 2 - len(moves) % 2
+    return GameRecord(width, height, tuple(players), winner, outcome, seed,
+                      moves)
+
+
+def from_json(text, **kwargs):
+    """Return a GameRecord for a JSON history; see from_history()."""
+    return from_history(json.loads(text), **kwargs)
+
+
+class GameWriter(object):
+    """Write games to a game record file.
+
+    Parameters
+    ----------
+    path : str
+        The file; an existing file is replaced.
+
+    Attributes
+    ----------
+    games : int
+        The number of games written.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.games = 0
+        self._file = open(path, "wb")
+        self._file.write(MAGIC)
+        self._offsets = array("Q")
+        self._names = {}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, game):
+        """Append a GameRecord."""
+        if game.width * game.height > 255:
+            raise ValueError("the moves of a {}x{} board do not fit in a "
+                             "byte".format(game.width, game.height))
+        ids = []
+        for name in game.players:
+            if name not in self._names:
+                if len(self._names) == 256:
+                    raise ValueError("a file holds at most 256 player names")
+                self._names[name] = len(self._names)
+            ids.append(self._names[name])
+        height = game.height
+        self._offsets.append(self._file.tell())
+        self._file.write(GAME.pack(game.width, height, ids[0], ids[1],
+                                   game.winner, OUTCOMES.index(game.outcome),
+                                   len(game.moves), game.seed) +
+                         bytes(r + c * height for r, c in game.moves))
+        self.games += 1
+
+    def play(self, board, opening=(), time_limit=TIME_LIMIT_MILLIS,
+             players=None, seed=0):
+        """Apply the `opening` moves to an empty board, play the game with
+        `Board.play()` and append it.
+
+        Parameters
+        ----------
+        players : (str, str) (optional)
+            The names of player 1 and player 2; by default a player that is
+            a string is its own name, and other players are named after
+            their class.
+
+        seed : int (optional)
+            The seed stored with the game (the caller seeds the random
+            number generators).
+
+        Returns
+        -------
+        (player, list<[(int, int),]>, str)
+            The result of `Board.play()`.
+        """
+        if board.move_count:
+            raise ValueError("the game must start from the empty board")
+        player_1, player_2 = board.active_player, board.inactive_player
+        if players is None:
+            players = tuple(p if isinstance(p, str) else type(p).__name__
+                            for p in (player_1, player_2))
+        for move in opening:
+            board.apply_move(move)
+        winner, history, termination = board.play(time_limit)
+        self.write(GameRecord(board.width, board.height, players,
+                              1 if winner is player_1 else 2,
+                              TERMINATIONS[termination], seed,
+                              list(opening) + [tuple(m) for m in history]))
+        return winner, history, termination
+
+    def close(self):
+        """Write the index and the name table, and close the file."""
+        if self._file is None:
+            return
+        f = self._file
+        if sys.byteorder != "little":
+            self._offsets.byteswap()
+        f.write(self._offsets.tobytes())
+        names = "\n".join(self._names).encode("utf-8")
+        f.write(names)
+        f.write(TRAILER.pack(self.games, len(names), END_MAGIC))
+        f.close()
+        self._file = None
+
+
+class GameReader(object):
+    """A game record file mapped into memory.
+
+    Parameters
+    ----------
+    path : str
+        A file written by `GameWriter`.
+
+    recover : bool (optional)
+        Read a truncated file without an index (such as the file of a
+        writer killed in the middle of a game) up to its last complete game
+        instead of raising ValueError.
+
+    Attributes
+    ----------
+    names : list<str>
+        The player names, by index.
+
+    complete : bool
+        False if the file has no index (its writer was interrupted); the
+        games are then found by walking the file, and named by index.
+    """
+
+    def __init__(self, path, recover=False):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._open(recover)
+        except Exception:
+            self._map.close()
+            raise
+
+    def _open(self, recover):
+        data = self._map
+        self._check_header()
+        end = len(data)
+        self.complete = (end >= len(MAGIC) + TRAILER.size and
+                         data[end - len(END_MAGIC):] == END_MAGIC)
+        if self.complete:
+            self._count, size, _ = TRAILER.unpack_from(data,
+                                                       end - TRAILER.size)
+            names_start = end - TRAILER.size - size
+            self._index = names_start - self._count * _OFFSET.size
+            # The smallest game is its GAME header
+            if self._index < len(MAGIC) + self._count * GAME.size:
+                raise ValueError("{}: the trailer lists {} games and {} bytes "
+                                 "of names, more than the file holds".format(
+                                     self.path, self._count, size))
+            self.names = (data[names_start:names_start + size]
+                          .decode("utf-8").split("\n") if size else [])
+            self._end = self._index
+        else:
+            self._offsets, self._end = self._walk(end, recover)
+            self._count = len(self._offsets)
+            self.names = [str(i) for i in range(256)]
+
+    def __len__(self):
+        return self._count
+
+    def __getitem__(self, k):
+        """Return game `k` as a GameRecord, in O(1)."""
+        if not 0 <= k < self._count:
+            raise IndexError("game index out of range")
+        if self.complete:
+            offset = _OFFSET.unpack_from(self._map,
+                                         self._index + k * _OFFSET.size)[0]
+        else:
+            offset = self._offsets[k]
+        return self._decode(offset)[0]
+
+    def __iter__(self):
+        """Yield every game as a GameRecord, in the order written."""
+        offset, end = len(MAGIC), self._end
+        while offset < end:
+            game, offset = self._decode(offset)
+            yield game
+
+    def close(self):
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _check_header(self):
+        """Raise ValueError unless the file starts with the magic of this
+        version of the format."""
+        magic = self._map[:len(MAGIC)]
+        if magic[:-1] != MAGIC[:-1]:
+            raise ValueError("{} is not a game record file".format(self.path))
+        if magic != MAGIC:
+            raise ValueError("{} is a game record file of version {!r}, not "
+                             "{}".format(self.path, magic[-1:].decode("latin-1"),
+                                         VERSION))
+
+    def _decode(self, offset):
+        """Return the game at `offset` and the offset of the next one."""
+        data = self._map
+        if offset < len(MAGIC) or offset + GAME.size > self._end:
+            raise ValueError("{}: no game at offset {}".format(self.path,
+                                                              offset))
+        width, height, player_1, player_2, winner, outcome, count, seed = \
+            GAME.unpack_from(data, offset)
+        start = offset + GAME.size
+        if start + count > self._end:
+            raise ValueError("{}: the game at offset {} is cut short".format(
+                self.path, offset))
+        cells = _cells(height)
+        names = self.names
+        return GameRecord(width, height, (names[player_1], names[player_2]),
+                          winner, OUTCOMES[outcome], seed,
+                          [cells[c] for c in data[start:start + count]]), \
+            start + count
+
+    def _walk(self, end, recover=False):
+        """Return the offsets of the complete games of a file without an
+        index, and the end of the last one.  A game cut short raises
+        ValueError, unless `recover` is set.
+        """
+        self._check_header()
+        data = self._map
+        offsets = array("Q")
+        offset = len(MAGIC)
+        while offset < end:
+            if offset + GAME.size > end:
+                following = end + 1
+            else:
+                width, height, _, _, winner, outcome, count, _ = \
+                    GAME.unpack_from(data, offset)
+                # Stop at the partially written index of an interrupted
+                # close()
+                if (winner not in (1, 2) or outcome >= len(OUTCOMES) or
+                        count > width * height):
+                    break
+                following = offset + GAME.size + count
+            if following > end:
+                if recover:
+                    break
+                raise ValueError("{} is truncated: the game at offset {} is "
+                                 "cut short ({} games before it)".format(
+                                     self.path, offset, len(offsets)))
+            offsets.append(offset)
+            offset = following
+        return offsets, offset
@@ -0,0 +1,174 @@
+"""
+Board symmetries and symmetry-canonical position hashes.
+
+Reflecting or rotating an Isolation position gives a position with exactly
+the same game value, and the knight-move image of the best move is its best
+move.  A square board has 8 such symmetries (the rotations and reflections
+of the square); a rectangular board only has the 4 that keep its shape (the
+identity, the two mirror images and the half turn).
+
+The Zobrist hashes of all the symmetric images of a position are packed into
+a single integer, 64 bits per symmetry, and updated together with one XOR
+per move.  The lowest 64 bits are the hash of the position itself
+(`Board.hash()`), and the smallest of the packed hashes identifies the
+symmetry class (`Board.canonical_hash()`), so caches keyed by it share their
+entries between symmetric positions.  A board only hashes its own frame
+(with the 64-bit `plain_enter`/`plain_leave` keys) until the first call to
+`canonical_hash()` or `transform()`; from then on it, and its copies, keep
+the packed hashes up to date.  Moves are mapped into and out of the
+canonical frame with `Symmetries.transform_move()` and
+`Symmetries.inverse_move()`.
+"""
+from .zobrist import zobrist_keys
+
+HASH_BITS = 64
+HASH_MASK = (1 << HASH_BITS) - 1
+
+_SYMMETRY_CACHE = {}
+
+
+class Symmetries(object):
+    """The symmetries of a board of a given size and the packed Zobrist keys
+    that hash all symmetric images of a position at once.
+
+    Transform 0 is always the identity.
+
+    Attributes
+    ----------
+    count : int
+        The number of symmetries (8 on square boards, 4 otherwise).
+
+    perms : tuple<tuple<int>>
+        `perms[t][idx]` is the cell index that cell `idx` is mapped to by
+        transform `t`.
+
+    inverse : tuple<int>
+        `inverse[t]` is the transform that undoes transform `t`.
+
+    compose : tuple<tuple<int>>
+        `compose[s][t]` is the transform equal to applying `t`, then `s`.
+
+    enter : (tuple<int>, tuple<int>)
+        The packed value XOR-ed into the hash when player 1 (index 0) or
+        player 2 (index 1) moves to a cell: its blocked and location keys
+        and the side-to-move key, in every symmetric frame.
+
+    leave : (tuple<int>, tuple<int>)
+        The packed value XOR-ed into the hash when a player leaves a cell.
+
+    plain_enter, plain_leave : (tuple<int>, tuple<int>)
+        The same keys in the identity frame only (the lowest 64 bits), for
+        boards that do not track their symmetric images.
+    """
+
+    def __init__(self, width, height):
+        self.width, self.height = width, height
+        last_row, last_col = height - 1, width - 1
+        maps = [lambda r, c: (r, c),
+                lambda r, c: (last_row - r, c),
+                lambda r, c: (r, last_col - c),
+                lambda r, c: (last_row - r, last_col - c)]
+        if width == height:
+            maps += [lambda r, c: (c, r),
+                     lambda r, c: (c, last_row - r),
+                     lambda r, c: (last_col - c, r),
+                     lambda r, c: (last_col - c, last_row - r)]
+        cells = width * height
+        perms = []
+        for f in maps:
+            perm = []
+            for idx in range(cells):
+                r, c = f(idx % height, idx // height)
+                perm.append(r + c * height)
+            perms.append(tuple(perm))
+        self.perms = tuple(perms)
+        self.count = len(perms)
+        index = {perm: t for t, perm in enumerate(perms)}
+        self.compose = tuple(
+            tuple(index[tuple(s[i] for i in t)] for t in perms) for s in perms)
+        self.inverse = tuple(row.index(0) for row in self.compose)
+
+        keys = zobrist_keys(width, height)
+        self.enter = tuple(
+            tuple(self.pack(keys.blocked[i] ^ location[i] ^ keys.side
+                            for i in cells_of)
+                  for cells_of in self._images())
+            for location in keys.location)
+        self.leave = tuple(
+            tuple(self.pack(location[i] for i in cells_of)
+                  for cells_of in self._images())
+            for location in keys.location)
+        self.plain_enter = tuple(tuple(value & HASH_MASK for value in keys_of)
+                                 for keys_of in self.enter)
+        self.plain_leave = tuple(tuple(value & HASH_MASK for value in keys_of)
+                                 for keys_of in self.leave)
+        self._blocked = tuple(self.pack(keys.blocked[i] for i in cells_of)
+                              for cells_of in self._images())
+        self._side = self.pack([keys.side] * self.count)
+
+    def _images(self):
+        """Yield, for every cell, the list of its images under each
+        transform."""
+        for idx in range(self.width * self.height):
+            yield [perm[idx] for perm in self.perms]
+
+    def pack(self, values):
+        """Pack one 64-bit value per transform into a single integer."""
+        packed = 0
+        for t, value in enumerate(values):
+            packed |= value << (HASH_BITS * t)
+        return packed
+
+    def packed_hash(self, blocked, loc_1, loc_2, player_2_to_move):
+        """Return the packed hashes of a position: the bitmask of its
+        blocked cells, the cell index of each player (None before their
+        first move) and the player to move."""
+        packed = self._side if player_2_to_move else 0
+        idx = 0
+        while blocked:
+            if blocked & 1:
+                packed ^= self._blocked[idx]
+            blocked >>= 1
+            idx += 1
+        for location, leave in ((loc_1, self.leave[0]), (loc_2, self.leave[1])):
+            if location is not None:
+                packed ^= leave[location]
+        return packed
+
+    def canonical(self, packed):
+        """Return the smallest hash in `packed` and its transform."""
+        best, best_t = packed & HASH_MASK, 0
+        for t in range(1, self.count):
+            value = (packed >> (HASH_BITS * t)) & HASH_MASK
+            if value < best:
+                best, best_t = value, t
+        return best, best_t
+
+    def transform_packed(self, packed, t):
+        """Return the packed hashes of the image of a position under
+        transform `t`, given the packed hashes of the position."""
+        images = self.compose
+        return self.pack((packed >> (HASH_BITS * images[s][t])) & HASH_MASK
+                         for s in range(self.count))
+
+    def transform_move(self, move, t):
+        """Return the image of a (row, column) move under transform `t`."""
+        if move is None or move == ():
+            return move
+        idx = self.perms[t][move[0] + move[1] * self.height]
+        return (idx % self.height, idx // self.height)
+
+    def inverse_move(self, move, t):
+        """Map a move of the image under transform `t` back to the original
+        position."""
+        return self.transform_move(move, self.inverse[t])
+
+
+def symmetries(width, height):
+    """Return the shared `Symmetries` for a board with the given dimensions.
+    """
+    key = (width, height)
+    sym = _SYMMETRY_CACHE.get(key)
+    if sym is None:
+        sym = _SYMMETRY_CACHE[key] = Symmetries(width, height)
+    return sym
@@ -0,0 +1,540 @@
+"""
+Lockstep playouts of many games at once, and batched heuristic evaluation,
+with NumPy.
+
+`VectorGames` holds N boards as one boolean array with a row per game and a
+column per cell (index `row + col * height`, as in `Board`), plus one
+extra column that is never blank.  Every step advances all the unfinished
+games by one ply with a handful of vectorized operations: the candidate
+moves of every game are gathered from the knight-move lookup table (padded
+with the extra column, so a missing move reads as blocked), a policy picks
+one of the legal candidates in every row, and the games whose player to move
+has no legal move are retired.  All the games started from the same position
+have made the same number of moves, so the player to move and the placement
+phase are the same in every row.
+
+The 8 legal-move flags of a game are 8 consecutive bytes, read as one
+64-bit word: a game is over when its word is 0, and a multiplication packs
+the word into an 8-bit pattern that indexes lookup tables.  Finished games
+are parked on the never-blank column (they keep "moving" there without
+effect) and their rows are dropped once they make up a quarter of the
+arrays, so the steps work on contiguous memory that shrinks with the number
+of unfinished games.  Like `Board`, the engine can keep the number of blank
+neighbors of every cell (its liberties) up to date, so the mobility after a
+move is a lookup.  The per-step cost barely depends on the number of games,
+so thousands of games take about as long as a handful through
+`Board.play()`; run `python -m benchmarks.bench_vectorized` to compare.
+
+A policy is a callable `policy(games, moves, legal, rng)`: `moves` holds
+the candidate cells of every row of `games.blank`, `legal` marks the legal
+ones, and the policy returns the column of the chosen candidate in every
+row (any column for rows without a legal move).  `random_policy` picks
+uniformly among the legal moves (like `sample_players.RandomPlayer`) and
+`greedy_policy` plays the move of `sample_players.GreedyPlayer` with
+`open_move_score`, ties included.  Policies that read `games.liberties` set
+the attribute `needs_liberties`.
+
+`MobilityBatch` holds the `Board.mobility_summary()` fields of many positions
+as arrays, for the batch versions of the heuristics (`score_fn.batch`).
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .isolation import knight_neighbors
+
+# The result of VectorGames.play(): the index of the winner of every game (0
+# for player 1, 1 for player 2), the number of plies every game lasted from
+# the start position, and the cells moved to (-1 after the end of the game)
+# if the histories were recorded
+Playouts = namedtuple("Playouts", ["winners", "lengths", "histories"])
+
+_TABLE_CACHE = {}
+
+# Packs the 8 flag bytes of a 64-bit word into bits 56-63 (bit i is byte i)
+_PACK = np.uint64(0x0102040810204080)
+_SHIFT = np.uint64(56)
+
+# For every pattern of 8 legal-move bits: the number of bits set, and the
+# position of the k-th set bit
+_PATTERN_COUNT = np.array([bin(p).count("1") for p in range(256)], np.int8)
+_PATTERN_BIT = np.zeros((256, 8), np.intp)
+for _p in range(256):
+    _bits = [i for i in range(8) if _p >> i & 1]
+    _PATTERN_BIT[_p, :len(_bits)] = _bits
+
+
+def board_arrays(games):
+    """Return boards of the same size as arrays: the blank cells (one row
+    per board, with the never-blank column), the cell indices of player 1
+    and player 2 (-1 before their first move) and the move counts, as
+    `MobilityBatch.from_arrays` takes them.
+    """
+    height = games[0].height if games else 0
+    cells = games[0].width * height if games else 0
+    blank = np.zeros((len(games), cells + 1), dtype=bool)
+    locations = np.full((len(games), 2), -1, dtype=np.intp)
+    for row, game in enumerate(games):
+        for r, c in game.get_blank_spaces():
+            blank[row, r + c * height] = True
+        # Player 1 moves when the move count is even
+        players = (game.active_player, game.inactive_player)
+        if game.move_count % 2:
+            players = players[::-1]
+        for i, player in enumerate(players):
+            location = game.get_player_location(player)
+            if location is not None:
+                locations[row, i] = location[0] + location[1] * height
+    move_count = np.array([game.move_count for game in games], dtype=np.intp)
+    return blank, locations, move_count
+
+
+def knight_tables(width, height):
+    """Return the knight moves of every cell as a (cells + 1) x 8 array,
+    padded with the index `cells` of the never-blank column, and the
+    (cells + 1) x (cells + 1) adjacency matrix of the knight moves (cached
+    per size).  The last row of both is the never-blank column: no moves.
+    """
+    key = (width, height)
+    tables = _TABLE_CACHE.get(key)
+    if tables is None:
+        cells = width * height
+        table = np.full((cells + 1, 8), cells, dtype=np.intp)
+        adjacent = np.zeros((cells + 1, cells + 1), dtype=bool)
+        for idx, neighbors in enumerate(knight_neighbors(width, height)):
+            table[idx, :len(neighbors)] = neighbors
+            adjacent[idx, list(neighbors)] = True
+        table.flags.writeable = adjacent.flags.writeable = False
+        tables = _TABLE_CACHE[key] = (table, adjacent)
+    return tables
+
+
+def random_policy(games, moves, legal, rng):
+    """Choose uniformly among the legal moves of every game."""
+    if moves.shape[1] == 8:
+        pattern = (legal.view("<u8")[:, 0] * _PACK) >> _SHIFT
+        k = (rng.random(len(pattern)) * _PATTERN_COUNT[pattern]).astype(
+            np.intp)
+        return _PATTERN_BIT[pattern, k]
+    keys = rng.random(moves.shape)
+    keys[~legal] = -1.
+    return keys.argmax(axis=1)
+
+
+def greedy_policy(games, moves, legal, rng):
+    """Choose the move with the best `open_move_score` for the mover after
+    it is played: +inf if the opponent is left without a legal move, the
+    mover's number of legal moves otherwise.  Ties go to the largest (row,
+    column), as with `max()` in `GreedyPlayer.get_move()`.
+    """
+    liberties = games.liberties
+    rows = np.arange(len(moves))[:, None]
+    own = liberties[rows, moves]
+    if games.move_count > 0:
+        # The candidate is blank, so it takes one of the opponent's moves
+        # away if it is one of them
+        opp_location = games.locations[:, 1 - games.player][:, None]
+        opp = (liberties[rows, opp_location] -
+               games.adjacent[moves, opp_location])
+    else:
+        # The opponent still places anywhere
+        opp = np.ones_like(own)
+    score = np.where(opp > 0, own, 9).astype(np.intp)
+    # `rank` orders the cells by (row, column) for the tie-break
+    score = score * (games.cells + 1) + games.rank[moves]
+    score[~legal] = -1
+    return score.argmax(axis=1)
+
+
+greedy_policy.needs_liberties = True
+
+
+class VectorGames(object):
+    """N games of Isolation played in lockstep.
+
+    Parameters
+    ----------
+    count : int
+        The number of games.
+
+    width, height : int (optional)
+        The board size (ignored if `game` is given).
+
+    game : isolation.Board (optional)
+        The position every game starts from; None starts from the empty
+        board.
+
+    Attributes
+    ----------
+    ids : numpy.ndarray
+        The index of the game in every row of the arrays below (the
+        unfinished games and some of the finished ones).
+
+    blank : numpy.ndarray
+        Booleans, one row per game in `ids` and one column per cell (plus
+        the never-blank column), True where the cell is blank.
+
+    liberties : numpy.ndarray
+        The number of blank knight neighbors of every cell, in the same
+        layout (only kept up to date for policies that need them).
+
+    locations : numpy.ndarray
+        The cell indices of player 1 and player 2 in every row (-1 before
+        their first move, the never-blank column once the game is over).
+
+    finished : numpy.ndarray
+        True for the rows of finished games not dropped yet.
+
+    remaining : int
+        The number of unfinished games.
+
+    move_count : int
+        The number of moves made in every unfinished game.
+
+    player : int
+        The index of the player to move in every unfinished game.
+
+    winners, lengths : numpy.ndarray
+        The winner (0 or 1, -1 while the game runs) and the number of plies
+        played since the start position of every game.
+    """
+
+    def __init__(self, count, width=7, height=7, game=None):
+        if game is not None:
+            width, height = game.width, game.height
+        self.width, self.height = width, height
+        self.cells = cells = width * height
+        self.table, self.adjacent = knight_tables(width, height)
+        index = np.arange(cells)
+        self.rank = np.append((index % height) * width + index // height,
+                              cells)
+        if game is None:
+            blank = np.ones(cells + 1, dtype=bool)
+            blank[cells] = False
+            locations = np.full(2, -1, dtype=np.intp)
+            self.move_count = 0
+        else:
+            blank, locations, move_count = board_arrays([game])
+            blank, locations = blank[0], locations[0]
+            self.move_count = int(move_count[0])
+        liberties = blank[self.table].sum(axis=1, dtype=np.int8)
+        self.blank = np.tile(blank, (count, 1))
+        self.liberties = np.tile(liberties, (count, 1))
+        self.locations = np.tile(locations, (count, 1))
+        self.ids = np.arange(count)
+        self.finished = np.zeros(count, dtype=bool)
+        self.remaining = count
+        self.track_liberties = True
+        self.start = self.move_count
+        self.player = self.move_count % 2
+        self.winners = np.full(count, -1, dtype=np.int8)
+        self.lengths = np.zeros(count, dtype=np.intp)
+        self.histories = None
+
+    def step(self, policies, rng):
+        """Play one ply in every unfinished game with the policy of the
+        player to move, and retire the games that player cannot move in.
+
+        Returns
+        -------
+        (numpy.ndarray, numpy.ndarray)
+            The game of every row and the cell it moved to (the never-blank
+            column for finished games).
+        """
+        player, sentinel = self.player, self.cells
+        if self.move_count < 2:
+            # The placement: every blank cell is legal
+            moves = np.broadcast_to(np.arange(self.cells),
+                                    (len(self.ids), self.cells))
+        else:
+            moves = self.table[self.locations[:, player]]
+        offsets = np.arange(0, len(self.ids) * (sentinel + 1), sentinel + 1)
+        legal = self.blank.ravel()[offsets[:, None] + moves]
+        if moves.shape[1] == 8:
+            stuck = legal.view("<u8")[:, 0] == 0
+        else:
+            stuck = ~legal.any(axis=1)
+        parked = None
+        if stuck.any():
+            new = stuck & ~self.finished
+            done = self.ids[new]
+            self.winners[done] = 1 - player
+            self.lengths[done] = self.move_count - self.start
+            self.remaining -= len(done)
+            self.finished |= new
+            if 4 * (len(self.ids) - self.remaining) >= len(self.ids):
+                keep = ~self.finished
+                self.ids, self.blank = self.ids[keep], self.blank[keep]
+                self.liberties = self.liberties[keep]
+                self.locations = self.locations[keep]
+                self.finished = self.finished[keep]
+                moves, legal = moves[keep], legal[keep]
+                offsets = offsets[:len(self.ids)]
+            else:
+                parked = stuck
+                self.locations[parked] = sentinel
+        if len(self.ids):
+            choice = policies[player](self, moves, legal, rng)
+            cells = moves[np.arange(len(moves)), choice]
+            if parked is not None:
+                cells[parked] = sentinel
+            self.blank.ravel()[offsets + cells] = False
+            if self.track_liberties:
+                # The never-blank column loses liberties too, harmlessly
+                self.liberties.ravel()[
+                    offsets[:, None] + self.table[cells]] -= 1
+            self.locations[:, player] = cells
+        else:
+            cells = moves[:, 0]
+        self.move_count += 1
+        self.player = 1 - player
+        return self.ids, cells
+
+    def play(self, policy=random_policy, opponent=None, rng=None,
+             histories=False):
+        """Play every game to the end.
+
+        Parameters
+        ----------
+        policy : callable (optional)
+            The policy of player 1.
+
+        opponent : callable (optional)
+            The policy of player 2 (the same as player 1 if None).
+
+        rng : numpy.random.Generator (optional)
+            The random number generator of the policies.
+
+        histories : bool (optional)
+            Record the cells moved to in every game.
+
+        Returns
+        -------
+        Playouts
+        """
+        if rng is None:
+            rng = np.random.default_rng()
+        policies = (policy, opponent or policy)
+        self.track_liberties = any(getattr(p, "needs_liberties", False)
+                                   for p in policies)
+        count = len(self.winners)
+        if histories:
+            plies = int(self.blank[0].sum()) if len(self.ids) else 0
+            self.histories = np.full((count, plies), -1, dtype=np.int16)
+        while self.remaining:
+            ids, cells = self.step(policies, rng)
+            moved = cells < self.cells
+            if histories and moved.any():
+                ply = self.move_count - self.start - 1
+                self.histories[ids[moved], ply] = cells[moved]
+        if histories:
+            self.histories = self.histories[:, :self.lengths.max(initial=0)]
+        return Playouts(self.winners, self.lengths, self.histories)
+
+    def move_history(self, i):
+        """Return the moves of game `i` as the list of [row, col] pairs that
+        `Board.play()` returns."""
+        if self.histories is None:
+            raise RuntimeError("the histories were not recorded")
+        return [[int(idx) % self.height, int(idx) // self.height]
+                for idx in self.histories[i] if idx >= 0]
+
+
+class MobilityBatch(object):
+    """The `MobilitySummary` of many positions for one player, one array per
+    field, for the batch versions of the mobility heuristics.
+
+    The heuristics of sample_players and game_agent only read the summary,
+    the move count and the board size, so a batch function computes all the
+    scores with a few array operations: `score_fn.batch(batch)` returns the
+    same floats as `score_fn` on every position.  Build a batch from a list
+    of boards (`from_boards`), from the children of a position without
+    making their moves (`from_children`), or from boards held as arrays
+    like those of `VectorGames` (`from_arrays`).  Building a batch costs
+    about as much as 50 scalar calls, so batches pay off with hundreds of
+    positions held as arrays rather than the handful of children of one
+    node (see benchmarks/bench_batch.py).
+
+    Attributes
+    ----------
+    utility : numpy.ndarray
+        +inf where the player has won, -inf where it has lost, 0 otherwise.
+
+    own_moves, opp_moves, blank_spaces, move_count : numpy.ndarray
+        The legal move counts of the player and of the opponent, the number
+        of blank cells and the number of moves made.  A field shared by all
+        the positions may be a single int instead.
+
+    own_location, opp_location : numpy.ndarray
+        N x 2 (row, column) locations, -1 before the first move (1 x 2 if
+        shared by all the positions).  Heuristics that read a location get
+        it through `placed()`.
+
+    width, height : int
+        The board size.
+    """
+
+    def __init__(self, utility, own_moves, opp_moves, blank_spaces,
+                 own_location, opp_location, move_count, width, height):
+        self.utility = utility
+        self.own_moves, self.opp_moves = own_moves, opp_moves
+        self.blank_spaces = blank_spaces
+        self.own_location, self.opp_location = own_location, opp_location
+        self.move_count = move_count
+        self.width, self.height = width, height
+
+    def __len__(self):
+        return len(self.utility)
+
+    def with_utility(self, values):
+        """Return `values` as floats, replaced by the utility where the game
+        is over (as the scalar heuristics return it)."""
+        return np.where(self.utility != 0, self.utility, values)
+
+    def placed(self, location):
+        """Return `location` (`own_location` or `opp_location`) after
+        checking that the player has moved in every position that is not
+        over.  The scalar heuristics that read a location raise TypeError on
+        a player without one, so the batch versions raise it too rather than
+        scoring the -1 placeholder.
+        """
+        unplaced = (location < 0).any(axis=1) & (self.utility == 0)
+        if unplaced.any():
+            raise TypeError("the player has no location in position {} of "
+                            "the batch".format(int(np.argmax(unplaced))))
+        return location
+
+    @classmethod
+    def from_boards(cls, games, player):
+        """Summarize a list of boards of the same size for `player`."""
+        summaries = [game.mobility_summary(player) for game in games]
+        unplaced = (-1, -1)
+        fields = np.array([
+            (s.own_moves, s.opp_moves, s.blank_spaces, game.move_count) +
+            (s.own_location or unplaced) + (s.opp_location or unplaced)
+            for s, game in zip(summaries, games)],
+            dtype=np.intp).reshape(-1, 8)
+        utility = np.array([s.utility for s in summaries], dtype=float)
+        width, height = (games[0].width, games[0].height) if games else (0, 0)
+        return cls(utility, fields[:, 0], fields[:, 1], fields[:, 2],
+                   fields[:, 4:6], fields[:, 6:8], fields[:, 3], width,
+                   height)
+
+    @classmethod
+    def from_children(cls, game, player, moves=None):
+        """Summarize `game.forecast_move(move)` for `player` for every move
+        (by default every legal move) without making them: the mover's
+        moves after a move are the liberties of its new cell, and the
+        opponent loses the move the mover takes from it, if any.
+        """
+        if moves is None:
+            moves = game.get_legal_moves()
+        blank = game.blank_count() - 1
+        locations = np.array(moves, dtype=np.intp).reshape(-1, 2)
+        mover_moves = np.array([game.liberties(move) for move in moves],
+                               dtype=np.intp)
+        location = game.get_player_location(game.inactive_player)
+        if location is None:
+            other_moves = np.full(len(moves), blank, dtype=np.intp)
+            other = np.array([(-1, -1)], dtype=np.intp)
+        else:
+            other = np.array([location], dtype=np.intp)
+            offset = locations - other
+            # The knight moves are the offsets with squared length 5
+            other_moves = game.liberties(location) - (
+                (offset * offset).sum(axis=1) == 5)
+        if player == game.active_player:
+            # The player made the move and the opponent is to move
+            utility = np.where(other_moves == 0, float("inf"), 0.)
+            own, opp, own_location, opp_location = (
+                mover_moves, other_moves, locations, other)
+        elif player == game.inactive_player:
+            utility = np.where(other_moves == 0, float("-inf"), 0.)
+            own, opp, own_location, opp_location = (
+                other_moves, mover_moves, other, locations)
+        else:
+            raise RuntimeError(
+                "Invalid player in from_children: {}".format(player))
+        return cls(utility, own, opp, blank, own_location, opp_location,
+                   game.move_count + 1, game.width, game.height)
+
+    @classmethod
+    def from_arrays(cls, blank, locations, move_count, player, width,
+                    height):
+        """Summarize boards held as arrays for player 1 (`player` 0) or
+        player 2 (`player` 1).
+
+        Parameters
+        ----------
+        blank : numpy.ndarray
+            N x cells booleans, True where a cell is blank (an extra
+            never-blank column, as in `VectorGames.blank` and
+            `board_arrays()`, is allowed).
+
+        locations : numpy.ndarray
+            N x 2 cell indices of player 1 and player 2, -1 before their
+            first move.
+
+        move_count : int or numpy.ndarray
+            The number of moves made in every position.
+        """
+        cells = width * height
+        table, _ = knight_tables(width, height)
+        blank = np.asarray(blank, dtype=bool)
+        if blank.shape[1] == cells:
+            blank = np.concatenate(
+                [blank, np.zeros((len(blank), 1), dtype=bool)], axis=1)
+        locations = np.asarray(locations, dtype=np.intp)
+        move_count = np.broadcast_to(np.asarray(move_count, dtype=np.intp),
+                                     (len(blank),))
+        blank_spaces = blank[:, :cells].sum(axis=1)
+        rows = np.arange(len(blank))[:, None]
+
+        def summarize(index):
+            location = locations[:, index]
+            placed = location >= 0
+            moves = blank[rows, table[np.where(placed, location, cells)]]
+            moves = np.where(placed, moves.sum(axis=1), blank_spaces)
+            where = np.where(placed[:, None], np.stack(
+                [location % height, location // height], axis=1), -1)
+            return moves, where
+
+        own_moves, own_location = summarize(player)
+        opp_moves, opp_location = summarize(1 - player)
+        active = move_count % 2 == player
+        utility = np.where(active & (own_moves == 0), float("-inf"),
+                           np.where(~active & (opp_moves == 0),
+                                    float("inf"), 0.))
+        return cls(utility, own_moves, opp_moves, blank_spaces, own_location,
+                   opp_location, move_count, width, height)
+
+
+def evaluate(score_fn, positions, player=None):
+    """Score many positions at once with `score_fn.batch`, the batch version
+    of a heuristic.
+
+    Parameters
+    ----------
+    score_fn : callable
+        A heuristic with a `batch` attribute, such as
+        `sample_players.improved_score` or `game_agent.custom_score`.
+
+    positions : list<isolation.Board> or MobilityBatch
+        The positions (boards are summarized for `player`).
+
+    Returns
+    -------
+    numpy.ndarray
+        The score of every position, equal to `score_fn(game, player)`.
+    """
+    if not isinstance(positions, MobilityBatch):
+        positions = MobilityBatch.from_boards(positions, player)
+    return score_fn.batch(positions)
+
+
+def play_games(count, width=7, height=7, policy=random_policy, opponent=None,
+               rng=None, histories=False, game=None):
+    """Play `count` games in lockstep and return their `Playouts`; see
+    `VectorGames.play()`."""
+    games = VectorGames(count, width, height, game)
+    return games.play(policy, opponent, rng, histories)
@@ -0,0 +1,54 @@
+"""
+Zobrist keys for incremental hashing of Isolation positions.
+
+A position is hashed as the XOR of one random 64-bit key per blocked cell,
+one key for the location of each player and one key when player 2 holds the
+initiative.  Applying a move only touches a few of these terms, so the hash
+can be updated in O(1) instead of being recomputed from the whole board.
+The boards apply these updates through the packed tables of
+`isolation.symmetry`, which hash all symmetric images of a position at once.
+
+The keys are generated from a fixed seed, so every process computes the same
+hash for the same position on a board of a given size.
+"""
+import random
+
+ZOBRIST_SEED = 0x15014710
+
+_KEY_CACHE = {}
+
+
+class ZobristKeys(object):
+    """The random keys used to hash positions on a board of a given size.
+
+    Attributes
+    ----------
+    blocked : tuple<int>
+        The key of each cell (by cell index) when it is blocked.
+
+    location : (tuple<int>, tuple<int>)
+        The key of each cell when it holds player 1 (index 0) or
+        player 2 (index 1).
+
+    side : int
+        The key XOR-ed in while player 2 holds the initiative.
+    """
+
+    def __init__(self, width, height, seed=ZOBRIST_SEED):
+        rng = random.Random(seed ^ (width << 16) ^ height)
+        cells = width * height
+        self.blocked = tuple(rng.getrandbits(64) for _ in range(cells))
+        self.location = (tuple(rng.getrandbits(64) for _ in range(cells)),
+                         tuple(rng.getrandbits(64) for _ in range(cells)))
+        self.side = rng.getrandbits(64)
+
+
+def zobrist_keys(width, height):
+    """Return the shared `ZobristKeys` for a board with the given dimensions.
+    """
+    key = (width, height)
+    keys = _KEY_CACHE.get(key)
+    if keys is None:
+        keys = _KEY_CACHE[key] = ZobristKeys(width, height)
+    return keys
+
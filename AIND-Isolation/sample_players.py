@@ -8,6 +8,11 @@ own agent and example heuristic functions.
 
 from random import randint
 
+try:
+    from isolation.vectorized import MobilityBatch
+except ImportError:  # numpy is not installed
+    MobilityBatch = None
+
 
 def null_score(game, player):
     """This heuristic presumes no knowledge for non-terminal states, and
@@ -30,15 +35,22 @@ def null_score(game, player):
         The heuristic value of the current game state.
     """
 
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
     return 0.
 
 
+def null_scores(batch):
+    """The batch version of `null_score` (see
+    `isolation.vectorized.MobilityBatch`)."""
+    return batch.with_utility(0.)
+
+
+null_score.batch = null_scores
+
+
 def open_move_score(game, player):
     """The basic evaluation function described in lecture that outputs a score
     equal to the number of moves open for your computer player on the board.
@@ -59,13 +71,20 @@ def open_move_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
+
+    return float(summary.own_moves)
+
+
+def open_move_scores(batch):
+    """The batch version of `open_move_score` (see
+    `isolation.vectorized.MobilityBatch`)."""
+    return batch.with_utility(batch.own_moves)
 
-    if game.is_winner(player):
-        return float("inf")
 
-    return float(len(game.get_legal_moves(player)))
+open_move_score.batch = open_move_scores
 
 
 def improved_score(game, player):
@@ -89,15 +108,20 @@ def improved_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
-    if game.is_winner(player):
-        return float("inf")
+    return float(summary.own_moves - summary.opp_moves)
 
-    own_moves = len(game.get_legal_moves(player))
-    opp_moves = len(game.get_legal_moves(game.get_opponent(player)))
-    return float(own_moves - opp_moves)
+
+def improved_scores(batch):
+    """The batch version of `improved_score` (see
+    `isolation.vectorized.MobilityBatch`)."""
+    return batch.with_utility(batch.own_moves - batch.opp_moves)
+
+
+improved_score.batch = improved_scores
 
 
 def center_score(game, player):
@@ -122,17 +146,27 @@ def center_score(game, player):
     float
         The heuristic value of the current game state
     """
-    if game.is_loser(player):
-        return float("-inf")
-
-    if game.is_winner(player):
-        return float("inf")
+    summary = game.mobility_summary(player)
+    if summary.utility:
+        return summary.utility
 
     w, h = game.width / 2., game.height / 2.
-    y, x = game.get_player_location(player)
+    y, x = summary.own_location
     return float((h - y)**2 + (w - x)**2)
 
 
+def center_scores(batch):
+    """The batch version of `center_score` (see
+    `isolation.vectorized.MobilityBatch`)."""
+    w, h = batch.width / 2., batch.height / 2.
+    location = batch.placed(batch.own_location)
+    y, x = location[:, 0], location[:, 1]
+    return batch.with_utility((h - y)**2 + (w - x)**2)
+
+
+center_score.batch = center_scores
+
+
 class RandomPlayer():
     """Player that chooses a move randomly."""
 
@@ -165,10 +199,15 @@ class RandomPlayer():
 class GreedyPlayer():
     """Player that chooses next move to maximize heuristic score. This is
     equivalent to a minimax search agent with a search depth of one.
+
+    With `batch=True` the children are scored all at once by the batch
+    version of the heuristic (`score_fn.batch`, see
+    `isolation.vectorized.MobilityBatch`); the scores and moves are the same.
     """
 
-    def __init__(self, score_fn=open_move_score):
+    def __init__(self, score_fn=open_move_score, batch=False):
         self.score = score_fn
+        self.batch = batch
 
     def get_move(self, game, time_left):
         """Select the move from the available legal moves with the highest
@@ -195,6 +234,11 @@ class GreedyPlayer():
         legal_moves = game.get_legal_moves()
         if not legal_moves:
             return (-1, -1)
+        if self.batch:
+            batch = MobilityBatch.from_children(game, self, legal_moves)
+            scores = self.score.batch(batch).tolist()
+            _, move = max(zip(scores, legal_moves))
+            return move
         _, move = max([(self.score(game.forecast_move(m), self), m) for m in legal_moves])
         return move
 
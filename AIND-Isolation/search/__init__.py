@@ -0,0 +1,9 @@
+"""
+Search infrastructure shared by the agents in `game_agent.py` and
+`competition_agent.py`: transposition tables, move ordering, timing, etc.
+"""
+
+
+class SearchTimeout(Exception):
+    """Subclass base exception for code clarity. """
+    pass
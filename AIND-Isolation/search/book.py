@@ -0,0 +1,214 @@
+"""
+Precomputed opening book with memory-mapped lookup.
+
+The first moves are the most expensive part of the game: the first
+placement can go to any blank cell, so iterative deepening barely gets past
+depth 3.  The book stores the result of a deep search for every position of
+the first few plies, computed offline.
+
+Positions are keyed by `Board.canonical_hash()`, so each symmetry class is
+searched and stored once, and the best move is stored in the canonical frame
+(see `isolation.symmetry`).  The file is a small header followed by
+fixed-width records sorted by key:
+
+    header  magic (8 bytes), width, height, plies, depth (1 byte each),
+            record count (4 bytes)
+    record  key (8 bytes), move (2 bytes, `transposition.pack_move`),
+            depth (1 byte), padding (1 byte), value (4-byte float)
+
+`OpeningBook` maps the file and binary-searches the records in place, so
+opening a book costs nothing beyond reading the header and a lookup takes a
+few microseconds.
+
+Build a book with
+
+    python -m search.book [-W WIDTH] [-H HEIGHT] [-p PLIES] [-d DEPTH]
+                          [-w WORKERS] [-o BOOK]
+"""
+import argparse
+import mmap
+import os
+import struct
+import timeit
+from multiprocessing import Pool
+
+from isolation import Board
+
+from .transposition import pack_move, unpack_move
+
+MAGIC = b"ISOBOOK1"
+HEADER = struct.Struct("<8sBBBBI")
+RECORD = struct.Struct("<QHBxf")
+_KEY = struct.Struct("<Q")
+
+BOOK_FILE = "opening_book_{}x{}.bin"
+
+
+class OpeningBook(object):
+    """A read-only opening book file mapped into memory.
+
+    Parameters
+    ----------
+    path : str
+        A book written by `write_book()`.
+
+    Attributes
+    ----------
+    width, height : int
+        The board size the book was built for; other boards never hit.
+
+    plies : int
+        The book covers the positions with fewer moves played.
+
+    depth : int
+        The search depth of the stored moves.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.plies, self.depth, self._count = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError("{} is not an opening book".format(path))
+
+    def __len__(self):
+        return self._count
+
+    def __getstate__(self):
+        # The memory map cannot be pickled; workers map the file again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def probe(self, key):
+        """Return the (move, depth, value) record stored for a canonical
+        hash, with the move in the canonical frame, or None.
+        """
+        data, size = self._map, RECORD.size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = _KEY.unpack_from(data, HEADER.size + mid * size)[0]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                _, move, depth, value = RECORD.unpack_from(
+                    data, HEADER.size + mid * size)
+                return unpack_move(move), depth, value
+        return None
+
+    def lookup(self, game):
+        """Return the book move for the position, or None if the position is
+        not in the book.
+        """
+        if (game.move_count >= self.plies or game.width != self.width or
+                game.height != self.height):
+            return None
+        key, t = game.canonical_hash()
+        record = self.probe(key)
+        if record is None or record[0] is None:
+            return None
+        return game.symmetries.inverse_move(record[0], t)
+
+    def close(self):
+        self._map.close()
+
+
+def book_positions(width, height, plies):
+    """Return one canonical board for every symmetry class of the positions
+    with fewer than `plies` moves played, keyed by canonical hash.
+    """
+    root = Board("Player1", "Player2", width, height)
+    level = {root.canonical_hash()[0]: root}
+    positions = {}
+    for ply in range(plies):
+        positions.update(level)
+        if ply + 1 == plies:
+            break
+        next_level = {}
+        for game in level.values():
+            for move in game.get_legal_moves():
+                child = game.forecast_move(move)
+                key, t = child.canonical_hash()
+                if key not in next_level and child.get_legal_moves():
+                    next_level[key] = child.transform(t)
+        level = next_level
+    return positions
+
+
+def _search_position(task):
+    """Search one book position to a fixed depth; return its record."""
+    key, game, depth = task
+    # game_agent imports the search package, so import it here
+    from game_agent import AlphaBetaPlayer
+    player = AlphaBetaPlayer(tt_size_mb=16, move_ordering=True, pvs=True,
+                             symmetric_tt=True)
+    player.time_left = lambda: float("inf")
+    if game.move_count % 2 == 0:
+        game = game.with_players(player, "Opponent")
+    else:
+        game = game.with_players("Opponent", player)
+    player._new_search(game)
+    move = None
+    for move in player._deepen(game, range(1, depth + 1)):
+        pass
+    return key, move, depth, max(player._root_scores.values())
+
+
+def build_book(width=7, height=7, plies=3, depth=9, workers=None):
+    """Search every book position in a process pool.
+
+    Returns
+    -------
+    list<(int, (int, int), int, float)>
+        The (canonical key, move, depth, value) of every position.
+    """
+    positions = book_positions(width, height, plies)
+    tasks = [(key, game, depth) for key, game in positions.items()]
+    workers = workers or os.cpu_count() or 1
+    if workers == 1:
+        return list(map(_search_position, tasks))
+    with Pool(workers) as pool:
+        return list(pool.imap_unordered(_search_position, tasks, chunksize=4))
+
+
+def write_book(path, records, width, height, plies, depth):
+    """Write the records returned by build_book() as a book file."""
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, plies, depth, len(records)))
+        for key, move, move_depth, value in sorted(records):
+            f.write(RECORD.pack(key, pack_move(move), move_depth, value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an opening book.")
+    parser.add_argument("-W", "--width", type=int, default=7)
+    parser.add_argument("-H", "--height", type=int, default=7)
+    parser.add_argument("-p", "--plies", type=int, default=3,
+                        help="book the positions with fewer moves played")
+    parser.add_argument("-d", "--depth", type=int, default=9,
+                        help="search depth for every position")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="book file (default: " + BOOK_FILE + ")")
+    args = parser.parse_args()
+
+    path = args.output or BOOK_FILE.format(args.width, args.height)
+    start = timeit.default_timer()
+    records = build_book(args.width, args.height, args.plies, args.depth,
+                         args.workers)
+    write_book(path, records, args.width, args.height, args.plies, args.depth)
+    print("{}: {} positions, {} bytes, built in {:.1f} s".format(
+        path, len(records), os.path.getsize(path),
+        timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Exact endgame solver for partitioned positions.
+
+Once `Board.is_partitioned()` is True the players can never interact again:
+each one simply walks the longest knight path it can find in its own region.
+The player to move wins if and only if its longest path is strictly longer
+than the opponent's, so the position is solved by two longest-path searches.
+
+The longest-path search is a depth-first search over bitmasks.  Results are
+memoized per (cell, region) where the region is the set of blank cells still
+reachable from the cell, so transpositions and the positions of later moves
+share work.  The search is pruned with an upper bound: a knight alternates
+between light and dark cells, so a path can never be longer than twice the
+number of cells of the scarcer colour (plus one).  The opponent's path is
+searched first, and the search of the player to move stops as soon as it
+finds a path that outlasts it: a winning move does not need to be the
+longest one.
+"""
+from isolation.bitboard import knight_masks, iter_bits, popcount
+
+from . import SearchTimeout
+
+_COLOR_CACHE = {}
+
+
+def _light_cells(width, height):
+    """Return the bitmask of the cells with an even row + column."""
+    key = (width, height)
+    mask = _COLOR_CACHE.get(key)
+    if mask is None:
+        mask = 0
+        for idx in range(width * height):
+            if (idx % height + idx // height) % 2 == 0:
+                mask |= 1 << idx
+        mask = _COLOR_CACHE[key] = mask
+    return mask
+
+
+class EndgameSolver(object):
+    """Solve partitioned positions exactly by longest-path search.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The memo is cleared when it grows beyond this many entries.
+
+    Attributes
+    ----------
+    nodes : int
+        The number of longest-path nodes searched by the last solve().
+
+    path_lengths : (int, int)
+        The longest path of the player to move and of its opponent in the
+        last solved position.
+    """
+
+    CHECK_INTERVAL = 256
+
+    def __init__(self, max_entries=1 << 20):
+        self.max_entries = max_entries
+        self.memo = {}
+        self.nodes = 0
+        self.path_lengths = (0, 0)
+        self._masks = None
+        self._light = 0
+        self._countdown = 0
+
+    def solve(self, game, time_left=None, threshold=0.):
+        """Solve a partitioned position for the player to move.
+
+        Parameters
+        ----------
+        game : isolation.Board
+            A position with `game.is_partitioned()` True.
+
+        time_left : callable (optional)
+            Checked every CHECK_INTERVAL nodes; SearchTimeout is raised when
+            it drops below `threshold`.  Results completed before a timeout
+            stay in the memo.
+
+        Returns
+        -------
+        ((int, int), float)
+            The first move of a winning path of the player to move (of its
+            longest path if it cannot win, None if it has no legal move), and
+            +inf if that player wins, -inf if it loses.
+        """
+        self._masks = knight_masks(game.width, game.height)
+        self._light = _light_cells(game.width, game.height)
+        self._time_left, self._threshold = time_left, threshold
+        self._countdown = self.CHECK_INTERVAL
+        self.nodes = 0
+        if len(self.memo) > self.max_entries:
+            self.memo = {}
+
+        height = game.height
+        open_cells = 0
+        for r, c in game.get_blank_spaces():
+            open_cells |= 1 << (r + c * height)
+        own, opp = [game.get_player_location(p)
+                    for p in (game.active_player, game.inactive_player)]
+        own, opp = own[0] + own[1] * height, opp[0] + opp[1] * height
+
+        opp_length = self.longest_path(opp, open_cells)
+        best_move, own_length = None, 0
+        for idx in iter_bits(self._masks[own] & open_cells):
+            length = 1 + self.longest_path(idx, open_cells & ~(1 << idx),
+                                           opp_length)
+            if length > own_length:
+                best_move, own_length = (idx % height, idx // height), length
+                if own_length > opp_length:
+                    break
+        self.path_lengths = (own_length, opp_length)
+        return best_move, float("inf") if own_length > opp_length else float("-inf")
+
+    def longest_path(self, loc, open_cells, target=None):
+        """Return the number of moves in the longest knight path from cell
+        `loc` over the cells in `open_cells`.
+
+        With a `target`, the search may stop at the first path of at least
+        `target` moves and return its length instead.
+        """
+        region = self._region(loc, open_cells)
+        key = (loc, region)
+        entry = self.memo.get(key)
+        if entry is not None:
+            length, exact = entry
+            if exact or (target is not None and length >= target):
+                return length
+
+        self.nodes += 1
+        self._countdown -= 1
+        if self._countdown <= 0:
+            self._countdown = self.CHECK_INTERVAL
+            if (self._time_left is not None and
+                    self._time_left() < self._threshold):
+                raise SearchTimeout()
+
+        light = popcount(region & self._light)
+        dark = popcount(region) - light
+        if self._light >> loc & 1:
+            bound = min(2 * dark, 2 * light + 1)
+        else:
+            bound = min(2 * light, 2 * dark + 1)
+        if target is not None:
+            bound = min(bound, target)
+        child_target = None if target is None else target - 1
+        length = 0
+        for idx in iter_bits(self._masks[loc] & region):
+            if length >= bound:
+                break
+            length = max(length, 1 + self.longest_path(
+                idx, region & ~(1 << idx), child_target))
+        # A path cut short at the target is only a lower bound
+        self.memo[key] = (length, target is None or length < target)
+        return length
+
+    def _region(self, loc, open_cells):
+        """Return the cells of `open_cells` reachable from cell `loc`."""
+        masks = self._masks
+        reach = 0
+        frontier = masks[loc] & open_cells
+        while frontier:
+            reach |= frontier
+            step = 0
+            for idx in iter_bits(frontier):
+                step |= masks[idx]
+            frontier = step & open_cells & ~reach
+        return reach
@@ -0,0 +1,238 @@
+"""
+Monte Carlo tree search with UCT.
+
+Every iteration walks down the tree from the root, choosing at each node the
+child with the best upper confidence bound (UCT)
+
+    wins / visits + exploration * sqrt(ln(parent visits) / visits)
+
+until it reaches a node with untried moves.  It adds one child for one of
+them, plays the game out with random moves and counts the result in every
+node on the path.  The move played is the most visited child of the root.
+
+Each node stores the win count of the player who made its move, so the UCT
+value of a child is always from the point of view of the player choosing it.
+Nodes use `__slots__` and create their list of untried moves on their first
+visit, so a tree of a few hundred thousand nodes stays within tens of
+megabytes.  Nodes have no parent links, so the tree holds no reference
+cycles.  The search leaves the garbage collector alone (it is process-wide
+state); a caller that wants it paused during the search can do so, see
+`competition_agent.CustomPlayer(gc_pause=True)`.
+
+The search stops when the time left would drop below the threshold during
+the next iteration, estimated as twice the slowest iteration so far: the
+margin covers the occasional iteration slowed down by a collection or by
+the scheduler.
+
+The tree is kept between moves: `advance()` follows the moves actually
+played down the tree and makes the node reached the new root, so the
+playouts of the previous turns that went through it are not lost.
+"""
+import math
+import random
+
+
+class Node(object):
+    """A position in the search tree, reached by `move`.
+
+    Attributes
+    ----------
+    move : (int, int)
+        The move that leads from the parent to this position.
+
+    children : list<Node>
+        The expanded children.
+
+    untried : list<(int, int)>
+        The legal moves not expanded yet (None until the first visit).
+
+    visits : int
+        The number of playouts through this position.
+
+    wins : float
+        The playouts won by the player who made `move` (draws of cut-off
+        playouts count 1/2).
+    """
+
+    __slots__ = ("move", "children", "untried", "visits", "wins")
+
+    def __init__(self, move=None):
+        self.move = move
+        self.children = []
+        self.untried = None
+        self.visits = 0
+        self.wins = 0.
+
+
+class MCTS(object):
+    """A UCT search tree that is kept from one move to the next.
+
+    Parameters
+    ----------
+    exploration : float (optional)
+        The UCT exploration constant.
+
+    playout_depth : int (optional)
+        Stop every playout after this many random moves and score the
+        position with `score_fn` instead (a win if it is positive for the
+        player to move at the root, a loss if negative, half a win if 0).
+        None plays every playout to the end of the game.
+
+    score_fn : callable (optional)
+        The heuristic for cut-off playouts, with the signature of
+        `game_agent.custom_score`.
+
+    Attributes
+    ----------
+    root : Node
+        The root of the tree, the position given to the last search().
+
+    playouts : int
+        The number of playouts run by the last search().
+
+    reused : int
+        The number of playouts the root already had when the last search()
+        started.
+    """
+
+    def __init__(self, exploration=math.sqrt(2), playout_depth=None,
+                 score_fn=None):
+        if playout_depth is not None and score_fn is None:
+            raise ValueError("cut-off playouts need a score function")
+        self.exploration = exploration
+        self.playout_depth = playout_depth
+        self.score_fn = score_fn
+        self.root = None
+        self.playouts = 0
+        self.reused = 0
+        self._position = None
+        # The tree left behind by play(), freed when the next search starts:
+        # freeing a large tree takes milliseconds the move cannot spare
+        self._discarded = None
+
+    def advance(self, game):
+        """Make the node of `game` the root, following the moves played
+        since the last root down the tree, or start a new tree if `game` is
+        not reached from the root by at most one move of each player (only
+        the last move of each player shows on the board).
+
+        Returns
+        -------
+        bool
+            True if a subtree was kept.
+        """
+        position = self._position
+        if (position is not None and
+                0 <= game.move_count - position.move_count <= 2):
+            node = self.root
+            players = (position.active_player, position.inactive_player)
+            for player in players[:game.move_count - position.move_count]:
+                move = game.get_player_location(player)
+                node = next((c for c in node.children if c.move == move), None)
+                if node is None:
+                    break
+                position.apply_move(move)
+            if node is not None and position.hash() == game.hash():
+                self.root = node
+                return True
+        self.root = Node()
+        self._position = game.copy()
+        return False
+
+    def reset(self):
+        """Discard the tree."""
+        self.root = None
+        self._position = None
+        self._discarded = None
+
+    def play(self, move):
+        """Re-root the tree at the child for our own `move`."""
+        node = next((c for c in self.root.children if c.move == move), None)
+        if node is None:
+            node = Node(move)
+        self._discarded = self.root
+        self.root = node
+        self._position.apply_move(move)
+
+    def search(self, game, time_left, threshold=0., max_playouts=None,
+               rng=random):
+        """Run playouts from `game` (re-rooting the tree there) until
+        `time_left()` would drop below `threshold` during the next one.
+
+        Returns
+        -------
+        (int, int)
+            The most visited move at the root, or None if the player to move
+            has no legal move.
+        """
+        self.advance(game)
+        self._discarded = None
+        root = self.root
+        self.reused = root.visits
+        self.playouts = 0
+        player = game.active_player
+        log, sqrt, c = math.log, math.sqrt, self.exploration
+        # Twice the longest iteration so far, so the search stops before one
+        # that would overrun the threshold
+        reserve = 0.
+        last = time_left()
+        while max_playouts is None or self.playouts < max_playouts:
+            if last - reserve < threshold:
+                break
+            sim = self._position.copy()
+            node, path = root, [root]
+            # Selection
+            while node.children and node.untried is not None and not node.untried:
+                scale = log(node.visits)
+                best, best_value = None, -1.
+                for child in node.children:
+                    value = (child.wins / child.visits +
+                             c * sqrt(scale / child.visits))
+                    if value > best_value:
+                        best, best_value = child, value
+                node = best
+                sim.apply_move(node.move)
+                path.append(node)
+            # Expansion
+            if node.untried is None:
+                node.untried = sim.get_legal_moves()
+                rng.shuffle(node.untried)
+            if node.untried:
+                child = Node(node.untried.pop())
+                node.children.append(child)
+                sim.apply_move(child.move)
+                node = child
+                path.append(node)
+            # Playout and backpropagation: `result` is for the player to move
+            # at the root, who made the moves of the odd-depth nodes
+            result = self._playout(sim, player, rng)
+            root.visits += 1
+            for depth in range(1, len(path)):
+                node = path[depth]
+                node.visits += 1
+                node.wins += result if depth % 2 else 1. - result
+            self.playouts += 1
+            now = time_left()
+            reserve = max(reserve, 2. * (last - now))
+            last = now
+
+        if not root.children:
+            moves = self._position.get_legal_moves()
+            return moves[0] if moves else None
+        return max(root.children, key=lambda child: child.visits).move
+
+    def _playout(self, sim, player, rng):
+        """Play random moves to the end of the game (or the cut-off) and
+        return 1 if `player` wins, 0 if it loses, 1/2 for a level cut-off.
+        """
+        depth = self.playout_depth
+        while True:
+            moves = sim.get_legal_moves()
+            if not moves:
+                return 0. if sim.active_player == player else 1.
+            if depth is not None:
+                if depth == 0:
+                    score = self.score_fn(sim, player)
+                    return 1. if score > 0 else 0. if score < 0 else .5
+                depth -= 1
+            sim.apply_move(rng.choice(moves))
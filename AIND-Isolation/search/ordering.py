@@ -0,0 +1,106 @@
+"""
+Move ordering for alpha-beta search.
+
+`Board.get_legal_moves()` returns its moves in random order, which makes
+alpha-beta pruning close to its worst case.  `MoveOrderer` sorts them using
+three sources of knowledge, each of which can be switched off:
+
+- the hash move: the best move stored in the transposition table (or the
+  principal variation) for the position is searched first
+- killer moves: up to two moves per ply that recently caused a cutoff in a
+  sibling position are searched next
+- the history heuristic: the remaining moves are sorted by how often moving
+  to the same destination cell caused a cutoff for the same side, weighted
+  by the square of the remaining depth
+"""
+
+MAX_SIDE, MIN_SIDE = 0, 1
+
+
+class MoveOrderer(object):
+    """Order moves with hash-move, killer-move and history heuristics.
+
+    Parameters
+    ----------
+    hash_move : bool (optional)
+        Search the hash / PV move first.
+
+    killers : bool (optional)
+        Search the killer moves of the current ply next.
+
+    history : bool (optional)
+        Sort the remaining moves by their history score.
+
+    Attributes
+    ----------
+    killer_moves : dict
+        Maps a ply (the position's `move_count`) to a list of at most two
+        moves, most recent first.
+
+    history_scores : (dict, dict)
+        The history score of each destination cell for the maximizing
+        (index 0) and the minimizing (index 1) side.
+    """
+
+    def __init__(self, hash_move=True, killers=True, history=True):
+        self.use_hash_move = hash_move
+        self.use_killers = killers
+        self.use_history = history
+        self.killer_moves = {}
+        self.history_scores = ({}, {})
+
+    def new_search(self):
+        """Prepare for a new root search: killer moves are forgotten and the
+        history scores are halved, so older results fade out.
+        """
+        self.killer_moves = {}
+        for scores in self.history_scores:
+            for move in scores:
+                scores[move] >>= 1
+
+    def order(self, moves, ply, side, hash_move=None):
+        """Return the moves in the order they should be searched.
+
+        Parameters
+        ----------
+        moves : list<(int, int)>
+            The legal moves of the position; the list may be reordered.
+
+        ply : int
+            The `move_count` of the position.
+
+        side : int
+            MAX_SIDE or MIN_SIDE, the side to move in the search.
+
+        hash_move : (int, int) (optional)
+            The best move from the transposition table or the principal
+            variation, if known.
+
+        Returns
+        -------
+        list<(int, int)>
+        """
+        if self.use_history:
+            scores = self.history_scores[side]
+            moves.sort(key=lambda m: scores.get(m, 0), reverse=True)
+        front = []
+        if self.use_hash_move and hash_move is not None and hash_move in moves:
+            front.append(hash_move)
+        if self.use_killers:
+            for killer in self.killer_moves.get(ply, ()):
+                if killer in moves and killer not in front:
+                    front.append(killer)
+        if front:
+            moves = front + [m for m in moves if m not in front]
+        return moves
+
+    def record_cutoff(self, move, ply, depth, side):
+        """Reward a move that caused a cutoff at the given ply and depth."""
+        if self.use_killers:
+            killers = self.killer_moves.setdefault(ply, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[2:]
+        if self.use_history:
+            scores = self.history_scores[side]
+            scores[move] = scores.get(move, 0) + depth * depth
@@ -0,0 +1,304 @@
+"""
+Lazy SMP parallel search.
+
+Every worker process runs its own iterative deepening search of the whole
+root position, and all of them share one transposition table held in
+`multiprocessing.shared_memory`.  The random move order of
+`Board.get_legal_moves()` and a staggered starting depth make the workers
+explore different parts of the tree, and each one picks up the results the
+others have already stored.  The move from the deepest completed iteration
+wins.
+
+The worker processes live as long as the `LazySMP` object, and each keeps
+the search player it received when it started (with its move ordering
+statistics).  Every worker has its own task queue, so each search runs in
+every worker exactly once.  A search only sends them the root position as
+plain integers (`Board.to_state()`: the blocked cells, the locations and
+the hash) and the deadline, a task of about 150 bytes.
+
+Table entries are written without locks.  Each slot stores its key XOR-ed
+with a checksum of the rest of the entry, so a slot torn by two concurrent
+writers simply fails to match on the next probe.
+"""
+import queue
+import random
+import struct
+import timeit
+from array import array
+from multiprocessing import Process, Queue, SimpleQueue
+from multiprocessing.shared_memory import SharedMemory
+
+from . import SearchTimeout
+from .transposition import TranspositionTable, SLOT_BYTES, pack_move, unpack_move
+
+_EMPTY = -1
+_DOUBLE = struct.Struct("<d")
+_QWORD = struct.Struct("<Q")
+
+# The table attached by each worker process and its search player (see
+# _worker_init)
+_WORKER_TABLE = None
+_WORKER_PLAYER = None
+
+
+def _checksum(value, depth, flag, move, move_count):
+    """Fold the non-key fields of an entry into one 64-bit word."""
+    bits = _QWORD.unpack(_DOUBLE.pack(value))[0]
+    return bits ^ ((depth & 0xFF) | flag << 8 | move << 16 | move_count << 32)
+
+
+class SharedTranspositionTable(TranspositionTable):
+    """A `TranspositionTable` whose slots live in a shared memory block.
+
+    The creating process owns the block and must call close() to release
+    it; worker processes attach to it by name.  The block also holds a stop
+    flag that lets any process end the current parallel search.
+
+    Parameters
+    ----------
+    size_mb : float
+        Memory budget for the table in megabytes.
+
+    name : str (optional)
+        Attach to the existing block with this name instead of creating one.
+    """
+
+    def __init__(self, size_mb=16, name=None):
+        self.buckets = max(1, int(size_mb * 2 ** 20) // (2 * SLOT_BYTES))
+        slots = 2 * self.buckets
+        self.owner = name is None
+        if self.owner:
+            self._shm = SharedMemory(create=True, size=slots * SLOT_BYTES + 1)
+        else:
+            self._shm = SharedMemory(name=name)
+        buf = self._shm.buf
+        views = []
+        offset = 0
+        for fmt, size in [('Q', 8), ('d', 8), ('b', 1), ('b', 1), ('H', 2), ('H', 2)]:
+            views.append(buf[offset:offset + size * slots].cast(fmt))
+            offset += size * slots
+        self._stop_flag = buf[offset:offset + 1]
+        (self._keys, self._values, self._depths, self._flags, self._moves,
+         self._move_counts) = views
+        self._views = views + [self._stop_flag]
+        self.root_move_count = 0
+        if self.owner:
+            self.clear()
+        self.reset_stats()
+
+    @property
+    def name(self):
+        """The name other processes use to attach to the table."""
+        return self._shm.name
+
+    def clear(self):
+        """Remove every entry from the table (in place)."""
+        slots = 2 * self.buckets
+        self._depths[:] = array('b', [_EMPTY]) * slots
+        self.root_move_count = 0
+
+    def new_search(self, move_count):
+        """See `TranspositionTable.new_search`; only the owner clears the
+        shared block when a new game starts.
+        """
+        if move_count < self.root_move_count and self.owner:
+            self.clear()
+        self.root_move_count = move_count
+
+    def probe(self, key):
+        self.probes += 1
+        i = 2 * (key % self.buckets)
+        for i in (i, i + 1):
+            depth = self._depths[i]
+            if depth == _EMPTY:
+                continue
+            value, flag = self._values[i], self._flags[i]
+            move, move_count = self._moves[i], self._move_counts[i]
+            if self._keys[i] ^ _checksum(value, depth, flag, move, move_count) == key:
+                self.hits += 1
+                return depth, value, flag, unpack_move(move)
+        return None
+
+    def store(self, key, depth, value, flag, move, move_count):
+        self.stores += 1
+        i = 2 * (key % self.buckets)
+        old_depth = self._depths[i]
+        if not (old_depth == _EMPTY or depth >= old_depth or
+                self._move_counts[i] < self.root_move_count):
+            i += 1
+        depth = min(depth, 127)
+        move = pack_move(move)
+        self._values[i] = value
+        self._depths[i] = depth
+        self._flags[i] = flag
+        self._moves[i] = move
+        self._move_counts[i] = move_count
+        self._keys[i] = key ^ _checksum(value, depth, flag, move, move_count)
+
+    def stop(self):
+        """Ask every process searching with this table to stop."""
+        self._stop_flag[0] = 1
+
+    def reset_stop(self):
+        self._stop_flag[0] = 0
+
+    def stopped(self):
+        return self._stop_flag[0] == 1
+
+    def close(self):
+        """Detach from the shared block, destroying it if this process
+        created it.
+        """
+        for view in self._views:
+            view.release()
+        self._views = []
+        self._shm.close()
+        if self.owner:
+            self._shm.unlink()
+
+
+def _worker_init(name, size_mb, player):
+    """Attach the worker to the shared table and keep its search player."""
+    global _WORKER_TABLE, _WORKER_PLAYER
+    _WORKER_TABLE = SharedTranspositionTable(size_mb, name=name)
+    _WORKER_PLAYER = player
+    player.tt = _WORKER_TABLE
+
+
+def _worker_main(name, size_mb, player, tasks, results):
+    """The loop of a worker process: run every (search id, task) of its own
+    queue and put (search id, result) on the shared result queue, until it
+    gets None.
+    """
+    _worker_init(name, size_mb, player)
+    for search_id, task in iter(tasks.get, None):
+        results.put((search_id, _search_worker(task)))
+
+
+def _search_worker(task):
+    """Run one Lazy SMP worker until the deadline, the stop flag, or
+    `max_depth` is reached.
+
+    Returns
+    -------
+    (int, (int, int), int, int)
+        The deepest completed depth, its best move, the number of nodes
+        searched and the worker index.
+    """
+    board_cls, width, height, state, deadline, threshold, max_depth, index = task
+    table, player = _WORKER_TABLE, _WORKER_PLAYER
+    # Player 1 moves when an even number of cells is blocked
+    if bin(state[0]).count("1") % 2:
+        game = board_cls.from_state("Opponent", player, state, width, height)
+    else:
+        game = board_cls.from_state(player, "Opponent", state, width, height)
+    random.seed(index * 1000003 ^ game.hash())
+
+    def time_left():
+        if table.stopped():
+            return float("-inf")
+        return 1000. * (deadline - timeit.default_timer())
+
+    player.TIMER_THRESHOLD = threshold
+    player.time_left = time_left
+    player._new_search(game)
+    start = 1 + index % 2
+    if max_depth is None:
+        max_depth = len(game.get_blank_spaces()) - 1
+    best_move = None
+    try:
+        for best_move in player._deepen(game, range(start, max_depth + 1)):
+            pass
+        table.stop()
+    except SearchTimeout:
+        pass
+    depth = start - 1 + len(player.depth_nodes) if player.depth_nodes else 0
+    return depth, best_move, sum(player.depth_nodes) + player.nodes, index
+
+
+class LazySMP(object):
+    """Worker processes searching with a shared transposition table.
+
+    Parameters
+    ----------
+    workers : int
+        The number of worker processes.
+
+    size_mb : float
+        Memory budget of the shared transposition table in megabytes.
+
+    player : object
+        A picklable search player (an `AlphaBetaPlayer`); every worker
+        receives its own copy once, when it starts, and searches with it.
+    """
+
+    def __init__(self, workers, size_mb=16, player=None):
+        self.workers = workers
+        self.table = SharedTranspositionTable(size_mb)
+        self._search_id = 0
+        self._results = Queue()
+        self._tasks = [SimpleQueue() for _ in range(workers)]
+        self._processes = [
+            Process(target=_worker_main, daemon=True,
+                    args=(self.table.name, size_mb, player, tasks,
+                          self._results))
+            for tasks in self._tasks]
+        for process in self._processes:
+            process.start()
+
+    def search(self, game, time_left, threshold, max_depth=None,
+               worker_threshold=None):
+        """Search `game` in every worker until `threshold` milliseconds are
+        left on `time_left()` (or until one worker completes `max_depth`).
+
+        Parameters
+        ----------
+        worker_threshold : float (optional)
+            The TIMER_THRESHOLD of the workers' search players for this
+            search; defaults to `threshold`.
+
+        Returns
+        -------
+        list<(int, (int, int), int, int)> or None
+            The result of every worker that answered in time (see
+            `_search_worker`), by worker index, or None if none did.
+        """
+        self.table.new_search(game.move_count)
+        self.table.reset_stop()
+        remaining = time_left()
+        deadline = timeit.default_timer() + remaining / 1000.
+        if worker_threshold is None:
+            worker_threshold = threshold
+        state = game.to_state()
+        # Results of an earlier search that timed out carry an older id
+        self._search_id += 1
+        for i, tasks in enumerate(self._tasks):
+            tasks.put((self._search_id, (
+                type(game), game.width, game.height, state, deadline,
+                worker_threshold, max_depth, i)))
+        end = timeit.default_timer() + max(0., remaining - threshold) / 1000.
+        results = []
+        while len(results) < self.workers:
+            wait = end - timeit.default_timer()
+            try:
+                search_id, result = self._results.get(
+                    timeout=None if wait == float("inf") else max(0., wait))
+            except queue.Empty:
+                self.table.stop()
+                break
+            if search_id == self._search_id:
+                results.append(result)
+        return sorted(results, key=lambda result: result[3]) or None
+
+    def close(self):
+        """Stop the worker processes and release the shared table."""
+        self.table.stop()
+        for tasks in self._tasks:
+            tasks.put(None)
+        for process in self._processes:
+            process.join(1.)
+            if process.is_alive():
+                process.terminate()
+                process.join()
+        self._results.close()
+        self.table.close()
@@ -0,0 +1,356 @@
+"""
+Proof-number search solver for small boards.
+
+Depth-first proof-number search (df-pn) proves the game-theoretic value of a
+position without a heuristic.  Every position has a proof number (pn), the
+number of unsolved leaf positions that must be shown won to prove that the
+player to move wins, and a disproof number (dn), the same for a loss.  In
+negamax form, with the numbers of every child taken from the point of view
+of its own player to move,
+
+    pn = min(dn of the children)        dn = sum(pn of the children)
+
+A position without legal moves is lost (pn = INF, dn = 0).  The search
+always descends into the child with the smallest dn, the most-proving child,
+and only returns when the numbers of the position cross the thresholds its
+parent gave it; the thresholds make the search depth-first, and the numbers
+live in the transposition table instead of an explicit tree.  The 1 + epsilon
+trick widens the threshold of the most-proving child so the search does not
+thrash between two children of similar cost.
+
+The table is keyed by `Board.canonical_hash()`, so symmetric positions are
+solved once (see `isolation.symmetry`).  Every entry records the nodes spent
+on it; when the table grows beyond its budget of entries the cheapest half
+is dropped, unsolved positions before solved ones.  Partitioned positions are
+solved directly by `EndgameSolver`.  The table can be saved to a checkpoint
+file and loaded again, so a long solve that is interrupted (by its limits,
+an exception or Ctrl-C) continues from where it stopped.
+
+Solve the first moves of small boards with
+
+    python -m search.proof [-s SIZE [SIZE ...]] [-n MAX_NODES] [-m MAX_ENTRIES]
+                           [-c CHECKPOINT_DIR]
+"""
+import argparse
+import os
+import pickle
+import timeit
+
+from isolation import BitBoard
+
+from . import SearchTimeout
+from .endgame import EndgameSolver
+
+INF = 1 << 40
+WIN, LOSS = "win", "loss"
+
+
+class ProofSolver(object):
+    """Prove positions won or lost with depth-first proof-number search.
+
+    Parameters
+    ----------
+    max_entries : int (optional)
+        The table budget, in entries (not bytes): when the table grows
+        beyond this many entries, the half that took the fewest nodes to
+        compute is dropped (unsolved positions first).  An entry takes about
+        ENTRY_BYTES of memory, so the default of 1 << 22 entries is about
+        600 MB.  A budget too small for the proof tree makes the search
+        recompute the dropped positions over and over.
+
+    checkpoint : str (optional)
+        The file the table is saved to every `checkpoint_seconds` and when a
+        solve stops without a result, including on KeyboardInterrupt.  An existing checkpoint is loaded, so an
+        interrupted solve continues with all the work already done.
+
+    checkpoint_seconds : float (optional)
+        The interval between two checkpoints.
+
+    symmetric : bool (optional)
+        Key the table by `Board.canonical_hash()` so that reflected and
+        rotated positions share their entry; otherwise by `Board.hash()`.
+
+    endgame_solver : EndgameSolver or bool (optional)
+        Solve partitioned positions by longest-path search instead of
+        expanding them; True uses a new EndgameSolver.
+
+    Attributes
+    ----------
+    table : dict
+        (pn, dn, nodes) by position hash.
+
+    nodes : int
+        The number of positions expanded by the last solve().
+
+    total_nodes : int
+        The number of positions expanded since the table was created,
+        including the solves of a loaded checkpoint.
+    """
+
+    CHECK_INTERVAL = 1024
+    EPSILON = .25
+    # The memory of one table entry (its dict slot, hash key and tuple of
+    # three ints) measured on 64-bit CPython
+    ENTRY_BYTES = 150
+
+    def __init__(self, max_entries=1 << 22, checkpoint=None,
+                 checkpoint_seconds=300., symmetric=True, endgame_solver=True):
+        self.max_entries = max_entries
+        self.checkpoint = checkpoint
+        self.checkpoint_seconds = checkpoint_seconds
+        self.symmetric = symmetric
+        if endgame_solver is True:
+            endgame_solver = EndgameSolver()
+        self.endgame_solver = endgame_solver or None
+        self.table = {}
+        self.nodes = 0
+        self.total_nodes = 0
+        self._countdown = 0
+        self._limit = None
+        self._time_left, self._threshold = None, 0.
+        self._next_checkpoint = 0.
+        if checkpoint is not None and os.path.exists(checkpoint):
+            self.load(checkpoint)
+
+    def solve(self, game, max_nodes=None, time_left=None, threshold=0.):
+        """Prove the value of a position for the player to move.
+
+        Parameters
+        ----------
+        max_nodes : int (optional)
+            Stop after expanding this many positions.
+
+        time_left : callable (optional)
+            Checked every CHECK_INTERVAL nodes; the solve stops when it drops
+            below `threshold`.
+
+        Returns
+        -------
+        bool or None
+            True if the player to move wins, False if it loses, None if the
+            solve stopped first (the work done so far stays in the table and
+            is saved to the checkpoint, as it is when an exception such as
+            KeyboardInterrupt stops the solve).
+        """
+        game = game.copy()
+        self.nodes = 0
+        self._countdown = self.CHECK_INTERVAL
+        self._limit = max_nodes
+        self._time_left, self._threshold = time_left, threshold
+        self._next_checkpoint = (timeit.default_timer() +
+                                 self.checkpoint_seconds)
+        solved = False
+        try:
+            self._mid(game, INF, INF)
+            solved = True
+        except SearchTimeout:
+            return None
+        finally:
+            if not solved and self.checkpoint is not None:
+                self.save(self.checkpoint)
+        return self.value(game)
+
+    def value(self, game):
+        """Return True/False if the position is proven won/lost for the
+        player to move, None if it is not proven yet."""
+        entry = self.table.get(self._key(game))
+        if entry is None or (entry[0] and entry[1]):
+            return None
+        return entry[0] == 0
+
+    def winning_move(self, game):
+        """Return a move that wins a proven won position, or None."""
+        for move in game.get_legal_moves():
+            if self.value(game.forecast_move(move)) is False:
+                return move
+        return None
+
+    def save(self, path):
+        """Write the table to `path` (atomically)."""
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump({"table": self.table, "nodes": self.total_nodes,
+                         "symmetric": self.symmetric}, f,
+                        pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+
+    def load(self, path):
+        """Replace the table with the one saved in `path`."""
+        with open(path, "rb") as f:
+            state = pickle.load(f)
+        if state["symmetric"] != self.symmetric:
+            raise ValueError("{} was saved with symmetric={}".format(
+                path, state["symmetric"]))
+        self.table = state["table"]
+        self.total_nodes = state["nodes"]
+
+    def _key(self, game):
+        if self.symmetric:
+            return game.canonical_hash()[0]
+        return game.hash()
+
+    def _tick(self):
+        """Count a node and stop the search when a limit is reached."""
+        self.nodes += 1
+        self.total_nodes += 1
+        self._countdown -= 1
+        if self._countdown > 0:
+            return
+        self._countdown = self.CHECK_INTERVAL
+        if self._limit is not None and self.nodes >= self._limit:
+            raise SearchTimeout()
+        if (self._time_left is not None and
+                self._time_left() < self._threshold):
+            raise SearchTimeout()
+        if (self.checkpoint is not None and
+                timeit.default_timer() >= self._next_checkpoint):
+            self.save(self.checkpoint)
+            self._next_checkpoint = (timeit.default_timer() +
+                                     self.checkpoint_seconds)
+
+    def _mid(self, game, pn_threshold, dn_threshold):
+        """Search `game` until its proof or disproof number reaches its
+        threshold, and store the numbers in the table."""
+        self._tick()
+        start = self.nodes
+        key = self._key(game)
+        table = self.table
+        moves = game.get_legal_moves()
+        if not moves:
+            self._store(key, INF, 0, 1)
+            return
+        if (self.endgame_solver is not None and game.move_count >= 2 and
+                game.is_partitioned()):
+            _, value = self.endgame_solver.solve(game)
+            if value > 0:
+                self._store(key, 0, INF, 1)
+            else:
+                self._store(key, INF, 0, 1)
+            return
+
+        children = []
+        for move in moves:
+            game.push_move(move)
+            children.append(self._key(game))
+            game.pop_move()
+
+        while True:
+            pn, dn = INF, 0
+            best, second, best_pn = None, INF, 1
+            for i, child in enumerate(children):
+                entry = table.get(child)
+                child_pn, child_dn = (entry[0], entry[1]) if entry else (1, 1)
+                if child_dn < pn:
+                    second, pn = pn, child_dn
+                    best, best_pn = i, child_pn
+                elif child_dn < second:
+                    second = child_dn
+                dn += child_pn
+            dn = min(dn, INF)
+            if pn >= pn_threshold or dn >= dn_threshold or not pn or not dn:
+                break
+            child_pn = min(INF, dn_threshold - dn + best_pn)
+            child_dn = min(pn_threshold, int(second * (1 + self.EPSILON)) + 1)
+            game.push_move(moves[best])
+            self._mid(game, child_pn, child_dn)
+            game.pop_move()
+
+        self._store(key, pn, dn, self.nodes - start + 1)
+
+    def _store(self, key, pn, dn, work):
+        table = self.table
+        entry = table.get(key)
+        if entry is not None:
+            work += entry[2]
+        table[key] = (pn, dn, work)
+        if len(table) > self.max_entries:
+            self._collect()
+
+    def _collect(self):
+        """Drop the half of the table that took the fewest nodes, unsolved
+        positions first."""
+        by_work = sorted(self.table.items(), key=lambda item: (
+            not (item[1][0] and item[1][1]), item[1][2]))
+        self.table = dict(by_work[len(by_work) // 2:])
+
+
+def first_moves(width, height):
+    """Return one first move of player 1 for every symmetry class."""
+    root = BitBoard("Player1", "Player2", width, height)
+    moves = {}
+    for move in sorted(root.get_legal_moves()):
+        key = root.forecast_move(move).canonical_hash()[0]
+        moves.setdefault(key, move)
+    return sorted(moves.values())
+
+
+def solve_first_moves(width, height, solver, max_nodes=None, report=None):
+    """Solve the position after every first move of player 1.
+
+    Returns
+    -------
+    list<((int, int), str or None, int, float)>
+        The move, its value for player 1 (WIN, LOSS or None if the node
+        limit was reached), the nodes expanded and the seconds taken.
+    """
+    results = []
+    for move in first_moves(width, height):
+        game = BitBoard("Player1", "Player2", width, height)
+        game.apply_move(move)
+        start = timeit.default_timer()
+        value = solver.solve(game, max_nodes)
+        elapsed = timeit.default_timer() - start
+        if value is not None:
+            value = LOSS if value else WIN
+        results.append((move, value, solver.nodes, elapsed))
+        if report is not None:
+            report(*results[-1])
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Prove the value of every first move on small boards.")
+    parser.add_argument("-s", "--sizes", nargs="+",
+                        default=["4x4", "4x5", "5x5", "5x6", "6x6"],
+                        help="board sizes as WIDTHxHEIGHT")
+    parser.add_argument("-n", "--max-nodes", type=int, default=None,
+                        help="give up on a move after this many nodes")
+    parser.add_argument("-m", "--max-entries", type=int, default=1 << 22,
+                        help="transposition table budget in entries, of "
+                        "about {} bytes each".format(ProofSolver.ENTRY_BYTES))
+    parser.add_argument("-c", "--checkpoint-dir", default=None,
+                        help="save and resume the tables in this directory")
+    args = parser.parse_args(argv)
+
+    for size in args.sizes:
+        width, height = map(int, size.split("x"))
+        checkpoint = None
+        if args.checkpoint_dir is not None:
+            checkpoint = os.path.join(args.checkpoint_dir,
+                                      "proof_{}x{}.pkl".format(width, height))
+        solver = ProofSolver(args.max_entries, checkpoint)
+        print("{}x{} ({} positions in the table)".format(
+            width, height, len(solver.table)))
+
+        def report(move, value, nodes, seconds):
+            print("  {:<8} {:>7} {:>12} nodes {:>9.1f} s".format(
+                str(move), value or "unknown", nodes, seconds))
+
+        start = timeit.default_timer()
+        results = solve_first_moves(width, height, solver, args.max_nodes,
+                                    report)
+        if checkpoint is not None:
+            solver.save(checkpoint)
+        wins = [move for move, value, _, _ in results if value == WIN]
+        # Player 1 loses only if every first move is proven lost
+        loses = all(value == LOSS for _, value, _, _ in results)
+        print("  player 1 {}: {} of {} first moves win, {} nodes, "
+              "{:.1f} s\n".format(
+                  "wins" if wins else "loses" if loses else "?",
+                  len(wins), len(results), sum(r[2] for r in results),
+                  timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,450 @@
+"""
+Retrograde endgame tablebase for small boards.
+
+Every move blocks exactly one blank cell, so the positions with `k` blank
+cells only lead to positions with `k - 1`.  The generator starts from the
+terminal positions and solves the layers in order of increasing `k`: a
+position is won if some move leads to a lost position, and lost otherwise.
+
+The value of a position only depends on the set of blank cells S and, for
+each player, on the blank cells a knight can reach from its location (A for
+the player to move, B for the opponent): the locations themselves are never
+entered again.  Blank cells that neither player can ever reach do not
+matter either, so S is first reduced to the live cells, those connected to
+A or B by knight moves through blank cells.  Positions are stored under the
+key (S, A, B), which merges every pair of locations with the same reachable
+cells and every position that only differs in dead cells; the layer of a
+position is the number of its live cells.  Symmetric positions have the
+same value, so only the image under the board symmetry that gives the
+smallest S is stored (see `isolation.symmetry`).  A position whose player to
+move has no legal move is lost in 0 plies and is not stored.
+
+Only the sets S that can hold a position are enumerated.  Removing the live
+cell farthest (in knight moves) from both players leaves the live cells of
+a position one layer down, so the candidates for layer `k` are the sets of
+layer `k - 1` with one more cell.  Worker processes keep the finished layers
+for the whole build: each layer is written to a file once and every worker
+reads it before solving the next one.
+
+The file is a small header followed by fixed-width records sorted by key:
+
+    header  magic (8 bytes), width, height, max_open (1 byte each),
+            padding (1 byte), record count (4 bytes)
+    record  key (8 bytes), value (1 byte)
+
+The key packs S as a board mask and A and B as masks over the members of S
+(so it needs width * height + 2 * max_open bits, at most 64).  The value is
+`plies << 1 | won`, the number of plies to the end of the game with perfect
+play (the winner hurries, the loser delays) and whether the player to move
+wins.  `Tablebase` maps the file and binary-searches it in place, and
+`Tablebase.probe()` answers like `TranspositionTable.probe()`.
+
+Build a tablebase with
+
+    python -m search.tablebase [-W WIDTH] [-H HEIGHT] [-k MAX_OPEN]
+                               [-w WORKERS] [-o TABLEBASE]
+"""
+import argparse
+import mmap
+import os
+import shutil
+import struct
+import tempfile
+import timeit
+from multiprocessing import Pool
+
+from isolation.bitboard import (expand, iter_bits, knight_masks, knight_shifts,
+                                popcount)
+from isolation.symmetry import symmetries
+
+from .transposition import EXACT
+
+MAGIC = b"ISOTB001"
+HEADER = struct.Struct("<8sBBBxI")
+RECORD = struct.Struct("<QB")
+_KEY = struct.Struct("<Q")
+
+# A solved position in the layer files shared with the workers: S, A, B and
+# the value
+_LAYER = struct.Struct("<QQQB")
+_LAYER_FILE = "layer_{}.bin"
+
+TABLEBASE_FILE = "tablebase_{}x{}.bin"
+
+# The depth reported by probe(): deeper than any search can ask for
+EXACT_DEPTH = 127
+
+# The solved layers; in a worker, the directory of the layer files and the
+# number of layers read from it so far (see _worker_init())
+_SOLVED = None
+_LAYER_DIR = None
+_LAYERS_READ = 0
+
+
+def pack_key(open_cells, own, opp, cells):
+    """Pack (S, A, B) into one integer; A and B must be subsets of S."""
+    own_bits = opp_bits = 0
+    bit = 1
+    for idx in iter_bits(open_cells):
+        if own >> idx & 1:
+            own_bits |= bit
+        if opp >> idx & 1:
+            opp_bits |= bit
+        bit <<= 1
+    return open_cells | (own_bits | opp_bits * bit) << cells
+
+
+def live_cells(seeds, open_cells, shifts):
+    """Return the cells of `open_cells` connected to `seeds` by knight
+    moves through `open_cells` (`seeds` included)."""
+    live = frontier = seeds
+    while frontier:
+        frontier = expand(frontier, shifts) & open_cells & ~live
+        live |= frontier
+    return live
+
+
+def transform_mask(mask, perm):
+    """Return the image of a cell mask under a symmetry permutation."""
+    image = 0
+    for idx in iter_bits(mask):
+        image |= 1 << perm[idx]
+    return image
+
+
+def layer_sets(previous, width, height, perms):
+    """Return the canonical sets of blank cells with one more cell than a
+    set of `previous` (the sets of the layer below), sorted."""
+    cells = width * height
+    extended = {open_cells | 1 << idx for open_cells in previous
+                for idx in range(cells) if not open_cells >> idx & 1}
+    # The image of every byte of a mask under every symmetry
+    full = (1 << cells) - 1
+    tables = [[[transform_mask(byte << shift & full, perm) for byte in range(256)]
+               for shift in range(0, cells, 8)] for perm in perms[1:]]
+    sets = set()
+    for open_cells in extended:
+        best = open_cells
+        for chunks in tables:
+            image, rest = 0, open_cells
+            for table in chunks:
+                image |= table[rest & 255]
+                rest >>= 8
+            if image < best:
+                best = image
+        sets.add(best)
+    return sorted(sets)
+
+
+def canonical_key(open_cells, own, opp, perms):
+    """Return the image of (S, A, B) under the symmetry giving the
+    smallest S."""
+    best = open_cells
+    best_perm = None
+    for perm in perms[1:]:
+        image = transform_mask(open_cells, perm)
+        if image < best:
+            best, best_perm = image, perm
+    if best_perm is None:
+        return open_cells, own, opp
+    return best, transform_mask(own, best_perm), transform_mask(opp, best_perm)
+
+
+def _solve_sets(task):
+    """Solve every position whose blank cells are one of `sets`.
+
+    Returns
+    -------
+    list<((int, int, int), int)>
+        The (S, A, B) key and the value of every position with a legal move.
+    """
+    width, height, k, sets = task
+    if _LAYER_DIR is not None:
+        _read_layers(k - 1)
+    masks = knight_masks(width, height)
+    shifts = knight_shifts(width, height)
+    perms = symmetries(width, height).perms
+    solved = _SOLVED
+    cells = width * height
+    results = []
+    for open_cells in sets:
+        # The reachable blank cells from every location, and how many
+        # locations share each of them
+        reach = {}
+        for idx in range(cells):
+            if not open_cells >> idx & 1:
+                moves = masks[idx] & open_cells
+                reach[moves] = reach.get(moves, 0) + 1
+        for own in reach:
+            if not own:
+                continue
+            for opp, count in reach.items():
+                if opp == own and count < 2:
+                    continue
+                if live_cells(own | opp, open_cells, shifts) != open_cells:
+                    continue  # solved in a smaller layer
+                best = None
+                for x in iter_bits(own):
+                    rest = open_cells & ~(1 << x)
+                    child_own = opp & ~(1 << x)
+                    if child_own:
+                        child_opp = masks[x] & rest
+                        child = solved[canonical_key(
+                            live_cells(child_own | child_opp, rest, shifts),
+                            child_own, child_opp, perms)]
+                    else:
+                        child = 0  # lost in 0 plies
+                    if child & 1:
+                        value = (child >> 1) + 1 << 1
+                    else:
+                        value = (child >> 1) + 1 << 1 | 1
+                    if best is None or _better(value, best):
+                        best = value
+                results.append(((open_cells, own, opp), best))
+    return results
+
+
+def _better(a, b):
+    """Return True if value `a` is better than value `b` for the player to
+    move: a win beats a loss, a faster win beats a slower one, a slower loss
+    beats a faster one.
+    """
+    if a & 1 != b & 1:
+        return a & 1
+    if a & 1:
+        return a < b
+    return a > b
+
+
+def _worker_init(directory):
+    global _SOLVED, _LAYER_DIR, _LAYERS_READ
+    _SOLVED, _LAYER_DIR, _LAYERS_READ = {}, directory, 0
+
+
+def _read_layers(k):
+    """Add the layers up to `k` not read yet to the worker's table."""
+    global _LAYERS_READ
+    while _LAYERS_READ < k:
+        _LAYERS_READ += 1
+        path = os.path.join(_LAYER_DIR, _LAYER_FILE.format(_LAYERS_READ))
+        with open(path, "rb") as f:
+            data = f.read()
+        _SOLVED.update(((s, a, b), value)
+                       for s, a, b, value in _LAYER.iter_unpack(data))
+
+
+def _write_layer(directory, k, layer):
+    path = os.path.join(directory, _LAYER_FILE.format(k))
+    with open(path, "wb") as f:
+        f.write(b"".join(_LAYER.pack(s, a, b, value)
+                         for (s, a, b), value in layer.items()))
+
+
+def build_tablebase(width, height, max_open, workers=None, chunk=2000,
+                    report=None):
+    """Solve every position with at most `max_open` live blank cells.
+
+    Parameters
+    ----------
+    report : callable (optional)
+        Called with (blank cells, positions, seconds) after every layer.
+
+    Returns
+    -------
+    dict
+        The value of every position with a legal move, keyed by (S, A, B).
+    """
+    global _SOLVED
+    workers = workers or os.cpu_count() or 1
+    perms = symmetries(width, height).perms
+    table = {}
+    previous = [0]
+    pool = directory = None
+    if workers == 1:
+        _SOLVED = table
+    else:
+        directory = tempfile.mkdtemp(prefix="tablebase")
+        pool = Pool(workers, initializer=_worker_init, initargs=(directory,))
+    try:
+        for k in range(1, max_open + 1):
+            start = timeit.default_timer()
+            sets = layer_sets(previous, width, height, perms)
+            tasks = [(width, height, k, sets[i:i + chunk])
+                     for i in range(0, len(sets), chunk)]
+            if pool is None:
+                results = map(_solve_sets, tasks)
+            else:
+                results = pool.imap_unordered(_solve_sets, tasks)
+            layer = {}
+            for batch in results:
+                layer.update(batch)
+            table.update(layer)
+            if pool is not None and k < max_open:
+                _write_layer(directory, k, layer)
+            previous = {s for s, _, _ in layer}
+            if report is not None:
+                report(k, len(layer), timeit.default_timer() - start)
+    finally:
+        _SOLVED = None
+        if pool is not None:
+            pool.close()
+            pool.join()
+            shutil.rmtree(directory)
+    return table
+
+
+def write_tablebase(path, table, width, height, max_open):
+    """Write the table returned by build_tablebase() as a tablebase file."""
+    cells = width * height
+    if cells + 2 * max_open > 64:
+        raise ValueError("keys of a {}x{} board with {} open cells do not fit "
+                         "in 64 bits".format(width, height, max_open))
+    records = sorted((pack_key(s, a, b, cells), value)
+                     for (s, a, b), value in table.items())
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, width, height, max_open, len(records)))
+        for key, value in records:
+            f.write(RECORD.pack(key, value))
+
+
+class Tablebase(object):
+    """A read-only tablebase file mapped into memory.
+
+    Parameters
+    ----------
+    path : str
+        A tablebase written by `write_tablebase()`.
+
+    Attributes
+    ----------
+    width, height : int
+        The board size the tablebase was built for.
+
+    max_open : int
+        Positions with at most this many live blank cells are stored.
+
+    probe_limit : int
+        `covers()` accepts the positions with at most this many blank cells
+        (default 2 * max_open): positions with more blank cells than
+        max_open are still stored when enough of them are dead.
+    """
+
+    def __init__(self, path, probe_limit=None):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.width, self.height, self.max_open, self._count = \
+            HEADER.unpack_from(self._map, 0)
+        if magic != MAGIC:
+            self._map.close()
+            raise ValueError("{} is not a tablebase".format(path))
+        self.probe_limit = probe_limit or 2 * self.max_open
+        self._masks = knight_masks(self.width, self.height)
+        self._shifts = knight_shifts(self.width, self.height)
+        self._perms = symmetries(self.width, self.height).perms
+
+    def __len__(self):
+        return self._count
+
+    def __getstate__(self):
+        # The memory map cannot be pickled; workers map the file again
+        return {"path": self.path, "probe_limit": self.probe_limit}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"], state["probe_limit"])
+
+    def covers(self, game):
+        """Return True if the position is worth probing: the board has the
+        right size and at most `probe_limit` blank cells.  This is the cheap
+        test the search makes before every probe; positions with at most
+        `max_open` blank cells are always found.
+        """
+        return (game.width == self.width and game.height == self.height and
+                game.blank_count() <= self.probe_limit)
+
+    def lookup(self, game):
+        """Return (won, plies) for the player to move, or None if the
+        position has more than `max_open` live cells, another board size or
+        a player that has not moved yet.
+        """
+        if game.width != self.width or game.height != self.height:
+            return None
+        own = game.get_player_location(game.active_player)
+        opp = game.get_player_location(game.inactive_player)
+        if own is None or opp is None:
+            return None
+        height, masks = self.height, self._masks
+        open_cells = 0
+        for r, c in game.get_blank_spaces():
+            open_cells |= 1 << (r + c * height)
+        own = masks[own[0] + own[1] * height] & open_cells
+        if not own:
+            return False, 0
+        opp = masks[opp[0] + opp[1] * height] & open_cells
+        open_cells = live_cells(own | opp, open_cells, self._shifts)
+        if popcount(open_cells) > self.max_open:
+            return None
+        key = canonical_key(open_cells, own, opp, self._perms)
+        value = self._find(pack_key(*key, cells=self.width * height))
+        if value is None:
+            return None
+        return bool(value & 1), value >> 1
+
+    def probe(self, game):
+        """Return a `TranspositionTable.probe()` entry for the position,
+        exact at any depth, with the value (+inf won, -inf lost) from the
+        point of view of the player to move; None if it is not stored.
+        """
+        result = self.lookup(game)
+        if result is None:
+            return None
+        value = float("inf") if result[0] else float("-inf")
+        return EXACT_DEPTH, value, EXACT, None
+
+    def _find(self, key):
+        data, size = self._map, RECORD.size
+        lo, hi = 0, self._count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            found = _KEY.unpack_from(data, HEADER.size + mid * size)[0]
+            if found < key:
+                lo = mid + 1
+            elif found > key:
+                hi = mid
+            else:
+                return RECORD.unpack_from(data, HEADER.size + mid * size)[1]
+        return None
+
+    def close(self):
+        self._map.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build an endgame tablebase.")
+    parser.add_argument("-W", "--width", type=int, default=5)
+    parser.add_argument("-H", "--height", type=int, default=5)
+    parser.add_argument("-k", "--max-open", type=int, default=6,
+                        help="solve the positions with at most this many "
+                             "live blank cells")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("-o", "--output", default=None,
+                        help="tablebase file (default: " + TABLEBASE_FILE + ")")
+    args = parser.parse_args()
+
+    def report(k, positions, seconds):
+        print("  {:>2} live cells: {:>9} positions in {:6.1f} s".format(
+            k, positions, seconds))
+
+    path = args.output or TABLEBASE_FILE.format(args.width, args.height)
+    start = timeit.default_timer()
+    table = build_tablebase(args.width, args.height, args.max_open,
+                            args.workers, report=report)
+    write_tablebase(path, table, args.width, args.height, args.max_open)
+    print("{}: {} positions, {} bytes, built in {:.1f} s".format(
+        path, len(table), os.path.getsize(path),
+        timeit.default_timer() - start))
+
+
+if __name__ == "__main__":
+    main()
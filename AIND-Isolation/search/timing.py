@@ -0,0 +1,153 @@
+"""
+Time management for iterative deepening.
+
+Without it, `AlphaBetaPlayer.get_move()` starts a new depth whenever any time
+is left, so most moves end by throwing away a half-finished iteration when
+`SearchTimeout` is raised.  `TimeManager` decides three things per move:
+
+- the budget: a share of the turn that depends on the game phase (the
+  opening, the midgame and the endgame are told apart by `move_count` and
+  the number of blank cells)
+- whether to start the next depth: its cost is predicted as the time of
+  the last iteration times the effective branching factor of the recent
+  iterations' node counts, and a depth that cannot finish within the
+  budget is not started
+- the safety margin: instead of a fixed `TIMER_THRESHOLD`, the time between
+  the moment the search stops and the moment get_move() returns is measured
+  on every move, and the margin is a multiple of the recent worst case
+"""
+from collections import deque
+
+OPENING, MIDGAME, ENDGAME = 0, 1, 2
+
+
+class TimeManager(object):
+    """Per-move time budgets and iteration decisions for iterative deepening.
+
+    Parameters
+    ----------
+    phase_shares : (float, float, float) (optional)
+        The share of the turn (after the safety margin) that may be spent in
+        the opening, the midgame and the endgame.  Unused time is not
+        carried over between turns, so a share below 1 gives depth away for
+        nothing; the default spends the whole turn in every phase (a half
+        share in the opening lost games in benchmarks/bench_time.py).
+
+    opening_moves : int (optional)
+        Positions with fewer moves played are in the opening.
+
+    endgame_blanks : int (optional)
+        Positions with at most this many blank cells are in the endgame.
+
+    margin : float (optional)
+        The initial safety margin in milliseconds, used until `warmup`
+        latencies have been measured.
+
+    min_margin : float (optional)
+        The calibrated margin never goes below this many milliseconds.
+
+    safety : float (optional)
+        The calibrated margin is `safety` times the worst latency among the
+        last `window` moves.
+
+    default_ebf : float (optional)
+        The branching factor assumed before two iterations have completed.
+
+    Attributes
+    ----------
+    latencies : deque<float>
+        The most recent return latencies in milliseconds.
+
+    skipped : int
+        The number of depths not started because they could not finish.
+    """
+
+    def __init__(self, phase_shares=(1., 1., 1.), opening_moves=6,
+                 endgame_blanks=20, margin=12., min_margin=4., safety=2.,
+                 window=200, warmup=10, default_ebf=4.):
+        self.phase_shares = phase_shares
+        self.opening_moves = opening_moves
+        self.endgame_blanks = endgame_blanks
+        self.initial_margin = margin
+        self.min_margin = min_margin
+        self.safety = safety
+        self.warmup = warmup
+        self.default_ebf = default_ebf
+        self.latencies = deque(maxlen=window)
+        self.skipped = 0
+        self.threshold = margin
+        self._last_left = None
+
+    @property
+    def margin(self):
+        """The current safety margin in milliseconds."""
+        if len(self.latencies) < self.warmup:
+            return self.initial_margin
+        return max(self.min_margin, self.safety * max(self.latencies))
+
+    def phase(self, game):
+        """Return OPENING, MIDGAME or ENDGAME for the position."""
+        if game.move_count < self.opening_moves:
+            return OPENING
+        if game.blank_count() <= self.endgame_blanks:
+            return ENDGAME
+        return MIDGAME
+
+    def start_move(self, game, left):
+        """Plan the search of a move with `left` milliseconds on the clock.
+
+        Returns
+        -------
+        float
+            The number of milliseconds left at which the search must stop
+            (the player's TIMER_THRESHOLD for this move).
+        """
+        margin = self.margin
+        budget = self.phase_shares[self.phase(game)] * max(0., left - margin)
+        self.threshold = max(margin, left - budget)
+        self._last_left = left
+        return self.threshold
+
+    def next_depth(self, depth_nodes, left, best_score=None):
+        """Decide after a completed iteration whether to search one deeper.
+
+        Parameters
+        ----------
+        depth_nodes : list<int>
+            The node counts of the iterations completed so far.
+
+        left : float
+            The milliseconds left on the clock.
+
+        best_score : float (optional)
+            The score of the best root move; a won or lost position (an
+            infinite score) is not searched any deeper.
+
+        Returns
+        -------
+        bool
+        """
+        elapsed, self._last_left = self._last_left - left, left
+        if best_score is not None and abs(best_score) == float("inf"):
+            return False
+        if not depth_nodes or not depth_nodes[-1]:
+            return True
+        recent = depth_nodes[-4:]
+        ratios = [b / a for a, b in zip(recent, recent[1:]) if a]
+        ebf = self.default_ebf
+        if ratios:
+            product = 1.
+            for r in ratios:
+                product *= r
+            ebf = max(1., product ** (1. / len(ratios)))
+        predicted = elapsed * ebf
+        if predicted > left - self.threshold:
+            self.skipped += 1
+            return False
+        return True
+
+    def end_move(self, latency):
+        """Record the milliseconds between the stop of the search and the
+        return of get_move().
+        """
+        self.latencies.append(max(0., latency))
@@ -0,0 +1,160 @@
+"""
+Bounded-memory transposition table keyed by `Board.hash()`.
+
+The table is a fixed number of two-slot buckets held in flat `array`s, so its
+memory use is set once at construction and never grows.  The first slot of
+each bucket is depth-preferred (it keeps the entry searched to the greatest
+depth), the second is always-replace (it takes whatever the first slot
+rejected), which keeps both deep results and recent ones.
+
+Every entry records the `move_count` of its position.  Positions with fewer
+moves than the current root can never be reached again, so `new_search()`
+marks them stale and they are overwritten first.
+"""
+from array import array
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Bytes per slot: key (8), value (8), depth (1), flag (1), move (2),
+# move_count (2)
+SLOT_BYTES = 22
+
+_EMPTY = -1
+_NO_MOVE = 0xFFFF
+
+
+def pack_move(move):
+    """Encode a (row, column) move as a 16-bit integer."""
+    if move is None or move == ():
+        return _NO_MOVE
+    return move[0] << 8 | move[1]
+
+
+def unpack_move(packed):
+    """Decode a move encoded by pack_move()."""
+    if packed == _NO_MOVE:
+        return None
+    return (packed >> 8, packed & 0xFF)
+
+
+class TranspositionTable(object):
+    """Fixed-size transposition table with depth-preferred and
+    always-replace slots.
+
+    Parameters
+    ----------
+    size_mb : float
+        Memory budget for the table in megabytes.
+
+    Attributes
+    ----------
+    probes, hits, stores : int
+        Counters for reporting the hit rate; reset with `reset_stats()`.
+    """
+
+    def __init__(self, size_mb=16):
+        self.buckets = max(1, int(size_mb * 2 ** 20) // (2 * SLOT_BYTES))
+        slots = 2 * self.buckets
+        self._keys = array('Q', bytes(8 * slots))
+        self._values = array('d', bytes(8 * slots))
+        self._depths = array('b', [_EMPTY]) * slots
+        self._flags = array('b', bytes(slots))
+        self._moves = array('H', [_NO_MOVE]) * slots
+        self._move_counts = array('H', bytes(2 * slots))
+        self.root_move_count = 0
+        self.reset_stats()
+
+    def __len__(self):
+        """Return the number of live (non-stale) entries."""
+        root = self.root_move_count
+        return sum(1 for d, c in zip(self._depths, self._move_counts)
+                   if d != _EMPTY and c >= root)
+
+    def reset_stats(self):
+        self.probes = 0
+        self.hits = 0
+        self.stores = 0
+
+    def hit_rate(self):
+        """Return the fraction of probes that found an entry."""
+        return self.hits / self.probes if self.probes else 0.
+
+    def clear(self):
+        """Remove every entry from the table."""
+        slots = 2 * self.buckets
+        self._depths = array('b', [_EMPTY]) * slots
+        self.root_move_count = 0
+
+    def new_search(self, move_count):
+        """Prepare the table for a search from a root with `move_count` moves.
+
+        Entries for positions with fewer moves can no longer occur and become
+        stale.  A root with fewer moves than the previous one means a new
+        game has started, and the whole table is cleared because the stored
+        values may belong to the other side.
+        """
+        if move_count < self.root_move_count:
+            self.clear()
+        self.root_move_count = move_count
+
+    def probe(self, key):
+        """Look up a position.
+
+        Returns
+        -------
+        (int, float, int, (int, int)) or None
+            The stored (depth, value, flag, best move) for the position, or
+            None if it is not in the table.  The best move is None when no
+            move was recorded.
+        """
+        self.probes += 1
+        i = 2 * (key % self.buckets)
+        keys = self._keys
+        if keys[i] != key or self._depths[i] == _EMPTY:
+            i += 1
+            if keys[i] != key or self._depths[i] == _EMPTY:
+                return None
+        self.hits += 1
+        return (self._depths[i], self._values[i], self._flags[i],
+                unpack_move(self._moves[i]))
+
+    def store(self, key, depth, value, flag, move, move_count):
+        """Record the result of searching a position to `depth` plies.
+
+        Parameters
+        ----------
+        key : int
+            The position hash (`Board.hash()`).
+
+        depth : int
+            The remaining search depth below the position.
+
+        value : float
+            The search result.
+
+        flag : int
+            EXACT, LOWER (value is a lower bound) or UPPER (upper bound).
+
+        move : (int, int) or None
+            The best move found, if any.
+
+        move_count : int
+            `Board.move_count` of the position.
+        """
+        self.stores += 1
+        i = 2 * (key % self.buckets)
+        old_depth = self._depths[i]
+        if not (old_depth == _EMPTY or self._keys[i] == key or
+                depth >= old_depth or
+                self._move_counts[i] < self.root_move_count):
+            i += 1
+        elif self._keys[i + 1] == key:
+            # The position moves to the depth-preferred slot: drop its older
+            # copy so that it cannot resurface when this slot is replaced
+            self._depths[i + 1] = _EMPTY
+        self._keys[i] = key
+        self._values[i] = value
+        self._depths[i] = min(depth, 127)
+        self._flags[i] = flag
+        self._moves[i] = pack_move(move)
+        self._move_counts[i] = move_count
@@ -0,0 +1,396 @@
+"""Generate training positions by self-play.
+
+Games between two agents (any players from sample_players.py and
+game_agent.py, or the named agents of the tournament) are played through
+`Board.play()` on a process pool, and every move an agent makes is stored as
+one fixed-width binary record of 17 bytes:
+
+    blocked    the cells that are not blank, bit `row + col * height` set
+               (8 bytes)
+    score      the agent's search score for the move, from its own point of
+               view (`AlphaBetaPlayer.root_scores`); NaN for agents that do
+               not search or did not search this move (4-byte float)
+    locations  the cell index of player 1 and of player 2 (NO_CELL before
+               their first move), 1 byte each
+    side       the side to move, 0 for player 1 (1 byte)
+    move       the cell index of the move chosen (1 byte)
+    result     1 if the side to move won the game, -1 if it lost (1 byte)
+
+Each game starts from `opening_plies` random moves, which are not recorded.
+The result of a game is only known at its end, so a worker keeps the records
+of its current game and sends them to the writer when the game ends.  The
+writer appends them to chunk files of at most `chunk_records` records,
+positions-00000.bin, positions-00001.bin, ..., each starting with a small
+header (magic, width, height).  Memory use is bounded by one game per worker
+and the write buffer, however many games are played.  New chunks are
+numbered after those already in the directory, so runs with other seeds add
+to a dataset.
+
+`DatasetReader` maps the chunks into memory and reads any record in O(1).
+It iterates over every record or over a uniform random sample, both as
+generators, without reading whole files.
+
+Usage: python selfplay.py [-n GAMES] [-1 AGENT] [-2 AGENT] [-w WORKERS]
+                          [-o DIRECTORY] [-c CHUNK_RECORDS] [-t TIME_LIMIT]
+                          [-s SEED] [-W WIDTH] [-H HEIGHT]
+"""
+import argparse
+import bisect
+import glob
+import mmap
+import os
+import pickle
+import random
+import struct
+from collections import namedtuple
+from multiprocessing import Pool
+
+from isolation import Board
+from isolation.isolation import TIME_LIMIT_MILLIS
+from sample_players import GreedyPlayer
+from tournament import (Agent, OPENING_PLIES, test_agents, cpu_agents,
+                        seed_for)
+
+MAGIC = b"ISOPOS01"
+HEADER = struct.Struct("<8sBB")
+RECORD = struct.Struct("<QfBBBBb")
+NO_CELL = 255
+
+CHUNK_RECORDS = 1 << 20  # 17 MB chunks
+CHUNK_NAME = "positions-{:05d}.bin"
+DATASET_DIR = "selfplay"
+
+# One stored move: the bitmask of the blocked cells, the (row, column)
+# location of player 1 and player 2 (None before their first move), the side
+# to move (0 for player 1), the (row, column) move chosen, the search score
+# and the result for the side to move (1 won, -1 lost)
+Position = namedtuple("Position", ["blocked", "locations", "side", "move",
+                                   "score", "result"])
+
+# The settings of a self-play run, sent once to every worker process
+_config = None
+
+
+def chunk_paths(directory):
+    """Return the chunk files of the dataset in `directory`, in order."""
+    return sorted(glob.glob(os.path.join(directory, "positions-*.bin")))
+
+
+def search_score(player, move):
+    """Return the score of `move` in the last search of `player` (NaN if it
+    has none, e.g. the move came from an opening book or endgame solver).
+    """
+    if getattr(player, "from_book", False) or getattr(
+            player, "endgame_solved", False):
+        return float("nan")
+    return getattr(player, "root_scores", {}).get(move, float("nan"))
+
+
+def position_fields(game, move):
+    """Return the record fields of `game` before `move`, except the score
+    and the result: (blocked, player 1 cell, player 2 cell, side, move cell).
+    """
+    height = game.height
+    blocked = (1 << game.width * height) - 1
+    for r, c in game.get_blank_spaces():
+        blocked ^= 1 << r + c * height
+    # Player 1 moves when the move count is even
+    side = game.move_count % 2
+    players = (game.active_player, game.inactive_player)
+    if side:
+        players = players[::-1]
+    cells = []
+    for player in players:
+        location = game.get_player_location(player)
+        cells.append(NO_CELL if location is None else
+                     location[0] + location[1] * height)
+    return blocked, cells[0], cells[1], side, move[0] + move[1] * height
+
+
+def _init_worker(config):
+    global _config
+    _config = config
+
+
+def _play_game(index):
+    """Play game `index` of the run configured by _init_worker(); return its
+    records packed as bytes.
+    """
+    config = _config
+    player_1, player_2 = pickle.loads(config["players"])
+    seed = seed_for("{}:{}".format(config["seed"], index))
+    # The random move order of Board.get_legal_moves() follows the game too
+    random.seed(seed)
+    rng = random.Random(seed)
+    board = Board(player_1, player_2, config["width"], config["height"])
+    for _ in range(config["opening_plies"]):
+        board.apply_move(rng.choice(sorted(board.get_legal_moves())))
+
+    moves = []
+
+    def record(game, move):
+        blocked, cell_1, cell_2, side, cell = position_fields(game, move)
+        moves.append((blocked, search_score(game.active_player, move),
+                      cell_1, cell_2, side, cell))
+
+    winner, _, _ = board.play(config["time_limit"], on_move=record)
+    winning_side = 0 if winner is player_1 else 1
+    return b"".join(RECORD.pack(*fields, 1 if fields[4] == winning_side
+                                else -1) for fields in moves)
+
+
+class DatasetWriter(object):
+    """Append packed records to the chunk files of a dataset.
+
+    Parameters
+    ----------
+    directory : str
+        The dataset directory; it is created if needed.
+
+    width, height : int
+        The board size of the positions, stored in every chunk header.
+
+    chunk_records : int (optional)
+        The number of records per chunk file.
+
+    Attributes
+    ----------
+    records : int
+        The number of records written.
+
+    paths : list<str>
+        The chunk files written.
+    """
+
+    def __init__(self, directory, width, height, chunk_records=CHUNK_RECORDS):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.width = width
+        self.height = height
+        self.chunk_records = chunk_records
+        self.records = 0
+        self.paths = []
+        existing = chunk_paths(directory)
+        self._next_chunk = (int(os.path.basename(existing[-1])[10:15]) + 1
+                            if existing else 0)
+        self._file = None
+        self._left = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def write(self, data):
+        """Write packed records (a multiple of RECORD.size bytes), starting
+        new chunks as needed.
+        """
+        data = memoryview(data)
+        while data:
+            if not self._left:
+                self._start_chunk()
+            size = min(self._left, len(data) // RECORD.size) * RECORD.size
+            self._file.write(data[:size])
+            data = data[size:]
+            self._left -= size // RECORD.size
+            self.records += size // RECORD.size
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+            self._left = 0
+
+    def _start_chunk(self):
+        self.close()
+        path = os.path.join(self.directory,
+                            CHUNK_NAME.format(self._next_chunk))
+        self._next_chunk += 1
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, self.width, self.height))
+        self._left = self.chunk_records
+        self.paths.append(path)
+
+
+class DatasetReader(object):
+    """The records of dataset chunks, mapped into memory.
+
+    A partially written last record (from an interrupted run) is ignored.
+
+    Parameters
+    ----------
+    paths : str or list<str>
+        A dataset directory, or a list of chunk files.
+
+    Attributes
+    ----------
+    width, height : int
+        The board size of the positions (None for an empty dataset).
+    """
+
+    # Records unpacked per read while iterating
+    BLOCK_RECORDS = 4096
+
+    def __init__(self, paths):
+        if isinstance(paths, str):
+            paths = chunk_paths(paths) if os.path.isdir(paths) else [paths]
+        self.width = self.height = None
+        self._maps = []
+        self._counts = []
+        self._starts = []
+        total = 0
+        for path in paths:
+            with open(path, "rb") as f:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps.append(data)
+            if len(data) < HEADER.size or data[:len(MAGIC)] != MAGIC:
+                self.close()
+                raise ValueError("{} is not a position dataset".format(path))
+            _, width, height = HEADER.unpack_from(data, 0)
+            if self.width is None:
+                self.width, self.height = width, height
+            elif (width, height) != (self.width, self.height):
+                self.close()
+                raise ValueError("{} holds {}x{} positions, not {}x{}".format(
+                    path, width, height, self.width, self.height))
+            self._starts.append(total)
+            self._counts.append((len(data) - HEADER.size) // RECORD.size)
+            total += self._counts[-1]
+        self._total = total
+        height = self.height or 0
+        self._cells = [None] * (NO_CELL + 1)
+        for idx in range((self.width or 0) * height):
+            self._cells[idx] = (idx % height, idx // height)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self._total
+
+    def __getitem__(self, index):
+        """Return record `index` (in chunk order) as a Position, in O(1)."""
+        if not 0 <= index < self._total:
+            raise IndexError("record index out of range")
+        chunk = bisect.bisect_right(self._starts, index) - 1
+        return self._decode(RECORD.unpack_from(
+            self._maps[chunk],
+            HEADER.size + (index - self._starts[chunk]) * RECORD.size))
+
+    def __iter__(self):
+        """Yield every record as a Position, in chunk order, reading
+        BLOCK_RECORDS records at a time.
+        """
+        block = self.BLOCK_RECORDS * RECORD.size
+        for data, count in zip(self._maps, self._counts):
+            end = HEADER.size + count * RECORD.size
+            for start in range(HEADER.size, end, block):
+                for fields in RECORD.iter_unpack(
+                        data[start:min(start + block, end)]):
+                    yield self._decode(fields)
+
+    def sample(self, count, rng=random):
+        """Yield `count` distinct records drawn uniformly at random, in
+        random order.
+        """
+        for index in rng.sample(range(self._total), count):
+            yield self[index]
+
+    def close(self):
+        for data in self._maps:
+            data.close()
+        self._maps = []
+
+    def _decode(self, fields):
+        blocked, score, cell_1, cell_2, side, move, result = fields
+        cells = self._cells
+        return Position(blocked, (cells[cell_1], cells[cell_2]), side,
+                        cells[move], score, result)
+
+
+def generate(player_1, player_2, games, directory=DATASET_DIR, workers=None,
+             chunk_records=CHUNK_RECORDS, time_limit=TIME_LIMIT_MILLIS,
+             opening_plies=OPENING_PLIES, seed=0, width=7, height=7):
+    """Play `games` games of `player_1` against `player_2` and stream their
+    positions to the dataset in `directory`.
+
+    Parameters
+    ----------
+    player_1, player_2 : object
+        The players; every game starts from fresh copies (they are pickled).
+
+    workers : int (optional)
+        The number of processes; defaults to the number of CPU cores.  With
+        1 worker the games are played in this process.
+
+    seed : int (optional)
+        Game `i` of the run gets the seed derived from (seed, i), for the
+        opening and the random move order of `Board.get_legal_moves()`.
+
+    Returns
+    -------
+    int
+        The number of positions written.
+    """
+    if width * height > 64:
+        raise ValueError("a {}x{} board does not fit in 64 bits".format(
+            width, height))
+    config = {"players": pickle.dumps((player_1, player_2)), "seed": seed,
+              "width": width, "height": height, "time_limit": time_limit,
+              "opening_plies": opening_plies}
+    workers = workers or os.cpu_count() or 1
+    with DatasetWriter(directory, width, height, chunk_records) as writer:
+        if workers == 1 or games <= 1:
+            _init_worker(config)
+            for data in map(_play_game, range(games)):
+                writer.write(data)
+        else:
+            with Pool(min(workers, games), _init_worker, (config,)) as pool:
+                for data in pool.imap_unordered(_play_game, range(games)):
+                    writer.write(data)
+    return writer.records
+
+
+def named_agents():
+    """The agents that can be chosen by name on the command line."""
+    agents = cpu_agents() + test_agents() + [Agent(GreedyPlayer(), "Greedy")]
+    return {agent.name: agent.player for agent in agents}
+
+
+def main():
+    agents = named_agents()
+    parser = argparse.ArgumentParser(
+        description="Generate training positions by self-play.")
+    parser.add_argument("-n", "--games", type=int, default=100)
+    parser.add_argument("-1", "--player-1", choices=sorted(agents),
+                        default="AB_Improved")
+    parser.add_argument("-2", "--player-2", choices=sorted(agents),
+                        default="AB_Improved")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("-o", "--output", default=DATASET_DIR,
+                        help="dataset directory the chunks are written to")
+    parser.add_argument("-c", "--chunk-records", type=int,
+                        default=CHUNK_RECORDS, help="records per chunk file")
+    parser.add_argument("-t", "--time-limit", type=float,
+                        default=TIME_LIMIT_MILLIS,
+                        help="milliseconds per move")
+    parser.add_argument("-s", "--seed", type=int, default=0)
+    parser.add_argument("-W", "--width", type=int, default=7)
+    parser.add_argument("-H", "--height", type=int, default=7)
+    args = parser.parse_args()
+
+    positions = generate(agents[args.player_1], agents[args.player_2],
+                         args.games, args.output, args.workers,
+                         args.chunk_records, args.time_limit,
+                         seed=args.seed, width=args.width, height=args.height)
+    print("{}: {} positions from {} games".format(args.output, positions,
+                                                  args.games))
+
+
+if __name__ == "__main__":
+    main()
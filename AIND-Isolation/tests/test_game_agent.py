@@ -3,10 +3,12 @@ tests to run and debug your minimax and alphabeta agents locally.  The test
 cases used by the project assistant are not public.
 """
 
+import random
 import unittest
 
 import isolation
 import game_agent
+import sample_players
 
 from importlib import reload
 
@@ -25,5 +27,143 @@ class IsolationTest(unittest.TestCase):
         self.fail("Hello, World!")
 
 
+def play_opening(game, moves):
+    for move in moves:
+        game.apply_move(move)
+    return game
+
+
+class InPlaceSearchTest(unittest.TestCase):
+    """The in-place search variants must visit the same tree as the
+    forecast_move() players and leave the board untouched."""
+
+    opening = [(2, 3), (0, 5), (4, 4), (1, 3), (6, 5), (3, 1)]
+
+    def check_same_move(self, reference, in_place, depth, search):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed in range(3):
+                results = []
+                for player in (reference, in_place):
+                    player.time_left = lambda: float("inf")
+                    game = play_opening(board_cls(player, "Opponent"), self.opening)
+                    before = game.to_string(), game.hash(), game.move_count
+                    random.seed(seed)
+                    results.append(getattr(player, search)(game, depth))
+                    self.assertEqual((game.to_string(), game.hash(), game.move_count), before)
+                self.assertEqual(results[0], results[1])
+
+    def test_minimax(self):
+        self.check_same_move(game_agent.MinimaxPlayer(),
+                             game_agent.InPlaceMinimaxPlayer(), 3, "minimax")
+
+    def test_alphabeta(self):
+        self.check_same_move(game_agent.AlphaBetaPlayer(),
+                             game_agent.InPlaceAlphaBetaPlayer(), 5, "alphabeta")
+
+    def test_timeout_restores_board(self):
+        player = game_agent.InPlaceAlphaBetaPlayer()
+        game = play_opening(isolation.Board(player, "Opponent"), self.opening)
+        before = game.to_string(), game.hash(), game.move_count
+        calls = [0]
+
+        def time_left():
+            calls[0] += 1
+            return 1000. if calls[0] < 500 else 0.
+
+        move = player.get_move(game, time_left)
+        self.assertIn(move, game.get_legal_moves())
+        self.assertEqual((game.to_string(), game.hash(), game.move_count), before)
+
+
+@unittest.skipIf(game_agent.MobilityBatch is None, "numpy is not installed")
+class BatchScoreTest(unittest.TestCase):
+    """The batch heuristics return exactly the scalar scores, and the
+    players that use them make the same moves."""
+
+    heuristics = [sample_players.null_score, sample_players.open_move_score,
+                  sample_players.improved_score, sample_players.center_score,
+                  game_agent.custom_score, game_agent.custom_score_2,
+                  game_agent.custom_score_3]
+
+    def test_children(self):
+        MobilityBatch = game_agent.MobilityBatch
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 6)]):
+                rng = random.Random(seed)
+                game = board_cls("Player1", "Player2", width, height)
+                # From the third move on, when the locations are known
+                play_opening(game, [(0, 0), (height - 1, width - 1)])
+                while True:
+                    moves = game.get_legal_moves()
+                    children = [game.forecast_move(m) for m in moves]
+                    for player in ("Player1", "Player2"):
+                        batch = MobilityBatch.from_children(game, player, moves)
+                        for fn in self.heuristics:
+                            expected = [fn(child, player) for child in children]
+                            self.assertEqual(fn.batch(batch).tolist(), expected)
+                            boards = MobilityBatch.from_boards(children, player)
+                            self.assertEqual(fn.batch(boards).tolist(), expected)
+                    if not moves:
+                        break
+                    game.apply_move(rng.choice(sorted(moves)))
+
+    def test_unplaced_players(self):
+        # Before both players have moved, the heuristics that read the
+        # locations raise, and the others score the blank cells as moves
+        MobilityBatch = game_agent.MobilityBatch
+        for opening in ([], [(3, 3)]):
+            game = play_opening(isolation.Board("Player1", "Player2"), opening)
+            moves = game.get_legal_moves()
+            children = [game.forecast_move(m) for m in moves]
+            for player in ("Player1", "Player2"):
+                for positions, batch in [
+                        ([game], MobilityBatch.from_boards([game], player)),
+                        (children, MobilityBatch.from_boards(children, player)),
+                        (children, MobilityBatch.from_children(game, player, moves))]:
+                    for fn in self.heuristics:
+                        try:
+                            expected = [fn(position, player) for position in positions]
+                        except TypeError:
+                            self.assertRaises(TypeError, fn.batch, batch)
+                        else:
+                            self.assertEqual(fn.batch(batch).tolist(), expected)
+
+    def test_greedy_player(self):
+        for seed in range(5):
+            rng = random.Random(seed)
+            moves = []
+            game = isolation.Board("Player1", "Player2")
+            for _ in range(2 + 2 * seed):
+                moves.append(rng.choice(sorted(game.get_legal_moves())))
+                game.apply_move(moves[-1])
+            for score_fn in self.heuristics[1:]:
+                results = []
+                for player in (sample_players.GreedyPlayer(score_fn),
+                               sample_players.GreedyPlayer(score_fn, batch=True)):
+                    game = play_opening(isolation.Board(player, "Opponent"), moves)
+                    results.append(player.get_move(game, None))
+                self.assertEqual(results[0], results[1])
+
+    def test_batch_leaves(self):
+        opening = InPlaceSearchTest.opening
+        for options in [{}, {"pvs": True},
+                        {"tt_size_mb": 1, "move_ordering": True, "pv_reuse": True}]:
+            for score_fn in (game_agent.custom_score, game_agent.custom_score_3):
+                for seed in range(2):
+                    results = []
+                    for batch_leaves in (False, True):
+                        player = game_agent.AlphaBetaPlayer(
+                            score_fn=score_fn, batch_leaves=batch_leaves, **options)
+                        player.time_left = lambda: float("inf")
+                        game = play_opening(isolation.Board(player, "Opponent"), opening)
+                        random.seed(seed)
+                        results.append(player.alphabeta(game, 4))
+                    self.assertEqual(results[0], results[1])
+
+    def test_needs_batch_version(self):
+        self.assertRaises(ValueError, game_agent.AlphaBetaPlayer,
+                          score_fn=lambda game, player: 0., batch_leaves=True)
+
+
 if __name__ == '__main__':
     unittest.main()
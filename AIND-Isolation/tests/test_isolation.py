@@ -0,0 +1,615 @@
+"""Unit tests for the isolation.Board backends."""
+
+import os
+import random
+import shutil
+import tempfile
+import timeit
+import unittest
+
+import isolation
+from isolation import records
+from isolation.zobrist import zobrist_keys
+from sample_players import RandomPlayer, GreedyPlayer
+
+try:
+    import numpy
+    from isolation import vectorized
+except ImportError:
+    numpy = vectorized = None
+
+
+def random_game(board_cls, seed, width=7, height=7):
+    """Yield every position of a random game played out on `board_cls`."""
+    rng = random.Random(seed)
+    game = board_cls("Player1", "Player2", width=width, height=height)
+    yield game
+    while True:
+        legal_moves = sorted(game.get_legal_moves())
+        if not legal_moves:
+            return
+        game.apply_move(rng.choice(legal_moves))
+        yield game
+
+
+class BitBoardTest(unittest.TestCase):
+    """Check that BitBoard behaves exactly like the list-based Board"""
+
+    def assertSameState(self, board, bitboard):
+        for player in ("Player1", "Player2"):
+            self.assertEqual(sorted(board.get_legal_moves(player)),
+                             sorted(bitboard.get_legal_moves(player)))
+            self.assertEqual(board.get_player_location(player),
+                             bitboard.get_player_location(player))
+            self.assertEqual(board.is_winner(player), bitboard.is_winner(player))
+            self.assertEqual(board.is_loser(player), bitboard.is_loser(player))
+            self.assertEqual(board.utility(player), bitboard.utility(player))
+            self.assertEqual(len(board.get_legal_moves(player)),
+                             bitboard.mobility(player))
+        self.assertEqual(board.get_blank_spaces(), bitboard.get_blank_spaces())
+        self.assertEqual(board.active_player, bitboard.active_player)
+        self.assertEqual(board.move_count, bitboard.move_count)
+        self.assertEqual(board.to_string(), bitboard.to_string())
+
+    def test_random_games(self):
+        for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4), (4, 6)] * 5):
+            games = zip(random_game(isolation.Board, seed, width, height),
+                        random_game(isolation.BitBoard, seed, width, height))
+            for board, bitboard in games:
+                self.assertSameState(board, bitboard)
+
+    def test_state_round_trip(self):
+        for seed, (width, height) in enumerate([(7, 7), (5, 6)]):
+            games = zip(random_game(isolation.Board, seed, width, height),
+                        random_game(isolation.BitBoard, seed, width, height))
+            for board, bitboard in games:
+                self.assertEqual(board.to_state(), bitboard.to_state())
+                moves = sorted(board.get_legal_moves())
+                for board_cls in (isolation.Board, isolation.BitBoard):
+                    copy = board_cls.from_state("Player1", "Player2",
+                                                board.to_state(), width, height)
+                    # Compare each copy with the original of the other class,
+                    # before and after one more move
+                    for move in [None] + moves[-1:]:
+                        original, bit_original = board, bitboard
+                        if move is not None:
+                            copy.apply_move(move)
+                            original = board.forecast_move(move)
+                            bit_original = bitboard.forecast_move(move)
+                        if board_cls is isolation.Board:
+                            pair = (copy, bit_original)
+                        else:
+                            pair = (original, copy)
+                        self.assertSameState(*pair)
+                        self.assertEqual(pair[0].hash(), pair[1].hash())
+
+    def test_move_is_legal(self):
+        game = isolation.BitBoard("Player1", "Player2")
+        game.apply_move((2, 3))
+        self.assertFalse(game.move_is_legal((2, 3)))
+        self.assertFalse(game.move_is_legal((-1, 0)))
+        self.assertFalse(game.move_is_legal((0, 7)))
+        self.assertTrue(game.move_is_legal((0, 0)))
+
+    def test_copy_is_independent(self):
+        game = isolation.BitBoard("Player1", "Player2")
+        game.apply_move((0, 0))
+        child = game.forecast_move((3, 3))
+        self.assertEqual(game.move_count, 1)
+        self.assertEqual(child.move_count, 2)
+        self.assertTrue(game.move_is_legal((3, 3)))
+        self.assertFalse(child.move_is_legal((3, 3)))
+        self.assertIsInstance(child, isolation.BitBoard)
+
+
+class ZobristHashTest(unittest.TestCase):
+    """Check the incremental Zobrist hash against a full recomputation"""
+
+    def full_hash(self, game):
+        keys = zobrist_keys(game.width, game.height)
+        value = 0
+        for idx in range(game.width * game.height):
+            if not game.move_is_legal((idx % game.height, idx // game.height)):
+                value ^= keys.blocked[idx]
+        for i, player in enumerate(("Player1", "Player2")):
+            loc = game.get_player_location(player)
+            if loc is not None:
+                value ^= keys.location[i][loc[0] + loc[1] * game.height]
+        if game.active_player == "Player2":
+            value ^= keys.side
+        return value
+
+    def test_incremental_matches_full(self):
+        for seed in range(10):
+            games = zip(random_game(isolation.Board, seed),
+                        random_game(isolation.BitBoard, seed))
+            for board, bitboard in games:
+                self.assertEqual(board.hash(), self.full_hash(board))
+                self.assertEqual(board.hash(), bitboard.hash())
+                self.assertEqual(board.copy().hash(), board.hash())
+
+    def test_distinct_states(self):
+        game = isolation.Board("Player1", "Player2")
+        game.apply_move((0, 0))
+        children = [game.forecast_move(m) for m in game.get_legal_moves()]
+        hashes = set(child.hash() for child in children)
+        self.assertEqual(len(hashes), len(children))
+        self.assertNotIn(game.hash(), hashes)
+
+    def test_transposition(self):
+        # Player 1 reaches (3, 4) through the same cells in a different order
+        first = isolation.Board("Player1", "Player2")
+        second = isolation.Board("Player1", "Player2")
+        for move in [(2, 2), (6, 6), (3, 0), (4, 5), (4, 2), (2, 6), (3, 4)]:
+            first.apply_move(move)
+        for move in [(4, 2), (6, 6), (3, 0), (4, 5), (2, 2), (2, 6), (3, 4)]:
+            second.apply_move(move)
+        self.assertEqual(first.to_string(), second.to_string())
+        self.assertEqual(first.hash(), second.hash())
+
+
+class SymmetryTest(unittest.TestCase):
+    """Transformed boards match games replayed with transformed moves, and
+    all symmetric images share one canonical hash"""
+
+    def test_symmetry_count(self):
+        for (width, height), count in [((7, 7), 8), ((5, 5), 8), ((6, 4), 4)]:
+            self.assertEqual(isolation.Board("Player1", "Player2", width,
+                                             height).symmetries.count, count)
+
+    def test_transform_matches_replay(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (6, 4)]):
+                sym = board_cls("Player1", "Player2", width, height).symmetries
+                images = [board_cls("Player1", "Player2", width, height)
+                          for _ in range(sym.count)]
+                for game in random_game(board_cls, seed, width, height):
+                    if game.move_count:
+                        move = game.get_player_location(game.inactive_player)
+                        for t, image in enumerate(images):
+                            image.apply_move(sym.transform_move(move, t))
+                    canonical = game.canonical_hash()
+                    for t, image in enumerate(images):
+                        transformed = game.transform(t)
+                        self.assertEqual(transformed.hash(), image.hash())
+                        self.assertEqual(transformed.to_string(), image.to_string())
+                        self.assertEqual(image.canonical_hash()[0], canonical[0])
+                        self.assertEqual(transformed.mobility_summary("Player1")[:4],
+                                         game.mobility_summary("Player1")[:4])
+                    self.assertEqual(game.transform(canonical[1]).hash(),
+                                     canonical[0])
+
+    def test_lazy_tracking(self):
+        """Symmetric hashes switched on in the middle of a push_move() line
+        match a board that tracked them from the start, also after popping
+        back past the switch"""
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            rng = random.Random(0)
+            for _ in range(20):
+                lazy = board_cls("Player1", "Player2")
+                eager = board_cls("Player1", "Player2")
+                eager.canonical_hash()
+                moves = 0
+                while moves < 12 and lazy.get_legal_moves():
+                    move = rng.choice(sorted(lazy.get_legal_moves()))
+                    for game in (lazy, eager):
+                        if moves < 4:
+                            game.apply_move(move)
+                        else:
+                            game.push_move(move)
+                    self.assertEqual(lazy.hash(), eager.hash())
+                    moves += 1
+                self.assertEqual(lazy.to_state(), eager.to_state())
+                self.assertEqual(lazy.canonical_hash(), eager.canonical_hash())
+                while moves > 4:
+                    lazy.pop_move()
+                    eager.pop_move()
+                    self.assertEqual(lazy.canonical_hash(), eager.canonical_hash())
+                    moves -= 1
+
+    def test_move_round_trip(self):
+        for width, height in [(7, 7), (6, 4)]:
+            sym = isolation.Board("Player1", "Player2", width, height).symmetries
+            for t in range(sym.count):
+                for r in range(height):
+                    for c in range(width):
+                        image = sym.transform_move((r, c), t)
+                        self.assertEqual(sym.inverse_move(image, t), (r, c))
+
+
+class UndoTest(unittest.TestCase):
+    """Check that pop_move() exactly reverts push_move()"""
+
+    def snapshot(self, game):
+        return (game.to_string(), game.hash(), game.move_count,
+                game.active_player, game.inactive_player,
+                game.get_player_location("Player1"),
+                game.get_player_location("Player2"),
+                sorted(game.get_legal_moves()))
+
+    def walk(self, game, depth):
+        before = self.snapshot(game)
+        for m in sorted(game.get_legal_moves())[:3]:
+            expected = self.snapshot(game.forecast_move(m))
+            game.push_move(m)
+            self.assertEqual(self.snapshot(game), expected)
+            if depth > 1:
+                self.walk(game, depth - 1)
+            game.pop_move()
+            self.assertEqual(self.snapshot(game), before)
+
+    def test_push_pop(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls("Player1", "Player2")
+            self.walk(game, 4)
+            game.apply_move((3, 3))
+            game.apply_move((0, 0))
+            self.walk(game, 5)
+
+    def test_copy_does_not_share_undo(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls("Player1", "Player2")
+            game.push_move((3, 3))
+            child = game.copy()
+            self.assertRaises(IndexError, child.pop_move)
+            game.pop_move()
+            self.assertEqual(game.move_count, 0)
+            self.assertEqual(child.move_count, 1)
+
+
+class MobilitySummaryTest(unittest.TestCase):
+    """mobility_summary() agrees with the separate Board queries"""
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4)] * 3):
+                for game in random_game(board_cls, seed, width, height):
+                    for player in ("Player1", "Player2"):
+                        opponent = game.get_opponent(player)
+                        self.assertEqual(game.mobility_summary(player), (
+                            game.utility(player),
+                            len(game.get_legal_moves(player)),
+                            len(game.get_legal_moves(opponent)),
+                            len(game.get_blank_spaces()),
+                            game.get_player_location(player),
+                            game.get_player_location(opponent)))
+
+    def test_unknown_player(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls("Player1", "Player2")
+            self.assertRaises(RuntimeError, game.mobility_summary, "Player3")
+
+
+class IncrementalStatsTest(unittest.TestCase):
+    """The blank count and per-cell liberties maintained by apply_move() and
+    pop_move() match a full recomputation"""
+
+    def assertStats(self, game):
+        blanks = set(game.get_blank_spaces())
+        self.assertEqual(game.blank_count(), len(blanks))
+        for r in range(game.height):
+            for c in range(game.width):
+                expected = sum(1 for dr, dc in isolation.bitboard.DIRECTIONS
+                               if (r + dr, c + dc) in blanks)
+                self.assertEqual(game.liberties((r, c)), expected)
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4)] * 2):
+                for game in random_game(board_cls, seed, width, height):
+                    self.assertStats(game)
+                    self.assertStats(game.copy())
+
+    def test_pop_move_restores(self):
+        rng = random.Random(3)
+        game = isolation.Board("Player1", "Player2")
+        depth = 0
+        for _ in range(200):
+            moves = sorted(game.get_legal_moves())
+            if moves and (depth == 0 or rng.random() < .6):
+                game.push_move(rng.choice(moves))
+                depth += 1
+            elif depth:
+                game.pop_move()
+                depth -= 1
+            self.assertStats(game)
+
+
+class PartitionTest(unittest.TestCase):
+    """is_partitioned() agrees with a flood fill over get_blank_spaces()"""
+
+    def reach(self, game, player):
+        blanks = set(game.get_blank_spaces())
+        seen, frontier = set(), [game.get_player_location(player)]
+        while frontier:
+            r, c = frontier.pop()
+            for dr, dc in isolation.bitboard.DIRECTIONS:
+                cell = (r + dr, c + dc)
+                if cell in blanks and cell not in seen:
+                    seen.add(cell)
+                    frontier.append(cell)
+        return seen
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4)] * 3):
+                partitioned = False
+                for game in random_game(board_cls, seed, width, height):
+                    if game.move_count < 2:
+                        self.assertFalse(game.is_partitioned())
+                        continue
+                    expected = self.reach(game, game.active_player).isdisjoint(
+                        self.reach(game, game.inactive_player))
+                    self.assertEqual(game.is_partitioned(), expected)
+                    # Once partitioned, a position stays partitioned
+                    self.assertTrue(expected or not partitioned)
+                    partitioned = expected
+
+
+class ReachabilityTest(unittest.TestCase):
+    """reachability() agrees with separate breadth-first searches per
+    player"""
+
+    def distances(self, game, player, max_depth):
+        blanks = set(game.get_blank_spaces())
+        loc = game.get_player_location(player)
+        if loc is None:
+            frontier = blanks
+        else:
+            frontier = {(loc[0] + dr, loc[1] + dc)
+                        for dr, dc in isolation.bitboard.DIRECTIONS} & blanks
+        distances, depth = {}, 0
+        while frontier and (max_depth is None or depth < max_depth):
+            depth += 1
+            for cell in frontier:
+                distances[cell] = depth
+            frontier = {(r + dr, c + dc) for r, c in frontier
+                        for dr, dc in isolation.bitboard.DIRECTIONS}
+            frontier = (frontier & blanks) - distances.keys()
+        return distances
+
+    def expected(self, game, player, max_depth):
+        own = self.distances(game, player, max_depth)
+        opp = self.distances(game, game.get_opponent(player), max_depth)
+        first = player == game.active_player
+        never = float("inf")
+        own_closer = sum(1 for cell, d in own.items()
+                         if d < opp.get(cell, never) or
+                         (first and d == opp[cell]))
+        opp_closer = sum(1 for cell, d in opp.items()
+                         if d < own.get(cell, never) or
+                         (not first and d == own[cell]))
+        layers = [tuple(sorted(d.values()).count(i)
+                        for i in range(1, max(d.values() or [0]) + 1))
+                  for d in (own, opp)]
+        return (len(own), len(opp), len(own.keys() & opp.keys()),
+                own_closer, opp_closer, layers[0], layers[1])
+
+    def test_random_games(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4)] * 2):
+                for game in random_game(board_cls, seed, width, height):
+                    for player in ("Player1", "Player2"):
+                        for max_depth in (None, 1, 2):
+                            self.assertEqual(
+                                game.reachability(player, max_depth),
+                                self.expected(game, player, max_depth))
+
+    def test_unknown_player(self):
+        for board_cls in (isolation.Board, isolation.BitBoard):
+            game = board_cls("Player1", "Player2")
+            self.assertRaises(RuntimeError, game.reachability, "Player3")
+
+
+class DeadlineTest(unittest.TestCase):
+    """Deadline is a time_left callable"""
+
+    def test_time_left(self):
+        deadline = isolation.Deadline(150, start=timeit.default_timer() - 1.)
+        self.assertTrue(-1000 < deadline() < -850)
+        deadline = isolation.Deadline(1000)
+        self.assertTrue(900 < deadline() <= 1000)
+
+
+@unittest.skipIf(vectorized is None, "numpy is not installed")
+class VectorGamesTest(unittest.TestCase):
+    """Lockstep games follow the rules and GreedyPlayer's choices"""
+
+    def replay(self, start, games, result, greedy=()):
+        """Replay every history on a Board from `start` and compare the
+        end of the game (and the moves of the players in `greedy`) with
+        the result."""
+        player = GreedyPlayer()
+        for i in range(len(result.winners)):
+            game = start.copy()
+            for move in map(tuple, games.move_history(i)):
+                self.assertIn(move, game.get_legal_moves())
+                if game.move_count % 2 in greedy:
+                    players = [player, "Opponent"]
+                    if game.move_count % 2:
+                        players.reverse()
+                    self.assertEqual(
+                        player.get_move(game.with_players(*players), None),
+                        move)
+                game.apply_move(move)
+            self.assertFalse(game.get_legal_moves())
+            self.assertEqual(game.move_count - start.move_count,
+                             result.lengths[i])
+            self.assertEqual(1 - game.move_count % 2, result.winners[i])
+
+    def test_random_games(self):
+        # A third of the 4x3 games fill the board
+        for seed, (width, height) in enumerate([(7, 7), (5, 5), (6, 4), (4, 3)]):
+            start = isolation.Board("Player1", "Player2", width, height)
+            games = vectorized.VectorGames(100, width, height)
+            result = games.play(rng=numpy.random.default_rng(seed),
+                                histories=True)
+            self.replay(start, games, result)
+
+    def test_greedy_policy(self):
+        for seed, plies in enumerate([0, 1, 6]):
+            start = isolation.Board("Player1", "Player2")
+            for position in random_game(isolation.Board, seed):
+                if position.move_count == plies:
+                    start = position.copy()
+                    break
+            for greedy in [(0,), (1,)]:
+                policies = [vectorized.random_policy] * 2
+                policies[greedy[0]] = vectorized.greedy_policy
+                games = vectorized.VectorGames(30, game=start)
+                result = games.play(*policies, histories=True,
+                                    rng=numpy.random.default_rng(seed))
+                self.replay(start, games, result, greedy)
+
+    def test_finished_position(self):
+        game = next(position for position in random_game(isolation.Board, 0)
+                    if not position.get_legal_moves())
+        result = vectorized.play_games(5, game=game, histories=True)
+        self.assertEqual(list(result.winners), [1 - game.move_count % 2] * 5)
+        self.assertEqual(list(result.lengths), [0] * 5)
+        self.assertEqual(result.histories.shape, (5, 0))
+
+    def test_summary_arrays(self):
+        positions = [game.copy() for game in random_game(isolation.Board, 0)]
+        arrays = vectorized.board_arrays(positions)
+        for index, player in enumerate(["Player1", "Player2"]):
+            batch = vectorized.MobilityBatch.from_arrays(*arrays, player=index,
+                                                         width=7, height=7)
+            expected = [game.mobility_summary(player) for game in positions]
+            self.assertEqual(batch.utility.tolist(), [s.utility for s in expected])
+            self.assertEqual(batch.own_moves.tolist(), [s.own_moves for s in expected])
+            self.assertEqual(batch.opp_moves.tolist(), [s.opp_moves for s in expected])
+            self.assertEqual([tuple(location) for location in batch.own_location],
+                             [s.own_location or (-1, -1) for s in expected])
+
+
+class ForfeitPlayer(object):
+    """Returns an illegal move on its second turn."""
+
+    def get_move(self, game, time_left):
+        if game.move_count >= 2:
+            return (-1, -1)
+        return game.get_legal_moves()[0]
+
+
+class GameRecordTest(unittest.TestCase):
+    """Writing and reading binary game records"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "games.bin")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def write_games(self, writer):
+        """Play games through the writer; return their expected records."""
+        expected = []
+        for seed in range(8):
+            random.seed(seed)
+            opening = [(seed % 7, 0), (3, seed % 5)][:seed % 3]
+            players = (GreedyPlayer(), RandomPlayer())
+            if seed == 5:
+                players = (ForfeitPlayer(), RandomPlayer())
+            board = isolation.Board(*players, width=7, height=5 + seed % 2)
+            winner, history, termination = writer.play(
+                board, opening, seed=seed,
+                players=None if seed % 2 else ("Greedy", "Random_%d" % seed))
+            expected.append(records.GameRecord(
+                board.width, board.height,
+                (type(players[0]).__name__, type(players[1]).__name__)
+                if seed % 2 else ("Greedy", "Random_%d" % seed),
+                1 if winner is players[0] else 2,
+                records.TERMINATIONS[termination], seed,
+                opening + [tuple(move) for move in history]))
+        return expected
+
+    def test_round_trip(self):
+        with records.GameWriter(self.path) as writer:
+            expected = self.write_games(writer)
+        self.assertEqual(expected[5].outcome, "forfeit")
+        with records.GameReader(self.path) as reader:
+            self.assertTrue(reader.complete)
+            self.assertEqual(len(reader), len(expected))
+            self.assertEqual(list(reader), expected)
+            for k in (7, 0, 3):
+                self.assertEqual(reader[k], expected[k])
+            with self.assertRaises(IndexError):
+                reader[len(expected)]
+        # Replaying the moves reaches the recorded end
+        for game in expected[:5]:
+            board = isolation.Board("Player1", "Player2", game.width,
+                                    game.height)
+            for move in game.moves:
+                self.assertIn(move, board.get_legal_moves())
+                board.apply_move(move)
+            self.assertFalse(board.get_legal_moves())
+            self.assertEqual(game.winner, 2 - board.move_count % 2)
+
+    def test_interrupted_writer(self):
+        writer = records.GameWriter(self.path)
+        expected = self.write_games(writer)
+        writer._file.write(records.GAME.pack(7, 7, 0, 1, 1, 0, 20, 0))
+        writer._file.flush()
+        with self.assertRaises(ValueError):
+            records.GameReader(self.path)
+        with records.GameReader(self.path, recover=True) as reader:
+            self.assertFalse(reader.complete)
+            self.assertEqual(len(reader), len(expected))
+            self.assertEqual([game.moves for game in reader],
+                             [game.moves for game in expected])
+            self.assertEqual(reader[3].seed, 3)
+            self.assertEqual(reader[1].players, ("2", "3"))
+        writer._file.close()
+
+    def test_truncated(self):
+        with records.GameWriter(self.path) as writer:
+            expected = self.write_games(writer)
+            offsets = list(writer._offsets)
+        with open(self.path, "rb") as f:
+            data = f.read()
+        for size, games in [(offsets[3] + records.GAME.size + 2, 3),
+                            (offsets[6] + 4, 6), (offsets[6], 6)]:
+            with open(self.path, "wb") as f:
+                f.write(data[:size])
+            if size == offsets[6]:
+                # Cut between two games: nothing is cut short
+                reader = records.GameReader(self.path)
+            else:
+                with self.assertRaises(ValueError):
+                    records.GameReader(self.path)
+                reader = records.GameReader(self.path, recover=True)
+            with reader:
+                self.assertEqual([game.moves for game in reader],
+                                 [game.moves for game in expected[:games]])
+        # A trailer that lists more games than the file holds
+        with open(self.path, "wb") as f:
+            f.write(data[:offsets[1]] + data[-records.TRAILER.size:])
+        with self.assertRaises(ValueError):
+            records.GameReader(self.path)
+        # Another version of the format
+        with open(self.path, "wb") as f:
+            f.write(records.MAGIC[:-1] + b"2" + data[len(records.MAGIC):])
+        with self.assertRaises(ValueError):
+            records.GameReader(self.path)
+
+    def test_json(self):
+        with records.GameWriter(self.path) as writer:
+            expected = self.write_games(writer)
+        for game in expected:
+            text = records.to_json(game)
+            self.assertEqual(records.to_history(game),
+                             [list(move) for move in game.moves])
+            fields = dict(game._asdict())
+            del fields["moves"]
+            self.assertEqual(records.from_json(text, **fields), game)
+        game = records.from_json("[[0, 0], [2, 1], [2, 2]]")
+        self.assertEqual((game.winner, game.outcome, game.moves),
+                         (1, "win", [(0, 0), (2, 1), (2, 2)]))
+        with self.assertRaises(ValueError):
+            records.GameReader(os.path.join(os.path.dirname(__file__),
+                                            "test_isolation.py"))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,915 @@
+"""Unit tests for the search infrastructure in the `search` package."""
+
+import contextlib
+import gc
+import io
+import itertools
+import os
+import pickle
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import unittest
+
+import isolation
+import game_agent
+
+from isolation.bitboard import knight_masks, knight_shifts
+from sample_players import improved_score
+from search.transposition import TranspositionTable, EXACT, LOWER, UPPER
+from search.ordering import MoveOrderer, MAX_SIDE, MIN_SIDE
+from search.parallel import SharedTranspositionTable
+from search.timing import TimeManager, OPENING, MIDGAME, ENDGAME
+from search.endgame import EndgameSolver
+from search.book import OpeningBook, book_positions, build_book, write_book
+from search.tablebase import (Tablebase, build_tablebase, layer_sets,
+                              live_cells, transform_mask, write_tablebase)
+from search.proof import ProofSolver, first_moves, main as proof_main
+from search.mcts import MCTS
+
+
+def search_position(player, seed):
+    """Return a random midgame position with `player` to move."""
+    rng = random.Random(seed)
+    game = isolation.Board(player, "Opponent")
+    for _ in range(10):
+        game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+    if game.active_player != player:
+        game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+    return game
+
+
+class TranspositionTableTest(unittest.TestCase):
+    """Store, probe and replacement behaviour of TranspositionTable"""
+
+    def test_store_and_probe(self):
+        tt = TranspositionTable(size_mb=0.01)
+        self.assertIsNone(tt.probe(12345))
+        tt.store(12345, 3, 1.5, LOWER, (2, 4), 10)
+        self.assertEqual(tt.probe(12345), (3, 1.5, LOWER, (2, 4)))
+        tt.store(0, 2, float("-inf"), EXACT, None, 10)
+        self.assertEqual(tt.probe(0), (2, float("-inf"), EXACT, None))
+        self.assertEqual(tt.hit_rate(), 2 / 3.)
+
+    def test_depth_preferred_replacement(self):
+        tt = TranspositionTable(size_mb=0.01)
+        a, b, c = 7, 7 + tt.buckets, 7 + 2 * tt.buckets
+        tt.store(a, 5, 1., EXACT, (0, 1), 4)
+        tt.store(b, 2, 2., EXACT, (0, 2), 4)
+        # the shallower entry goes to the always-replace slot
+        self.assertEqual(tt.probe(a)[0], 5)
+        self.assertEqual(tt.probe(b)[0], 2)
+        tt.store(c, 1, 3., UPPER, (0, 3), 4)
+        self.assertIsNotNone(tt.probe(a))
+        self.assertIsNone(tt.probe(b))
+        self.assertIsNotNone(tt.probe(c))
+
+    def test_no_duplicate_entries(self):
+        tt = TranspositionTable(size_mb=0.01)
+        a, b, c = 7, 7 + tt.buckets, 7 + 2 * tt.buckets
+        tt.store(a, 5, 1., EXACT, (0, 1), 4)
+        tt.store(b, 2, 2., EXACT, (0, 2), 4)
+        # b moves to the depth-preferred slot and leaves the other one
+        tt.store(b, 6, 3., EXACT, (0, 3), 4)
+        self.assertEqual(len(tt), 1)
+        self.assertEqual(tt.probe(b), (6, 3., EXACT, (0, 3)))
+        tt.store(c, 7, 4., EXACT, None, 4)
+        self.assertIsNone(tt.probe(b))
+
+    def test_stale_entries_are_replaced(self):
+        tt = TranspositionTable(size_mb=0.01)
+        a, b = 7, 7 + tt.buckets
+        tt.store(a, 9, 1., EXACT, None, 4)
+        tt.new_search(6)
+        self.assertEqual(len(tt), 0)
+        tt.store(b, 1, 2., EXACT, None, 6)
+        self.assertIsNone(tt.probe(a))
+        self.assertEqual(len(tt), 1)
+
+    def test_new_game_clears(self):
+        tt = TranspositionTable(size_mb=0.01)
+        tt.new_search(20)
+        tt.store(3, 1, 2., EXACT, None, 22)
+        tt.new_search(1)
+        self.assertIsNone(tt.probe(3))
+
+
+class MoveOrdererTest(unittest.TestCase):
+    """Hash move, killer and history ordering"""
+
+    moves = [(0, 1), (1, 0), (2, 3), (3, 2), (4, 4)]
+
+    def test_no_heuristics(self):
+        orderer = MoveOrderer(hash_move=False, killers=False, history=False)
+        orderer.record_cutoff((4, 4), 5, 3, MAX_SIDE)
+        self.assertEqual(orderer.order(list(self.moves), 5, MAX_SIDE, (3, 2)),
+                         self.moves)
+
+    def test_priority(self):
+        orderer = MoveOrderer()
+        orderer.record_cutoff((1, 0), 5, 1, MAX_SIDE)
+        orderer.record_cutoff((2, 3), 7, 4, MAX_SIDE)
+        orderer.record_cutoff((0, 1), 7, 2, MIN_SIDE)
+        ordered = orderer.order(list(self.moves), 5, MAX_SIDE, (4, 4))
+        self.assertEqual(ordered, [(4, 4), (1, 0), (2, 3), (0, 1), (3, 2)])
+        ordered = orderer.order(list(self.moves), 7, MIN_SIDE)
+        self.assertEqual(ordered[:3], [(0, 1), (2, 3), (1, 0)])
+
+    def test_killers_per_ply(self):
+        orderer = MoveOrderer(history=False)
+        for move in [(0, 1), (1, 0), (2, 3)]:
+            orderer.record_cutoff(move, 3, 1, MAX_SIDE)
+        self.assertEqual(orderer.killer_moves[3], [(2, 3), (1, 0)])
+        orderer.new_search()
+        self.assertEqual(orderer.killer_moves, {})
+
+    def test_history_ages(self):
+        orderer = MoveOrderer()
+        orderer.record_cutoff((0, 1), 3, 4, MAX_SIDE)
+        orderer.new_search()
+        self.assertEqual(orderer.history_scores[MAX_SIDE][(0, 1)], 8)
+
+
+class AlphaBetaTableTest(unittest.TestCase):
+    """AlphaBetaPlayer must compute the same values with the table and move
+    ordering enabled"""
+
+    def test_same_values(self):
+        for player_cls in (game_agent.AlphaBetaPlayer,
+                           game_agent.InPlaceAlphaBetaPlayer):
+            plain = player_cls(score_fn=improved_score)
+            cached = player_cls(score_fn=improved_score, tt_size_mb=1,
+                                move_ordering=True)
+            for seed in range(5):
+                for player in (plain, cached):
+                    player.time_left = lambda: float("inf")
+                values = []
+                for player in (plain, cached):
+                    game = search_position(player, seed)
+                    player._new_search(game)
+                    random.seed(seed)
+                    values.append([player.max_value(game, d, float("-inf"), float("inf"))
+                                   for d in range(1, 6)])
+                self.assertEqual(values[0], values[1])
+
+    def test_table_survives_between_moves(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1)
+        game = search_position(player, 0)
+        calls = [0]
+
+        def time_left():
+            calls[0] += 1
+            return 1000. if calls[0] < 2000 else 0.
+
+        player.get_move(game, time_left)
+        self.assertGreater(len(player.tt), 0)
+        self.assertEqual(player.tt.root_move_count, game.move_count)
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+    """Principal variation reuse and aspiration windows"""
+
+    def deepen(self, player, game, depth):
+        player.time_left = lambda: float("inf")
+        player._new_search(game)
+        for _ in player._deepen(game, range(1, depth + 1)):
+            pass
+        return player._search_root(game, depth, float("-inf"), float("inf"))
+
+    def test_principal_variation_is_legal(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, pv_reuse=True)
+        game = search_position(player, 1)
+        move, _ = self.deepen(player, game, 5)
+        pv = player.principal_variation
+        self.assertEqual(len(pv), 5)
+        self.assertEqual(set(player.root_scores), set(game.get_legal_moves()))
+        self.assertEqual(max(player.root_scores, key=player.root_scores.get), pv[0])
+        for m in pv:
+            self.assertIn(m, game.get_legal_moves())
+            game = game.forecast_move(m)
+
+    def test_same_scores(self):
+        for seed in range(4):
+            scores = []
+            for kwargs in [{}, {"pv_reuse": True},
+                           {"aspiration_window": 0.5, "move_ordering": True},
+                           {"aspiration_window": 2., "pv_reuse": True, "tt_size_mb": 1},
+                           {"pvs": True},
+                           {"pvs": True, "aspiration_window": 1., "pv_reuse": True,
+                            "tt_size_mb": 1, "move_ordering": True}]:
+                player = game_agent.AlphaBetaPlayer(score_fn=improved_score, **kwargs)
+                random.seed(seed)
+                scores.append(self.deepen(player, search_position(player, seed), 5)[1])
+            self.assertEqual(len(set(scores)), 1, scores)
+
+
+class NegamaxTest(unittest.TestCase):
+    """The negamax PVS core must agree with the min/max pair"""
+
+    def test_values_match(self):
+        inf = float("inf")
+        for player_cls in (game_agent.AlphaBetaPlayer,
+                           game_agent.InPlaceAlphaBetaPlayer):
+            player = player_cls(score_fn=improved_score)
+            player.time_left = lambda: inf
+            for seed in range(4):
+                game = search_position(player, seed)
+                for depth in range(1, 5):
+                    self.assertEqual(player._negamax(game, depth, -inf, inf),
+                                     player.max_value(game, depth, -inf, inf))
+                    child = game.forecast_move(sorted(game.get_legal_moves())[0])
+                    self.assertEqual(-player._negamax(child, depth, -inf, inf),
+                                     player.min_value(child, depth, -inf, inf))
+
+
+class ClockTest(unittest.TestCase):
+    """The clock is read less often as long as the measured node rate
+    keeps the overshoot within the threshold"""
+
+    def test_interval_adapts(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, timeout=10.)
+        clock = [100.]
+        player.time_left = lambda: clock[0]
+        player._start_clock()
+        player._check_clock()
+        self.assertEqual(player._clock_interval, 1)
+        # 0.01 ms per node: the interval doubles up to 2.5 ms worth of nodes
+        intervals = []
+        for _ in range(10):
+            clock[0] -= 0.01 * player._clock_interval
+            player._check_clock()
+            intervals.append(player._clock_interval)
+        self.assertEqual(intervals[:3], [2, 4, 8])
+        self.assertEqual(intervals[-1], 250)
+        # near the threshold the clock is read at every node again
+        clock[0] = 10.01
+        player._check_clock()
+        self.assertEqual(player._clock_interval, 1)
+        clock[0] = 9.
+        self.assertRaises(game_agent.SearchTimeout, player._check_clock)
+
+    def test_frozen_clock_keeps_interval(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score)
+        player.time_left = lambda: 100.
+        player._start_clock()
+        for _ in range(5):
+            player._check_clock()
+        self.assertEqual(player._clock_interval, 1)
+
+
+class TimeManagerTest(unittest.TestCase):
+    """Phase budgets, iteration decisions and margin calibration"""
+
+    def test_phases_and_budget(self):
+        manager = TimeManager(phase_shares=(.5, 1., 1.), opening_moves=4,
+                              endgame_blanks=20, margin=10.)
+        game = isolation.Board("p1", "p2")
+        self.assertEqual(manager.phase(game), OPENING)
+        self.assertEqual(manager.start_move(game, 150.), 80.)
+        for move in [(0, 0), (6, 6), (1, 2), (4, 5)]:
+            game.apply_move(move)
+        self.assertEqual(manager.phase(game), MIDGAME)
+        self.assertEqual(manager.start_move(game, 150.), 10.)
+        game = isolation.Board.from_state("p1", "p2", ((1 << 30) - 1, 0, 1, 0))
+        self.assertEqual(manager.phase(game), ENDGAME)
+
+    def test_next_depth(self):
+        manager = TimeManager(phase_shares=(1., 1., 1.), margin=10.)
+        self.assertEqual(manager.start_move(isolation.Board("p1", "p2"), 100.), 10.)
+        # 10 ms for the last iteration at a branching factor of 3 leaves
+        # enough time for the next one (30 ms), but then 30 ms at the same
+        # rate does not leave enough for the one after (90 ms)
+        self.assertTrue(manager.next_depth([10, 30, 90], 90.))
+        self.assertFalse(manager.next_depth([10, 30, 90, 270], 60.))
+        self.assertEqual(manager.skipped, 1)
+        # proven results are not searched deeper
+        self.assertFalse(manager.next_depth([1, 2], 39., float("-inf")))
+
+    def test_margin_calibration(self):
+        manager = TimeManager(margin=12., min_margin=2., safety=2., warmup=3)
+        manager.end_move(.5)
+        self.assertEqual(manager.margin, 12.)
+        manager.end_move(1.5)
+        manager.end_move(-1.)
+        self.assertEqual(manager.margin, 3.)
+
+    def test_player_skips_unfinishable_depths(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1,
+                                            move_ordering=True, time_manager=True)
+        game = search_position(player, 4)
+        move = player.get_move(game, isolation.Deadline(150))
+        self.assertIn(move, game.get_legal_moves())
+        self.assertLess(player.TIMER_THRESHOLD, 150)
+        self.assertEqual(len(player.time_manager.latencies), 1)
+
+
+class PonderTest(unittest.TestCase):
+    """Pondering continues the search on a hit and is discarded on a miss"""
+
+    def budget(self, nodes=3000):
+        calls = [0]
+
+        def time_left():
+            calls[0] += 1
+            return 1000. if calls[0] < nodes else 0.
+        return time_left
+
+    def test_hit_and_miss(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1,
+                                            move_ordering=True, pv_reuse=True,
+                                            ponder=True)
+        try:
+            game = search_position(player, 3)
+            move = player.get_move(game, self.budget())
+            for expect_hit in (True, False):
+                game.apply_move(move)
+                key = player._ponder_key
+                self.assertIsNotNone(key)
+                replies = sorted(game.get_legal_moves(),
+                                 key=lambda m: game.forecast_move(m).hash() != key[0])
+                game.apply_move(replies[0] if expect_hit else replies[-1])
+                move = player.get_move(game, self.budget())
+                self.assertIn(move, game.get_legal_moves())
+            self.assertEqual((player.ponder_hits, player.ponder_misses), (1, 1))
+            self.assertEqual(player.ponder_hit_rate(), .5)
+        finally:
+            player.stop_pondering()
+        self.assertIsNone(player._ponder_thread)
+
+    def test_hit_seeds_aspiration_window(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1,
+                                            aspiration_window=1., ponder=True)
+        previous_scores = []
+        iterate = player._iterate
+
+        def record(game, depth, previous_score):
+            previous_scores.append((previous_score, dict(player.root_scores)))
+            return iterate(game, depth, previous_score)
+        player._iterate = record
+        try:
+            game = search_position(player, 3)
+            game.apply_move(player.get_move(game, self.budget()))
+            key = player._ponder_key
+            game.apply_move(next(m for m in game.get_legal_moves()
+                                 if game.forecast_move(m).hash() == key[0]))
+            player._ponder_thread.join()
+            del previous_scores[:]
+            player.get_move(game, self.budget())
+            self.assertGreater(player.ponder_depth, 0)
+            score, root_scores = previous_scores[0]
+            self.assertEqual(score, max(root_scores.values()))
+        finally:
+            player.stop_pondering()
+
+
+class SymmetricTableTest(unittest.TestCase):
+    """A table keyed by canonical hashes serves symmetric positions"""
+
+    def test_shared_entries(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1,
+                                            symmetric_tt=True)
+        player.time_left = lambda: float("inf")
+        game = search_position(player, 5)
+        random.seed(0)
+        player._new_search(game)
+        for move in player._deepen(game, range(1, 5)):
+            pass
+        entry = player._probe(game)
+        self.assertEqual(entry[3], move)
+        for t in range(game.symmetries.count):
+            image = game.transform(t)
+            depth, value, flag, image_move = player._probe(image)
+            self.assertEqual((depth, value, flag), entry[:3])
+            self.assertEqual(image_move, game.symmetries.transform_move(move, t))
+            self.assertIn(image_move, image.get_legal_moves())
+
+
+class OpeningBookTest(unittest.TestCase):
+    """Book moves survive the canonical frame and the memory-mapped file"""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.path = os.path.join(cls.tmp, "book.bin")
+        cls.records = build_book(5, 5, plies=3, depth=2, workers=1)
+        write_book(cls.path, cls.records, 5, 5, 3, 2)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def test_symmetric_lookup(self):
+        book = OpeningBook(self.path)
+        positions = book_positions(5, 5, 3)
+        self.assertEqual(len(book), len(positions))
+        self.assertEqual(sorted(positions), sorted(r[0] for r in self.records))
+        moves = {key: move for key, move, _, _ in self.records}
+        for key, game in positions.items():
+            for t in range(game.symmetries.count):
+                image = game.transform(t)
+                move = book.lookup(image)
+                self.assertIn(move, image.get_legal_moves())
+                # On a symmetric position several moves are equivalent
+                self.assertEqual(image.forecast_move(move).canonical_hash()[0],
+                                 game.forecast_move(moves[key]).canonical_hash()[0])
+        book.close()
+
+    def test_misses(self):
+        book = OpeningBook(self.path)
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        for move in [(0, 0), (4, 4), (2, 1)]:
+            game.apply_move(move)
+        self.assertIsNone(book.lookup(game))
+        self.assertIsNone(book.lookup(isolation.Board("Player1", "Player2")))
+        self.assertIsNone(book.probe(12345))
+        book.close()
+
+    def test_player(self):
+        player = game_agent.AlphaBetaPlayer(opening_book=self.path)
+        player = pickle.loads(pickle.dumps(player))
+        game = isolation.Board(player, "Opponent", 5, 5)
+        move = player.get_move(game, lambda: 1000.)
+        self.assertTrue(player.from_book)
+        self.assertEqual(move, player.opening_book.lookup(game))
+        game.apply_move(move)
+        game.apply_move(game.get_legal_moves()[0])
+        game.apply_move(game.get_legal_moves()[0])
+        game.apply_move(game.get_legal_moves()[0])
+        player.get_move(game, lambda: 1000. if player.nodes < 2000 else 0.)
+        self.assertFalse(player.from_book)
+
+    def test_book_move_resets_search(self):
+        player = game_agent.AlphaBetaPlayer(opening_book=self.path)
+        player.depth_nodes, player.root_scores = [10, 100], {(0, 0): 1.}
+        game = isolation.Board(player, "Opponent", 5, 5)
+        player.get_move(game, lambda: 1000.)
+        self.assertTrue(player.from_book)
+        self.assertEqual((player.depth_nodes, player.root_scores), ([], {}))
+
+    def test_book_move_ends_like_a_search(self):
+        # Book moves calibrate the time manager and start pondering too
+        player = game_agent.AlphaBetaPlayer(opening_book=self.path,
+                                            time_manager=True, ponder=True)
+        game = isolation.Board(player, "Opponent", 5, 5)
+        try:
+            player.get_move(game, isolation.Deadline(150))
+            self.assertTrue(player.from_book)
+            self.assertEqual(len(player.time_manager.latencies), 1)
+            self.assertIsNotNone(player._ponder_thread)
+        finally:
+            player.stop_pondering()
+
+
+def partitioned_positions(count, width=5, height=5):
+    """Return the first partitioned position of `count` random games in
+    which both players can still move.
+    """
+    rng = random.Random(0)
+    positions = []
+    while len(positions) < count:
+        game = isolation.Board("Player1", "Player2", width=width, height=height)
+        while game.get_legal_moves() and not game.is_partitioned():
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+        if game.get_legal_moves() and game.get_legal_moves(game.inactive_player):
+            positions.append(game)
+    return positions
+
+
+class EndgameSolverTest(unittest.TestCase):
+    """The endgame solver agrees with exhaustive search"""
+
+    def wins(self, game):
+        """True if the player to move wins with perfect play."""
+        return any(not self.wins(game.forecast_move(m))
+                   for m in game.get_legal_moves())
+
+    def naive_longest(self, cell, blanks):
+        r, c = cell
+        return max([1 + self.naive_longest(n, blanks - {n})
+                    for n in ((r + dr, c + dc)
+                              for dr, dc in isolation.bitboard.DIRECTIONS)
+                    if n in blanks] or [0])
+
+    def test_solve(self):
+        solver = EndgameSolver()
+        for game in partitioned_positions(30):
+            move, value = solver.solve(game)
+            self.assertEqual(value == float("inf"), self.wins(game))
+            self.assertIn(move, game.get_legal_moves())
+            if value == float("inf"):
+                self.assertFalse(self.wins(game.forecast_move(move)))
+
+    def test_path_lengths(self):
+        for game in partitioned_positions(30):
+            solver = EndgameSolver()
+            _, value = solver.solve(game)
+            own, opp = solver.path_lengths
+            blanks = set(game.get_blank_spaces())
+            self.assertEqual(opp, self.naive_longest(
+                game.get_player_location(game.inactive_player), blanks))
+            if value == float("-inf"):
+                self.assertEqual(own, self.naive_longest(
+                    game.get_player_location(game.active_player), blanks))
+
+    def test_timeout(self):
+        game = partitioned_positions(1, 7, 7)[0]
+        solver = EndgameSolver()
+        solver.CHECK_INTERVAL = 1
+        with self.assertRaises(game_agent.SearchTimeout):
+            solver.solve(game, lambda: 0., threshold=1.)
+
+    def test_player(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            endgame_solver=True)
+        for game in partitioned_positions(5, 7, 7):
+            game = game.with_players(player, "Opponent")
+            move = player.get_move(game, lambda: 1000.)
+            self.assertTrue(player.endgame_solved)
+            self.assertIn(move, game.get_legal_moves())
+
+    def test_solved_move_ends_like_a_search(self):
+        player = game_agent.AlphaBetaPlayer(score_fn=improved_score,
+                                            endgame_solver=True,
+                                            time_manager=True, ponder=True)
+        # The game is nearly over, so only check that pondering is asked for
+        pondered = []
+        player._start_pondering = lambda game, move: pondered.append(move)
+        game = partitioned_positions(1, 7, 7)[0].with_players(player,
+                                                              "Opponent")
+        move = player.get_move(game, isolation.Deadline(150))
+        self.assertTrue(player.endgame_solved)
+        self.assertEqual(len(player.time_manager.latencies), 1)
+        self.assertEqual(pondered, [move])
+
+
+class TablebaseTest(unittest.TestCase):
+    """Tablebase values agree with exhaustive search"""
+
+    SIZES = [(5, 5), (5, 4)]
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.mkdtemp()
+        cls.paths = {}
+        for width, height in cls.SIZES:
+            path = os.path.join(cls.tmp, "{}x{}.bin".format(width, height))
+            table = build_tablebase(width, height, 4, workers=1)
+            write_tablebase(path, table, width, height, 4)
+            cls.paths[width, height] = path
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.tmp)
+
+    def solve(self, game):
+        """(won, plies) for the player to move with perfect play."""
+        results = [self.solve(game.forecast_move(m))
+                   for m in game.get_legal_moves()]
+        if not results:
+            return False, 0
+        wins = [plies for won, plies in results if not won]
+        if wins:
+            return True, min(wins) + 1
+        return False, max(plies for _, plies in results) + 1
+
+    def positions(self, board_cls, width, height, count=40):
+        """Positions of random games with at most 7 blank cells."""
+        rng = random.Random(width * height)
+        positions = []
+        while len(positions) < count:
+            game = board_cls("Player1", "Player2", width, height)
+            while game.get_legal_moves() and game.blank_count() > 7:
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            if game.get_legal_moves():
+                positions.append(game)
+        return positions
+
+    def test_lookup(self):
+        for (width, height), path in self.paths.items():
+            tablebase = Tablebase(path)
+            hits = 0
+            for board_cls in [isolation.Board, isolation.BitBoard]:
+                for game in self.positions(board_cls, width, height):
+                    result = tablebase.lookup(game)
+                    if result is not None:
+                        hits += 1
+                        self.assertEqual(result, self.solve(game))
+                    if game.blank_count() <= tablebase.max_open:
+                        self.assertIsNotNone(result)
+            self.assertGreater(hits, 10)
+            tablebase.close()
+
+    def test_workers(self):
+        self.assertEqual(build_tablebase(5, 4, 3, workers=1),
+                         build_tablebase(5, 4, 3, workers=2, chunk=100))
+
+    def test_layer_sets(self):
+        # Every set of blank cells that holds a position is enumerated
+        width, height, cells = 5, 4, 20
+        masks = knight_masks(width, height)
+        shifts = knight_shifts(width, height)
+        perms = isolation.Board("Player1", "Player2", width, height).symmetries.perms
+        previous = [0]
+        for k in range(1, 5):
+            sets = layer_sets(previous, width, height, perms)
+            for combo in itertools.combinations(range(cells), k):
+                open_cells = sum(1 << idx for idx in combo)
+                if any(masks[p] & open_cells and
+                       live_cells((masks[p] | masks[q]) & open_cells,
+                                  open_cells, shifts) == open_cells
+                       for p in range(cells) for q in range(cells)
+                       if p != q and not (open_cells >> p | open_cells >> q) & 1):
+                    self.assertIn(min(transform_mask(open_cells, perm)
+                                      for perm in perms), sets)
+            previous = sets
+
+    def test_misses(self):
+        tablebase = Tablebase(self.paths[5, 5])
+        self.assertIsNone(tablebase.lookup(
+            isolation.Board("Player1", "Player2", 5, 5)))
+        self.assertIsNone(tablebase.lookup(isolation.Board("Player1", "Player2")))
+        game = self.positions(isolation.Board, 5, 4, 1)[0]
+        self.assertIsNone(tablebase.lookup(game))
+        tablebase.close()
+
+    def test_player(self):
+        path = self.paths[5, 5]
+        tablebase = Tablebase(path)
+        for pvs in [False, True]:
+            player = game_agent.AlphaBetaPlayer(tablebase=path, pvs=pvs)
+            player = pickle.loads(pickle.dumps(player))
+            for game in self.positions(isolation.Board, 5, 5, 10):
+                while tablebase.lookup(game) is None:
+                    game.apply_move(game.get_legal_moves()[0])
+                if not game.get_legal_moves():
+                    continue
+                game = game.with_players(player, "Opponent")
+                won = tablebase.lookup(game)[0]
+                move = player.get_move(game, lambda: 1000.)
+                after = game.forecast_move(move)
+                self.assertEqual(not tablebase.lookup(after)[0], won)
+                self.assertLess(player.nodes, 100)
+        tablebase.close()
+
+
+class ProofSolverTest(unittest.TestCase):
+    """Proof-number search agrees with exhaustive search"""
+
+    def wins(self, game):
+        """True if the player to move wins with perfect play."""
+        return any(not self.wins(game.forecast_move(m))
+                   for m in game.get_legal_moves())
+
+    def positions(self):
+        """Every first move on 4x4 and positions of random 5x4 games."""
+        positions = []
+        for move in first_moves(4, 4):
+            game = isolation.Board("Player1", "Player2", 4, 4)
+            game.apply_move(move)
+            positions.append(game)
+        rng = random.Random(0)
+        for _ in range(6):
+            game = isolation.BitBoard("Player1", "Player2", 5, 4)
+            for _ in range(4):
+                game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+            positions.append(game)
+        return positions
+
+    def test_values(self):
+        positions = self.positions()
+        expected = [self.wins(game) for game in positions]
+        self.assertIn(True, expected)
+        for kwargs in [{}, {"symmetric": False}, {"endgame_solver": False},
+                       {"max_entries": 1000}]:
+            for game, wins in zip(positions, expected):
+                solver = ProofSolver(**kwargs)
+                self.assertEqual(solver.solve(game), wins)
+                if wins:
+                    move = solver.winning_move(game)
+                    self.assertFalse(self.wins(game.forecast_move(move)))
+
+    def test_checkpoint(self):
+        game = isolation.Board("Player1", "Player2", 5, 4)
+        game.apply_move((1, 1))
+        # Board shuffles its legal moves: seed both solves so that they
+        # expand the same positions and the node limit stops the second
+        random.seed(0)
+        fresh = ProofSolver()
+        value = fresh.solve(game)
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "proof.pkl")
+            solver = ProofSolver(checkpoint=path)
+            random.seed(0)
+            self.assertIsNone(solver.solve(game, max_nodes=fresh.nodes // 2))
+            self.assertIsNone(solver.value(game))
+            self.assertTrue(os.path.exists(path))
+            resumed = ProofSolver(checkpoint=path)
+            self.assertEqual(resumed.total_nodes, solver.total_nodes)
+            self.assertEqual(resumed.solve(game), value)
+            self.assertLess(resumed.nodes, fresh.nodes)
+            # Ctrl-C saves the table before the interrupt propagates
+            os.remove(path)
+            interrupted = ProofSolver(checkpoint=path)
+
+            def interrupt():
+                raise KeyboardInterrupt
+            with self.assertRaises(KeyboardInterrupt):
+                interrupted.solve(game, time_left=interrupt)
+            resumed = ProofSolver(checkpoint=path)
+            self.assertEqual(len(resumed.table), len(interrupted.table))
+            self.assertEqual(resumed.solve(game), value)
+        finally:
+            shutil.rmtree(tmp)
+
+    def test_timeout(self):
+        game = isolation.Board("Player1", "Player2", 5, 5)
+        game.apply_move((2, 2))
+        solver = ProofSolver()
+        self.assertIsNone(solver.solve(game, time_left=lambda: 0.,
+                                       threshold=1.))
+        self.assertEqual(solver.nodes, solver.CHECK_INTERVAL)
+
+    def test_main(self):
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            proof_main(["-s", "4x4", "5x5", "-n", "1"])
+        summaries = [line.split(":")[0].strip()
+                     for line in output.getvalue().splitlines()
+                     if "first moves win" in line]
+        # 4x4 is proven within the first check; 5x5 is not
+        self.assertEqual(summaries, ["player 1 loses", "player 1 ?"])
+
+
+class MCTSTest(unittest.TestCase):
+    """Monte Carlo tree search keeps its tree and stops on time"""
+
+    def position(self, seed, plies=6, width=5, height=5):
+        rng = random.Random(seed)
+        game = isolation.Board("Player1", "Player2", width, height)
+        for _ in range(plies):
+            if not game.get_legal_moves():
+                break
+            game.apply_move(rng.choice(sorted(game.get_legal_moves())))
+        return game
+
+    def test_winning_move(self):
+        found = 0
+        for seed in range(100):
+            game = self.position(seed, plies=14)
+            moves = game.get_legal_moves()
+            solver = ProofSolver()
+            winning = [m for m in moves
+                       if solver.solve(game.forecast_move(m)) is False]
+            if not winning or len(winning) == len(moves):
+                continue
+            found += 1
+            random.seed(seed)
+            move = MCTS().search(game, lambda: 1000., max_playouts=1000)
+            self.assertIn(move, winning)
+        self.assertGreater(found, 5)
+
+    def test_tree_reuse(self):
+        game = self.position(0)
+        tree = MCTS()
+        random.seed(0)
+        move = tree.search(game, lambda: 1000., max_playouts=500)
+        self.assertEqual(tree.root.visits, 500)
+        tree.play(move)
+        game.apply_move(move)
+        reply = max(tree.root.children, key=lambda c: c.visits)
+        game.apply_move(reply.move)
+        tree.search(game, lambda: 1000., max_playouts=100)
+        self.assertIs(tree.root, reply)
+        self.assertGreater(tree.reused, 0)
+        self.assertEqual(tree.root.visits, tree.reused + 100)
+        # Both moves unknown to the tree: it starts again
+        other = self.position(1)
+        self.assertFalse(tree.advance(other))
+        self.assertEqual(tree.root.visits, 0)
+
+    def test_clock(self):
+        game = self.position(0)
+        clock = [100.]
+
+        def time_left():
+            clock[0] -= 1.
+            return clock[0]
+
+        tree = MCTS()
+        frozen = gc.get_freeze_count()
+        tree.search(game, time_left, threshold=10.)
+        # Every playout takes one reading (1 ms), so the search stops when
+        # two more would end below the threshold
+        self.assertGreaterEqual(clock[0] - 2., 9.)
+        self.assertEqual(tree.playouts, 88)
+        # The collector is left alone
+        self.assertTrue(gc.isenabled())
+        self.assertEqual(gc.get_freeze_count(), frozen)
+
+    def test_cutoff(self):
+        from competition_agent import custom_score
+        with self.assertRaises(ValueError):
+            MCTS(playout_depth=4)
+        game = self.position(0)
+        tree = MCTS(playout_depth=4, score_fn=custom_score)
+        move = tree.search(game, lambda: 1000., max_playouts=200)
+        self.assertIn(move, game.get_legal_moves())
+
+    def test_player(self):
+        from competition_agent import CustomPlayer
+        from sample_players import GreedyPlayer
+        for reuse_tree, gc_pause in [(True, False), (False, True)]:
+            player = CustomPlayer(timeout=10., reuse_tree=reuse_tree,
+                                  gc_pause=gc_pause)
+            game = isolation.Board(player, GreedyPlayer(), 5, 5)
+            winner, history, termination = game.play(time_limit=50)
+            self.assertNotEqual(termination, "timeout")
+            self.assertNotEqual(termination, "forfeit")
+            self.assertTrue(gc.isenabled())
+
+
+class SharedTranspositionTableTest(unittest.TestCase):
+    """The shared-memory table behaves like TranspositionTable and is seen
+    by every process attached to it"""
+
+    def test_store_probe_and_attach(self):
+        tt = SharedTranspositionTable(size_mb=0.01)
+        try:
+            tt.store(12345, 3, 1.5, LOWER, (2, 4), 10)
+            other = SharedTranspositionTable(size_mb=0.01, name=tt.name)
+            self.assertEqual(other.probe(12345), (3, 1.5, LOWER, (2, 4)))
+            self.assertIsNone(other.probe(12345 + tt.buckets))
+            other.stop()
+            self.assertTrue(tt.stopped())
+            tt.reset_stop()
+            self.assertFalse(other.stopped())
+            other.close()
+            tt.clear()
+            self.assertIsNone(tt.probe(12345))
+        finally:
+            tt.close()
+
+    def test_torn_entry_is_rejected(self):
+        tt = SharedTranspositionTable(size_mb=0.01)
+        try:
+            tt.store(77, 4, 2., EXACT, (1, 1), 3)
+            i = 2 * (77 % tt.buckets)
+            tt._values[i] = 3.
+            self.assertIsNone(tt.probe(77))
+        finally:
+            tt.close()
+
+
+class ParallelSearchTest(unittest.TestCase):
+    """ParallelAlphaBetaPlayer returns a legal move from its workers"""
+
+    def test_parallel_move(self):
+        player = game_agent.ParallelAlphaBetaPlayer(score_fn=improved_score,
+                                                    workers=2)
+        try:
+            game = search_position(player, 2)
+            move = player.get_move(game, lambda: 1000.)
+            self.assertIn(move, game.get_legal_moves())
+            self.assertEqual(len(player.worker_results), 2)
+            self.assertGreater(player.depth_reached, 0)
+        finally:
+            player.close()
+
+    def test_every_worker_searches(self):
+        # Each worker gets its own task on every move, and one move ends
+        # before the next one starts
+        player = game_agent.ParallelAlphaBetaPlayer(score_fn=improved_score,
+                                                    workers=3)
+        try:
+            for seed in range(3):
+                game = search_position(player, seed)
+                player.get_move(game, isolation.Deadline(150))
+                self.assertEqual([r[3] for r in player.worker_results],
+                                 [0, 1, 2])
+                self.assertTrue(all(r[0] > 0 for r in player.worker_results))
+        finally:
+            player.close()
+
+    def test_unsupported_options(self):
+        for option in ("ponder", "time_manager", "endgame_solver"):
+            with self.assertRaises(ValueError):
+                game_agent.ParallelAlphaBetaPlayer(workers=2, **{option: True})
+        # They apply to the in-process search of a single worker
+        player = game_agent.ParallelAlphaBetaPlayer(workers=1, time_manager=True)
+        self.assertIsNotNone(player.time_manager)
+
+    def test_lazy_imports(self):
+        # The graded module loads without multiprocessing or mmap
+        code = ("import sys, game_agent; print(sorted(m for m in sys.modules "
+                "if m.split('.')[0] in ('multiprocessing', 'mmap')))")
+        output = subprocess.check_output([sys.executable, "-c", code],
+                                         cwd=os.path.dirname(os.path.dirname(
+                                             os.path.abspath(__file__))))
+        self.assertEqual(output.strip(), b"[]")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+"""Unit tests for the self-play dataset generator."""
+
+import math
+import os
+import random
+import shutil
+import tempfile
+import unittest
+
+import game_agent
+import selfplay
+
+from sample_players import RandomPlayer, GreedyPlayer
+
+
+class SelfPlayTest(unittest.TestCase):
+    """Writing, chunking and reading self-play positions"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def generate(self, name, games, **kwargs):
+        path = os.path.join(self.tmp, name)
+        count = selfplay.generate(GreedyPlayer(), RandomPlayer(), games, path,
+                                  width=5, height=5, **kwargs)
+        return path, count
+
+    def test_records(self):
+        path, count = self.generate("data", 6, workers=1, chunk_records=16)
+        self.assertEqual(len(selfplay.chunk_paths(path)), -(-count // 16))
+        with selfplay.DatasetReader(path) as reader:
+            self.assertEqual((reader.width, reader.height), (5, 5))
+            positions = list(reader)
+            self.assertEqual(len(positions), count)
+            self.assertEqual(positions[count // 2][:4],
+                             reader[count // 2][:4])
+            ends = 0
+            for i, position in enumerate(positions):
+                moves = bin(position.blocked).count("1")
+                self.assertEqual(position.side, moves % 2)
+                r, c = position.move
+                self.assertFalse(position.blocked >> r + c * 5 & 1)
+                for location in position.locations:
+                    if moves >= 2:
+                        r, c = location
+                        self.assertTrue(position.blocked >> r + c * 5 & 1)
+                self.assertTrue(math.isnan(position.score))
+                # The last move of a game (played in order by one worker)
+                # is made by its winner
+                if (i + 1 == len(positions) or
+                        bin(positions[i + 1].blocked).count("1") <= moves):
+                    self.assertEqual(position.result, 1)
+                    ends += 1
+            self.assertEqual(ends, 6)
+
+    def test_workers(self):
+        serial, count = self.generate("serial", 4, workers=1)
+        path, _ = self.generate("pool", 4, workers=2, chunk_records=10)
+        # The same games, in another order (scores are NaN, so leave them out)
+        with selfplay.DatasetReader(serial) as a, \
+                selfplay.DatasetReader(path) as b:
+            self.assertEqual(len(b), count)
+            self.assertEqual(sorted(p[:4] + p[5:] for p in a),
+                             sorted(p[:4] + p[5:] for p in b))
+        # Another run adds chunks after the existing ones
+        chunks = selfplay.chunk_paths(path)
+        _, more = self.generate("pool", 2, workers=2, chunk_records=10, seed=1)
+        self.assertEqual(selfplay.chunk_paths(path)[:len(chunks)], chunks)
+        with selfplay.DatasetReader(path) as reader:
+            self.assertEqual(len(reader), count + more)
+
+    def test_sample(self):
+        path, count = self.generate("data", 3, workers=1, chunk_records=8)
+        with selfplay.DatasetReader(path) as reader:
+            every = list(reader)
+            sample = list(reader.sample(10, random.Random(0)))
+            self.assertEqual(len(sample), 10)
+            # The scores are NaN, so compare the other fields
+            every = [p[:4] + p[5:] for p in every]
+            for position in sample:
+                self.assertIn(position[:4] + position[5:], every)
+            self.assertEqual([p[:4] for p in sample],
+                             [p[:4] for p in reader.sample(10, random.Random(0))])
+            with self.assertRaises(IndexError):
+                reader[count]
+
+    def test_search_scores(self):
+        path = os.path.join(self.tmp, "ab")
+        count = selfplay.generate(game_agent.AlphaBetaPlayer(),
+                                  GreedyPlayer(), 1, path,
+                                  workers=1, time_limit=60, width=5, height=5)
+        with selfplay.DatasetReader(path) as reader:
+            self.assertEqual(len(reader), count)
+            scored = [p.score for p in reader if p.side == 0]
+            self.assertTrue(scored)
+            self.assertTrue(all(not math.isnan(s) for s in scored))
+            self.assertTrue(all(math.isnan(p.score) for p in reader
+                                if p.side == 1))
+
+    def test_interrupted_chunk(self):
+        path, count = self.generate("data", 2, workers=1)
+        chunk = selfplay.chunk_paths(path)[-1]
+        with open(chunk, "ab") as f:
+            f.write(b"\0" * (selfplay.RECORD.size - 1))
+        with selfplay.DatasetReader(path) as reader:
+            self.assertEqual(len(reader), count)
+        with open(chunk, "r+b") as f:
+            f.write(b"NOTADATA")
+        with self.assertRaises(ValueError):
+            selfplay.DatasetReader(path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+"""Unit tests for the tournament runner."""
+
+import os
+import shutil
+import tempfile
+import unittest
+
+import tournament
+
+from game_agent import AlphaBetaPlayer
+from sample_players import RandomPlayer, GreedyPlayer, improved_score
+
+
+class TournamentTest(unittest.TestCase):
+    """Scheduling, streaming and resuming of tournament games"""
+
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "results.jsonl")
+        self.tests = [tournament.Agent(GreedyPlayer(), "Greedy")]
+        self.cpus = [tournament.Agent(RandomPlayer(), "Random"),
+                     tournament.Agent(GreedyPlayer(), "Greedy_2")]
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp)
+
+    def test_schedule(self):
+        games = tournament.schedule(self.tests, self.cpus, matches=3)
+        self.assertEqual(len(games), 12)
+        self.assertEqual(len({g.id for g in games}), 12)
+        # each opening is played from both sides
+        first, second = games[0], games[1]
+        self.assertEqual(first.opening, second.opening)
+        self.assertEqual(first.player_1.name, second.player_2.name)
+        self.assertEqual(games, tournament.schedule(self.tests, self.cpus, 3))
+
+    def test_resume(self):
+        games = tournament.schedule(self.tests, self.cpus, matches=2)
+        tournament.run_tournament(games[:5], self.path, workers=1)
+        with open(self.path) as f:
+            lines = f.readlines()
+        self.assertEqual(len(lines), 5)
+        # simulate an interruption in the middle of writing a record
+        with open(self.path, "w") as f:
+            f.writelines(lines[:4] + [lines[4][:10]])
+        results = tournament.run_tournament(games, self.path, workers=2)
+        self.assertEqual(set(results), {g.id for g in games})
+        self.assertEqual(len(tournament.load_results(self.path)), len(games))
+        with open(self.path) as f:
+            self.assertEqual(f.read().count(games[0].id), 1)
+        for record in results.values():
+            self.assertIn(record["winner_name"],
+                          (record["player_1"], record["player_2"]))
+
+    def test_fresh_players(self):
+        # Single-worker games must not share search state between games
+        player = AlphaBetaPlayer(score_fn=improved_score, tt_size_mb=1)
+        self.tests = [tournament.Agent(player, "AB")]
+        games = tournament.schedule(self.tests, self.cpus[:1], matches=1)
+        tournament.run_tournament(games, self.path, workers=1, time_limit=20)
+        self.assertEqual(len(player.tt), 0)
+
+    def test_unique_names(self):
+        names = [a.name for a in tournament.test_agents() + tournament.cpu_agents()]
+        self.assertEqual(len(names), len(set(names)))
+
+
+if __name__ == '__main__':
+    unittest.main()
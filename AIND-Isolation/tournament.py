@@ -0,0 +1,257 @@
+"""Estimate the strength of the custom heuristics by playing them in a
+round-robin tournament against the fixed-depth minimax and alpha-beta
+agents described in the README.
+
+Every test agent plays every opponent from the same `NUM_MATCHES` random
+openings, once from each side.  Games are spread over a process pool and
+each result is appended to a JSON lines file as soon as the game ends; a
+tournament that was interrupted resumes from that file without replaying
+the games already recorded.
+
+Each game gets a fixed seed (derived from its id) for the random move
+order of `Board.get_legal_moves()`, so replaying a game only differs
+through the timing of the iterative deepening agents.
+
+Usage: python tournament.py [-n MATCHES] [-w WORKERS] [-o RESULTS]
+                            [-t TIME_LIMIT]
+"""
+import argparse
+import copy
+import json
+import os
+import random
+import zlib
+
+from collections import namedtuple
+from multiprocessing import Pool
+
+from isolation import Board
+from isolation.isolation import TIME_LIMIT_MILLIS
+from sample_players import (RandomPlayer, open_move_score,
+                            improved_score, center_score)
+from game_agent import (MinimaxPlayer, AlphaBetaPlayer, custom_score,
+                        custom_score_2, custom_score_3)
+
+NUM_MATCHES = 5  # number of openings per pairing (each played from both sides)
+OPENING_PLIES = 2  # random moves at the start of each game
+RESULTS_FILE = "tournament.jsonl"
+
+DESCRIPTION = """
+This script evaluates the performance of the custom_score evaluation
+functions against a baseline agent using alpha-beta search and iterative
+deepening (ID) called `ID_Improved`. The three `AB_Custom` agents use
+ID and alpha-beta search with the custom_score functions defined in
+game_agent.py.
+"""
+
+Agent = namedtuple("Agent", ["player", "name"])
+
+# One scheduled game: the agents in board order, the opening moves and the
+# seed for the game's random number generator
+Game = namedtuple("Game", ["id", "player_1", "player_2", "opening", "seed"])
+
+
+def test_agents():
+    """The agents being evaluated."""
+    return [
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "ID_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score), "AB_Custom"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_2), "AB_Custom_2"),
+        Agent(AlphaBetaPlayer(score_fn=custom_score_3), "AB_Custom_3"),
+    ]
+
+
+def cpu_agents():
+    """The fixed opponents every test agent plays against."""
+    return [
+        Agent(RandomPlayer(), "Random"),
+        Agent(MinimaxPlayer(score_fn=open_move_score), "MM_Open"),
+        Agent(MinimaxPlayer(score_fn=center_score), "MM_Center"),
+        Agent(MinimaxPlayer(score_fn=improved_score), "MM_Improved"),
+        Agent(AlphaBetaPlayer(score_fn=open_move_score), "AB_Open"),
+        Agent(AlphaBetaPlayer(score_fn=center_score), "AB_Center"),
+        Agent(AlphaBetaPlayer(score_fn=improved_score), "AB_Improved"),
+    ]
+
+
+def seed_for(key):
+    """Return a stable 32-bit seed for a string key."""
+    return zlib.crc32(key.encode("utf-8"))
+
+
+def random_opening(seed, plies=OPENING_PLIES):
+    """Return `plies` random legal moves from the empty board."""
+    rng = random.Random(seed)
+    game = Board("Player1", "Player2")
+    moves = []
+    for _ in range(plies):
+        move = rng.choice(sorted(game.get_legal_moves()))
+        game.apply_move(move)
+        moves.append(move)
+    return moves
+
+
+def schedule(test_agents, cpu_agents, matches=NUM_MATCHES):
+    """Return the list of games of the tournament.
+
+    The openings depend only on the opponent and the match number, so every
+    test agent is measured on the same positions.
+    """
+    games = []
+    for cpu in cpu_agents:
+        for match in range(matches):
+            opening = random_opening(seed_for("{}:{}".format(cpu.name, match)))
+            for test in test_agents:
+                for side, agents in enumerate([(test, cpu), (cpu, test)]):
+                    game_id = "{}:{}:{}:{}".format(test.name, cpu.name, match, side)
+                    games.append(Game(game_id, agents[0], agents[1], opening,
+                                      seed_for(game_id)))
+    return games
+
+
+def play_game(args):
+    """Play one scheduled game and return its result record.
+
+    Every game starts from fresh copies of the players, so no search state
+    (transposition table, killer moves, pondering) carries over from one
+    game to the next, in the process pool or not.
+    """
+    game, time_limit = args
+    random.seed(game.seed)
+    player_1, player_2 = copy.deepcopy((game.player_1.player,
+                                        game.player_2.player))
+    board = Board(player_1, player_2)
+    for move in game.opening:
+        board.apply_move(move)
+    winner, history, termination = board.play(time_limit=time_limit)
+    first = winner is player_1
+    return {"id": game.id,
+            "player_1": game.player_1.name,
+            "player_2": game.player_2.name,
+            "winner": 1 if first else 2,
+            "winner_name": (game.player_1 if first else game.player_2).name,
+            "termination": termination,
+            "moves": len(game.opening) + len(history)}
+
+
+def load_results(path):
+    """Return the records already stored in `path`, keyed by game id.
+
+    A partially written last line (from an interrupted run) is ignored.
+    """
+    results = {}
+    if not os.path.exists(path):
+        return results
+    with open(path) as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            results[record["id"]] = record
+    return results
+
+
+def run_tournament(games, path=RESULTS_FILE, workers=None,
+                   time_limit=TIME_LIMIT_MILLIS):
+    """Play every game of `games` not yet recorded in `path`, appending each
+    result as it completes.
+
+    Parameters
+    ----------
+    games : list<Game>
+        The schedule (see schedule()).
+
+    path : str
+        The JSON lines results file; it is created if needed.
+
+    workers : int (optional)
+        The number of processes; defaults to the number of CPU cores.  With
+        1 worker the games are played in this process.
+
+    Returns
+    -------
+    dict
+        The records of every game in `games`, keyed by game id.
+    """
+    results = load_results(path)
+    pending = [(g, time_limit) for g in games if g.id not in results]
+    workers = workers or os.cpu_count() or 1
+    with open(path, "a") as f:
+        # End a partially written line left by an interrupted run, so that
+        # load_results() skips it instead of the next record
+        if f.tell() and not _ends_with_newline(path):
+            f.write("\n")
+        if workers == 1 or len(pending) <= 1:
+            records = map(play_game, pending)
+            _stream(records, results, f)
+        else:
+            with Pool(min(workers, len(pending))) as pool:
+                records = pool.imap_unordered(play_game, pending)
+                _stream(records, results, f)
+    return {g.id: results[g.id] for g in games}
+
+
+def _ends_with_newline(path):
+    with open(path, "rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _stream(records, results, f):
+    """Write each record to `f` as soon as it arrives."""
+    for record in records:
+        f.write(json.dumps(record) + "\n")
+        f.flush()
+        results[record["id"]] = record
+        print("{id}: {winner_name} wins ({termination})".format(**record))
+
+
+def summarize(results, test_agents, cpu_agents):
+    """Print the won/lost table of every test agent against every opponent."""
+    wins = {}
+    for record in results.values():
+        test, cpu, _, side = record["id"].rsplit(":", 3)
+        test_won = record["winner"] == int(side) + 1
+        won, lost = wins.get((test, cpu), (0, 0))
+        wins[test, cpu] = (won + test_won, lost + (not test_won))
+
+    names = [a.name for a in test_agents]
+    print("\n {:^9} {:^13}".format("Match #", "Opponent") +
+          "".join(" {:^13}".format(n) for n in names))
+    print(" " * 24 + " Won | Lost   " * len(names))
+    for i, cpu in enumerate(cpu_agents, 1):
+        row = " {:^9} {:^13}".format(i, cpu.name)
+        for name in names:
+            won, lost = wins.get((name, cpu.name), (0, 0))
+            row += " {:>5} | {:<5}".format(won, lost)
+        print(row)
+    row = " " * 10 + "{:>13}".format("Win Rate:")
+    for name in names:
+        won = sum(wins.get((name, c.name), (0, 0))[0] for c in cpu_agents)
+        total = sum(sum(wins.get((name, c.name), (0, 0))) for c in cpu_agents)
+        row += " {:^13}".format("{:.1%}".format(won / total) if total else "-")
+    print(row)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=DESCRIPTION)
+    parser.add_argument("-n", "--matches", type=int, default=NUM_MATCHES,
+                        help="openings per pairing, each played from both sides")
+    parser.add_argument("-w", "--workers", type=int, default=None,
+                        help="worker processes (default: one per CPU core)")
+    parser.add_argument("-o", "--results", default=RESULTS_FILE,
+                        help="JSON lines file the results are streamed to")
+    parser.add_argument("-t", "--time-limit", type=float,
+                        default=TIME_LIMIT_MILLIS,
+                        help="milliseconds per move")
+    args = parser.parse_args()
+
+    tests, cpus = test_agents(), cpu_agents()
+    games = schedule(tests, cpus, args.matches)
+    results = run_tournament(games, args.results, args.workers, args.time_limit)
+    summarize(results, tests, cpus)
+
+
+if __name__ == "__main__":
+    main()